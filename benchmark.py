@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cache
+from typing import Callable
+
+from enumerations import WORLD
+from game import Game
+from inventory import MarketInv
+from item import PlayerItem, Transaction
+from market import MarketData
+from orderbook import Order, OrderBooks
+from pricehistory import ROLLUPS, PriceHistory
+from routing import RouteTable
+from rng import RNGStreams
+from savegame import MERCHANT_COLUMNS
+from tradeentity import City
+from world import World, generate_world
+
+# a benchmark fails when it is this much slower than its baseline, 0.25 is 25% slower
+REGRESSION_THRESHOLD = 0.25
+# default file results are saved to and compared against
+BASELINE_PATH = 'benchmark_baseline.json'
+# each benchmark is timed REPEATS times and the fastest run is kept
+REPEATS = 5
+# every timed run lasts at least this many seconds, see timeit.Timer.autorange()
+MIN_RUN_SECONDS = 0.2
+
+# scale points, multiples of the number of cities and goods in WORLD
+MARKET_SCALES = [(1, 1), (100, 1), (1, 100)]
+ROUTE_SCALES = [1, 100]
+MERCHANT_SCALES = [100, 1000]
+# worker processes the sharded merchant tick is compared at, 1 is the same tick traded serially
+MERCHANT_PROCESSES = [1, 4]
+ORDER_BOOK_SIZES = [1_000, 100_000]
+HISTORY_SIZES = [10_000, 1_000_000]
+
+# importing game and creating a Game in a fresh interpreter must take less than this, interpreter start up itself is not counted
+STARTUP_BUDGET_SECONDS = 0.05
+# the fastest of STARTUP_RUNS fresh interpreters is compared to the budget
+STARTUP_RUNS = 10
+# modules a headless start must not import, the interactive view and rich load only when a View is created
+UI_MODULES = ['view', 'rich']
+_STARTUP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import pymerchant
+from game import Game
+Game(seed=0)
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, sorted(name for name in sys.modules if name.split('.')[0] in {modules})]))
+'''
+
+
+@dataclass()
+class Benchmark:
+    """
+    A benchmark at one scale point, setup() builds the data and returns the callable that is timed
+    """
+    name: str
+    scale: str
+    setup: Callable[[], Callable[[], object]]
+
+    @property
+    def key(self) -> str:
+        return f'{self.name}[{self.scale}]'
+
+
+BENCHMARKS: list[Benchmark] = []
+
+
+def benchmark(name: str, scales: list) -> Callable:
+    """
+    Registers a setup function as a benchmark at every scale point, the scale is passed to the setup function
+
+    Args:
+        name (str): name of the benchmark
+        scales (list): scale points to run it at
+
+    Returns:
+        Callable: decorator
+    """
+    def register(setup: Callable) -> Callable:
+        for scale in scales:
+            label = 'x'.join(str(part) for part in scale) if isinstance(
+                scale, tuple) else str(scale)
+            BENCHMARKS.append(
+                Benchmark(name, label, lambda scale=scale: setup(scale)))
+        return setup
+    return register
+
+
+@cache
+def scaled_world(city_multiple: int, good_multiple: int) -> World:
+    """
+    Returns WORLD at 1x1, or a generated world with multiples of its number of cities and goods
+
+    Args:
+        city_multiple (int): multiple of the number of cities in WORLD
+        good_multiple (int): multiple of the number of goods in WORLD
+
+    Returns:
+        World: world to benchmark
+    """
+    if city_multiple == good_multiple == 1:
+        return WORLD
+    return World(generate_world(len(WORLD.cities) * city_multiple, len(WORLD.goods) * good_multiple))
+
+
+def scaled_market(scale: tuple[int, int]) -> MarketData:
+    market = MarketData(rng=RNGStreams(0), world=scaled_world(*scale))
+    market.update_pricing()
+    return market
+
+
+def scaled_history(size: int) -> PlayerItem:
+    player_item = PlayerItem(info=WORLD.info_of('wine'), quantity=0)
+    date = datetime(year=1323, month=7, day=29)
+    for i in range(size):
+        # two buys for every sell so the lots never run out
+        if i % 3 == 2:
+            player_item.add_transaction(Transaction(
+                price=120 + i % 7, quantity=10, type_of_transaction='sell', date=date))
+        else:
+            player_item.add_transaction(Transaction(
+                price=100 + i % 11, quantity=10, type_of_transaction='buy', date=date))
+        date += timedelta(minutes=1)
+    return player_item
+
+
+@benchmark('market_tick', MARKET_SCALES)
+def bench_market_tick(scale: tuple[int, int]) -> Callable:
+    market = scaled_market(scale)
+    return market.update_pricing
+
+
+@benchmark('update_item_pricing', MARKET_SCALES)
+def bench_update_item_pricing(scale: tuple[int, int]) -> Callable:
+    market = scaled_market(scale)
+    return MarketInv(market, market.cities[0]).update_item_pricing
+
+
+@benchmark('get_list_of_items', MARKET_SCALES)
+def bench_get_list_of_items(scale: tuple[int, int]) -> Callable:
+    market = scaled_market(scale)
+    return MarketInv(market, market.cities[0]).get_list_of_items
+
+
+@benchmark('set_cost_basis_lifo', HISTORY_SIZES)
+def bench_set_cost_basis_lifo(size: int) -> Callable:
+    # update_item_cost() is a division of running totals, it is the LIFO replay that still grows with the history
+    player_item = scaled_history(size)
+    return lambda: player_item.set_cost_basis('lifo')
+
+
+@benchmark('set_cost_basis', HISTORY_SIZES)
+def bench_set_cost_basis(size: int) -> Callable:
+    player_item = scaled_history(size)
+
+    def replay():
+        player_item.set_cost_basis('fifo')
+        player_item.set_cost_basis('average')
+    return replay
+
+
+@benchmark('execute_trade', [1])
+def bench_execute_trade(scale: int) -> Callable:
+    game = Game(seed=0)
+    game.player.inv.gold = 10 ** 12
+    market_inv = game.player.location.inv
+    market_item = market_inv.get_market_item('wine')
+
+    def trade():
+        game.execute_trade(market_item, 1, game.player.inv,
+                           market_inv, 'buying')
+        game.execute_trade(market_item, 1, game.player.inv,
+                           market_inv, 'selling')
+    return trade
+
+
+@benchmark('merchant_tick', MERCHANT_SCALES)
+def bench_merchant_tick(merchants: int) -> Callable:
+    game = Game(seed=0, merchants=merchants)
+    # markets are already up to date, so only the merchants' trading is timed
+    game.merchants.on_dock = None
+    return game.merchants.step
+
+
+@benchmark('merchant_tick_sharded', [(merchants, processes) for merchants in MERCHANT_SCALES for processes in MERCHANT_PROCESSES])
+def bench_merchant_tick_sharded(scale: tuple[int, int]) -> Callable:
+    merchants, processes = scale
+    game = Game(seed=0, merchants=merchants, processes=processes)
+    atexit.register(game.close)
+    fleet, market = game.merchants, game.market
+    fleet.on_dock = None
+    # every call replays the first tick, when every merchant is docked, so runs at each number of processes time the same work
+    saved = {owner: {column: array(values.typecode, values) for column in columns for values in [getattr(owner, column)]}
+             for owner, columns in ((fleet, MERCHANT_COLUMNS), (market, ['price', 'quantity', 'anchor', 'stock_target', 'propagated_index']))}
+
+    def first_tick():
+        for owner, columns in saved.items():
+            for column, values in columns.items():
+                getattr(owner, column)[:] = values
+        fleet.tick = 0
+        fleet.step()
+    return first_tick
+
+
+@benchmark('order_book_auction', ORDER_BOOK_SIZES)
+def bench_order_book_auction(size: int) -> Callable:
+    market = scaled_market((1, 1))
+    cell = market.get_cell(market.cities[0], 'wine')
+    quote = market.price[cell]
+    # half the orders cross each other around the quote, the rest rest in the book
+    orders = [(('buy', 'sell')[i % 2], 1 + i % 5, quote + (i % 41 - 20) * (1 if i % 2 else -1)) for i in range(size)]
+
+    def auction():
+        books = OrderBooks(market, on_fill=lambda order, quantity, price: None, on_cancel=lambda order: None)
+        for side, quantity, limit in orders:
+            books.submit(Order(0, side, cell, quantity, limit, resting=False))
+        market.price[cell], market.quantity[cell] = quote, 0
+        books.match(datetime.min)
+    return auction
+
+
+@benchmark('price_history_record', [(1, 1), (1, 100)])
+def bench_price_history_record(scale: tuple[int, int]) -> Callable:
+    market = scaled_market(scale)
+    history = PriceHistory(market)
+    hours = iter(range(10 ** 9))
+
+    def record():
+        # one sample per simulation step, so daily and weekly buckets close as they do in a game
+        history.record(0, next(hours) * 6)
+    return record
+
+
+@benchmark('price_history_query', list(ROLLUPS))
+def bench_price_history_query(resolution: str) -> Callable:
+    market = scaled_market((1, 1))
+    history = PriceHistory(market)
+    # long enough to fill every ring
+    for step in range(2 * 4 * 7 * ROLLUPS['weekly'][1]):
+        history.record(0, step * 6)
+    city, good = market.cities[0], market.goods[0]
+    return lambda: history.rollup(city, good, resolution)
+
+
+@benchmark('sort_closest_cities', ROUTE_SCALES)
+def bench_sort_closest_cities(multiple: int) -> Callable:
+    routes = RouteTable(scaled_world(multiple, 1))
+    city = City(name=routes.cities[0], travel_mod_list=[], routes=routes)
+
+    def sort_cold():
+        # reopening a port invalidates the table, so every call rebuilds the routes
+        routes.close_port(routes.cities[-1])
+        routes.open_port(routes.cities[-1])
+        return city.sort_closest_cities()
+    return sort_cold
+
+
+@benchmark('build_combined_inventory_table', [(1, 1), (1, 100)])
+def bench_build_combined_inventory_table(scale: tuple[int, int]) -> Callable:
+    from view import View
+
+    market = scaled_market(scale)
+    market_items = MarketInv(market, market.cities[0]).get_list_of_items()
+    player_items = [PlayerItem(info=item.info, quantity=5) for item in market_items]
+    view = View(animate=False)
+
+    def redraw_after_trade():
+        # a trade changes one row, the rest come from the row cache
+        player_items[0].quantity ^= 1
+        return view.build_combined_inventory_table(market_items, player_items)
+    return redraw_after_trade
+
+
+def run(benchmark_filter: str = '') -> dict[str, float]:
+    """
+    Runs every registered benchmark whose key contains benchmark_filter
+
+    Args:
+        benchmark_filter (str, optional): substring of the benchmark keys to run. Defaults to '' (all).
+
+    Returns:
+        dict[str, float]: seconds per call of each benchmark, fastest of REPEATS runs
+    """
+    results = {}
+    for bench in BENCHMARKS:
+        if benchmark_filter not in bench.key:
+            continue
+        timer = timeit.Timer(bench.setup())
+        number, elapsed = timer.autorange()
+        number = max(number, round(number * MIN_RUN_SECONDS / elapsed))
+        results[bench.key] = min(timer.repeat(
+            repeat=REPEATS, number=number)) / number
+        print(f'{bench.key:<48} {results[bench.key] * 1e6:>14.2f} us')
+    return results
+
+
+def check_startup(budget: float = STARTUP_BUDGET_SECONDS) -> tuple[float, list[str]]:
+    """
+    Times a headless start, importing pymerchant and game and creating a Game, in fresh interpreters and checks it against the startup budget
+
+    Args:
+        budget (float, optional): seconds a start may take. Defaults to STARTUP_BUDGET_SECONDS.
+
+    Returns:
+        tuple[float, list[str]]: seconds of the fastest start, and a line describing each problem found
+    """
+    script = _STARTUP_SCRIPT.format(modules=set(UI_MODULES))
+    # a warm up run is not timed, it writes the bytecode caches unless PYTHONDONTWRITEBYTECODE is set, in which case every start compiles the sources
+    runs = [json.loads(subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                      cwd=os.path.dirname(os.path.abspath(__file__))).stdout)
+            for run in range(STARTUP_RUNS + 1)][1:]
+    fastest = min(elapsed for elapsed, modules in runs)
+    print(f'{"startup":<48} {fastest * 1e6:>14.2f} us')
+
+    problems = []
+    if fastest > budget:
+        problems.append(f'startup: {fastest * 1e3:.1f} ms is over the budget of {budget * 1e3:.0f} ms')
+    imported = runs[0][1]
+    if imported:
+        problems.append(f'startup: headless start imported {", ".join(imported)}')
+    return fastest, problems
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+    """
+    Returns the benchmarks that are slower than their baseline by more than threshold
+
+    Args:
+        results (dict[str, float]): seconds per call from run()
+        baseline (dict[str, float]): seconds per call of the baseline
+        threshold (float, optional): allowed slowdown. Defaults to REGRESSION_THRESHOLD.
+
+    Returns:
+        list[str]: a line describing each regression
+    """
+    regressions = []
+    for key, seconds in results.items():
+        if key in baseline and seconds > baseline[key] * (1 + threshold):
+            regressions.append(
+                f'{key}: {seconds * 1e6:.2f} us vs baseline {baseline[key] * 1e6:.2f} us (+{seconds / baseline[key] - 1:.0%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark PyMerchant's hot paths at several scale points")
+    parser.add_argument('--filter', default=None,
+                        help="only run benchmarks whose name contains this, the startup check only runs unfiltered or with --filter startup")
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help="JSON baseline to compare against")
+    parser.add_argument('--save', action='store_true',
+                        help="save the results as the new baseline")
+    parser.add_argument('--threshold', type=float,
+                        default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    results = run(args.filter or '')
+    problems = []
+    if args.filter is None or args.filter == 'startup':
+        results['startup'], problems = check_startup()
+    for problem in problems:
+        print(f"OVER BUDGET {problem}")
+
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results},
+                      file, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        sys.exit(1 if problems else 0)
+
+    try:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}, run with --save to create one")
+        sys.exit(1 if problems else 0)
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions or problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
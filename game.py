@@ -0,0 +1,592 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta, datetime
+from typing import TYPE_CHECKING, Callable, Literal
+
+from tradeentity import City, Player
+from inventory import MarketInv, PlayerInv
+from market import MarketData
+from routing import RouteTable
+from modifiers import EventScheduler, MarketEvent, TravelModifier, TravelModifierRegistry, generate_market_event, generate_travel_modifier
+from item import Transaction
+from merchants import MerchantFleet
+from orderbook import PLAYER, Order, OrderBooks
+from pricehistory import PriceHistory
+from rng import EVENTS, TRAVEL, RNGStreams
+from profiler import instrument
+
+if TYPE_CHECKING:
+    # only needed for annotations, the planner is imported when a route is first planned
+    from journal import TransactionJournal
+    from planner import TradePlan
+
+# average number of new MarketEvents generated per game day across the whole map
+MARKET_EVENTS_PER_DAY = 2
+# average number of new travel conditions (ice, blockades, storms, pirates, winds) put on a city per game day across the whole map
+TRAVEL_EVENTS_PER_DAY = 0.25
+
+
+@dataclass()
+class TravelResult:
+    """
+    Describes the outcome of Game.travel()
+    """
+    origin: str
+    destination: str
+    time_passed: timedelta
+    arrival_date: datetime
+
+
+@dataclass()
+class TradeResult:
+    """
+    Describes the outcome of Game.trade(), success is False when the trade was rejected and reason says why
+
+    In order book mode a successful trade is only queued, order is the order placed and gold already has the escrow for a buy taken out
+    """
+    item_name: str
+    quantity: int
+    price: int
+    buying_or_selling: Literal['buying', 'selling']
+    success: bool
+    gold: int
+    reason: str = ''
+    order: Order | None = None
+
+
+@dataclass()
+class WaitResult:
+    """
+    Describes the outcome of Game.wait()
+    """
+    time_passed: timedelta
+    current_date: datetime
+
+
+@dataclass()
+class Game:
+    """
+    Game class holds all objects necessary for the game, including Player, City, and all of their objects and attriburtes
+
+    Game logic and initialization of game occurs here
+    """
+    current_date = datetime(year=1323, month=7, day=29, hour=6, minute=0)
+    player: Player
+
+    def __init__(self, seed: int | None = None, journal: TransactionJournal | None = None, merchants: int = 0, processes: int = 1,
+                 order_book: bool = False, price_history: bool = True) -> None:
+        """
+        Games
+
+        The Game can be played through the View or driven headless through travel(), trade() and wait(), which return plain result objects
+
+        Args:
+            seed (int, optional): Seed of the game's RNGStreams, games with the same seed and the same moves play out identically. Defaults to None.
+            journal (TransactionJournal, optional): Journal every executed trade is appended to. Defaults to None.
+            merchants (int, optional): Number of AI merchants trading in the same markets as the player. Defaults to 0.
+            processes (int, optional): Size of the process pool the AI merchants are simulated in, see MerchantFleet. Defaults to 1.
+            order_book (bool, optional): Queue trades as limit orders in per city OrderBooks, matched when time advances, instead of trading with the
+                market at once. Defaults to False.
+            price_history (bool, optional): Keep the price and stock history of every city the game simulates, see PriceHistory. Defaults to True.
+        """
+        self.rng = RNGStreams(seed)
+        self.event_rng = self.rng.stream(EVENTS)
+        self.travel_rng = self.rng.stream(TRAVEL)
+        self.journal = journal
+        self.market = MarketData(rng=self.rng)
+        self.routes = RouteTable()
+        self.travel_modifiers = TravelModifierRegistry(self.routes)
+        self.build_cities()
+        self.player = self.create_player()
+        self.market.update_pricing()
+        self.price_history = PriceHistory(self.market) if price_history else None
+        self.record_prices(self.market.get_row(self.player.location.name), self.current_date)
+        self.events = EventScheduler(
+            self.market, on_change=lambda city, when: self.update_market(self.get_city(city), when))
+        self.next_market_event_date = self.current_date + \
+            timedelta(days=self.event_rng.expovariate(MARKET_EVENTS_PER_DAY))
+        self.next_travel_event_date = self.current_date + \
+            timedelta(days=self.travel_rng.expovariate(TRAVEL_EVENTS_PER_DAY))
+        self.order_books = self.create_order_books() if order_book else None
+        self.merchants = self.create_merchants(merchants, processes) if merchants else None
+
+    @instrument()
+    def advance_time(self, time_to_advance: timedelta):
+        """
+        Advances game time by a datetime.timedelta
+
+        New MarketEvents and travel conditions are generated for the time that passed, and every event or TravelModifier due by the new date is activated
+        or expired
+        AI merchants play every tick due, and in order book mode every book with orders is matched at the new date
+
+        Args:
+            time (timedelta): timedelta is defined in datetime module
+
+        Returns:
+            datetime: the new current_date
+        """
+        self.current_date += time_to_advance
+        while self.next_market_event_date <= self.current_date:
+            self.events.schedule(generate_market_event(
+                self.event_rng, self.next_market_event_date, self.market.cities, self.market.goods, self.market.world))
+            self.next_market_event_date += timedelta(
+                days=self.event_rng.expovariate(MARKET_EVENTS_PER_DAY))
+        self.events.advance(self.current_date)
+        while self.next_travel_event_date <= self.current_date:
+            city, modifier = generate_travel_modifier(self.travel_rng, self.next_travel_event_date, self.market.cities)
+            self.add_travel_modifier(self.get_city(city), modifier)
+            self.next_travel_event_date += timedelta(
+                days=self.travel_rng.expovariate(TRAVEL_EVENTS_PER_DAY))
+        self.travel_modifiers.advance(self.current_date)
+        if self.merchants is not None:
+            self.merchants.advance(self.current_date)
+        if self.order_books is not None:
+            self.order_books.match(self.current_date)
+        return self.current_date
+
+    def add_travel_modifier(self, owner: Player | City, modifier: TravelModifier) -> None:
+        """
+        Adds a TravelModifier to the player or a city, it is removed again at its expires date
+
+        Args:
+            owner (Player | City): Player or City the modifier applies to
+            modifier (TravelModifier): modifier to add
+        """
+        self.travel_modifiers.add(owner, modifier)
+
+    def schedule_market_event(self, event: MarketEvent) -> None:
+        """
+        Schedules a MarketEvent, it takes effect at its time_sent
+
+        Args:
+            event (MarketEvent): event to schedule
+        """
+        self.events.schedule(event)
+        self.events.advance(self.current_date)
+
+    def build_cities(self) -> None:
+        """
+        Creates all city objects for game and assigns them to our game object
+
+        To be run in __init__() function
+
+        Note we use setattr() function because cities are not defined as keyword properties at time of
+
+        Every city inventory is a view over a row of the shared self.market store, and every city shares the game's RouteTable
+        """
+        for city in self.market.cities:
+            new_city = City(city, travel_mod_list=list(),
+                            market=self.market, routes=self.routes, last_updated=self.current_date)
+            setattr(self, city, new_city)
+
+    def create_player(self) -> Player:
+        """
+        Creates player object for game
+
+        Returns:
+            Player: Player object
+        """
+        city = self.get_city(self.market.world.start)
+        return Player(city, travel_mod_list=[])
+
+    def create_order_books(self) -> OrderBooks:
+        """
+        Creates the order books of the game, they catch a city's market up to date before matching its orders
+
+        Returns:
+            OrderBooks: empty order books settling through settle_order() and release_order()
+        """
+        return OrderBooks(self.market, on_fill=self.settle_order, on_cancel=self.release_order,
+                          before_match=lambda city, when: self.update_market(self.get_city(city), when))
+
+    def create_merchants(self, count: int, processes: int = 1) -> MerchantFleet:
+        """
+        Creates the AI merchants of the game, they catch a city's market up to date before trading in it
+
+        Args:
+            count (int): number of merchants
+            processes (int, optional): Size of the process pool they are simulated in. Defaults to 1.
+
+        Returns:
+            MerchantFleet: the merchants
+        """
+        return MerchantFleet(self.market, self.routes, self.rng, count, self.current_date,
+                             on_dock=lambda city, when: self.update_market(self.get_city(city), when), processes=processes, books=self.order_books)
+
+    def close(self) -> None:
+        """
+        Shuts down the process pool of the AI merchants, if they started one, see MerchantFleet.close()
+        """
+        if self.merchants is not None:
+            self.merchants.close()
+
+    def __enter__(self) -> Game:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def list_of_cities(self):
+        """
+        Returns list of cities in game
+
+        Returns:
+            List[City]: List of City objects in game
+        """
+        return [city for city in dir(self) if isinstance(getattr(self, city), City)]
+
+    def get_city(self, city: str) -> City:
+        """
+        Returns city by str lookup
+
+        Args:
+            city (str): Name of city, not the City object itself
+
+        Returns:
+            City: City Object
+        """
+        return getattr(self, city)
+
+    @instrument()
+    def update_market(self, city: City, until: datetime | None = None):
+        """
+        Brings the market of a given city up to the current date
+
+        Markets are simulated lazily, a city's market only catches up when it is observed, or when a MarketEvent changes it, see MarketData.catch_up()
+
+        Args:
+            city (City): City we are updating
+            until (datetime, optional): date to catch up to. Defaults to current_date.
+        """
+        until = self.current_date if until is None else until
+        hours = (until - city.last_updated).total_seconds() / 3600
+        self.market.catch_up([self.market.get_row(city.name)], [hours], self._sample_step([city]))
+        city.last_updated = max(city.last_updated, until)
+
+    def update_all_markets(self):
+        """
+        Brings the market of every city up to the current date in one batch
+        """
+        cities = [self.get_city(city) for city in self.market.cities]
+        self.market.catch_up([self.market.get_row(city.name) for city in cities],
+                             [(self.current_date - city.last_updated).total_seconds() / 3600 for city in cities], self._sample_step(cities))
+        for city in cities:
+            city.last_updated = self.current_date
+
+    def _sample_step(self, cities: list[City]) -> Callable[[int, float], None] | None:
+        # samples the prices after every simulation step, at the game time the step reached
+        if self.price_history is None:
+            return None
+        history = self.price_history
+        start = {self.market.get_row(city.name): history.hour(city.last_updated) for city in cities}
+        return lambda row, hours: history.record(row, start[row] + hours)
+
+    def record_prices(self, row: int, when: datetime) -> None:
+        """
+        Samples the prices and stock of a city into the price history, see PriceHistory.record()
+
+        Args:
+            row (int): row index of the city
+            when (datetime): game date of the sample
+        """
+        if self.price_history is not None:
+            self.price_history.record(row, self.price_history.hour(when))
+
+    @instrument()
+    def execute_trade(self, item, trade_quantity, player_inv: PlayerInv, market_inv: MarketInv, buying_or_selling):
+        # in order book mode the trade is queued as a limit order instead, see place_order()
+        if self.order_books is not None:
+            return self.place_order(item, trade_quantity, buying_or_selling)
+
+        # the trade fills at the average price along its price impact, see MarketData.fill_price()
+        if buying_or_selling == 'buying':
+            self.player.inv.get_player_item(
+                item.item_name).quantity += trade_quantity
+
+            # buying out of the market moves its price up
+            price = item.market.apply_trade(item.cell, -trade_quantity)
+
+            player_inv.gold -= price * trade_quantity
+
+            # update the item cost for the PlayerItem in the PlayerInv
+            transaction = Transaction(price=price, quantity=trade_quantity,
+                                      type_of_transaction='buy', date=self.current_date)
+            player_inv.get_player_item(
+                item.item_name).add_transaction(transaction)
+
+        elif buying_or_selling == 'selling':
+            self.player.inv.get_player_item(
+                item.item_name).quantity -= trade_quantity
+
+            # selling into the market moves its price down
+            price = item.market.apply_trade(item.cell, trade_quantity)
+
+            player_inv.gold += price * trade_quantity
+
+            transaction = Transaction(price=price, quantity=trade_quantity,
+                                      type_of_transaction='sell', date=self.current_date)
+            player_inv.get_player_item(
+                item.item_name).add_transaction(transaction)
+
+        else:
+            print("Error, no trade executed")
+            return
+
+        self.record_prices(market_inv.row, self.current_date)
+
+        if self.journal is not None:
+            self.journal.append(
+                market_inv.market.cities[market_inv.row], item.item_name, transaction)
+
+    def place_order(self, item, quantity: int, buying_or_selling: Literal['buying', 'selling'], limit: int | None = None) -> Order:
+        """
+        Queues a limit order for a MarketItem in the order books, it fills when the books are next matched, see OrderBooks
+
+        The gold a buy may cost, or the cargo a sell offers, is held by the order until it fills or is cancelled
+
+        Args:
+            item (MarketItem): MarketItem to trade
+            quantity (int): quantity to trade
+            buying_or_selling (Literal['buying', 'selling']): side of the order from the player's point of view
+            limit (int, optional): highest average price to buy at or lowest to sell at. Defaults to the price the trade would fill at now, see
+                MarketData.fill_price().
+
+        Raises:
+            ValueError: if the quantity or limit is not positive, the player does not have the gold or cargo the order holds, or a buy would not fit
+                in the hold
+
+        Returns:
+            Order: the order placed
+        """
+        limit = item.fill_price(-quantity if buying_or_selling == 'buying' else quantity) if limit is None else limit
+        if quantity <= 0 or limit <= 0:
+            raise ValueError("An order needs a positive quantity and limit")
+        if buying_or_selling == 'buying':
+            if limit * quantity > self.player.inv.gold:
+                raise ValueError(f"Not enough gold to hold {limit * quantity} for the order")
+            if quantity > self.free_cargo():
+                raise ValueError("Not enough room in the cargo hold for the order")
+            self.player.inv.gold -= limit * quantity
+            side = 'buy'
+        elif buying_or_selling == 'selling':
+            player_item = self.player.inv.get_player_item(item.item_name)
+            if quantity > player_item.quantity:
+                raise ValueError(f"Not enough {item.item_name} in the cargo hold for the order")
+            player_item.quantity -= quantity
+            side = 'sell'
+        else:
+            raise ValueError(f"Unknown trade side {buying_or_selling}")
+        return self.order_books.submit(Order(PLAYER, side, item.cell, quantity, limit))
+
+    def cancel_order(self, order: Order) -> None:
+        """
+        Cancels what is left of one of the player's orders, the gold or cargo it still holds goes back to the player, see release_order()
+
+        Args:
+            order (Order): order placed by place_order()
+
+        Raises:
+            ValueError: if the order is not the player's
+        """
+        if order.trader != PLAYER:
+            raise ValueError("Only the player's own orders can be cancelled")
+        self.order_books.cancel(order)
+
+    def open_orders(self) -> list[Order]:
+        """
+        Returns the player's orders that have not filled or been cancelled yet
+
+        Returns:
+            list[Order]: open orders, empty when the game does not trade through order books
+        """
+        return [] if self.order_books is None else self.order_books.open_orders(PLAYER)
+
+    def free_cargo(self) -> int:
+        """
+        Returns units of free space in the player's cargo hold, less the units their open buy orders take up once they fill
+
+        Returns:
+            int: units the player can still buy
+        """
+        return self.player.get_cargo_space() - sum(order.remaining for order in self.open_orders() if order.side == 'buy')
+
+    def settle_order(self, order: Order, quantity: int, price: int) -> None:
+        """
+        Settles a fill from the order books, the player's fills are recorded like any other trade and the AI merchants' go to their fleet
+
+        Args:
+            order (Order): order filled
+            quantity (int): quantity filled
+            price (int): price filled at
+        """
+        if order.trader != PLAYER:
+            self.merchants.settle(order, quantity, price)
+            return
+
+        row, col = divmod(order.cell, len(self.market.goods))
+        player_item = self.player.inv.get_player_item(self.market.goods[col])
+        if order.side == 'buy':
+            player_item.quantity += quantity
+            # the escrow was taken at the limit price
+            self.player.inv.gold += (order.limit - price) * quantity
+        else:
+            self.player.inv.gold += price * quantity
+        transaction = Transaction(price=price, quantity=quantity, type_of_transaction=order.side, date=self.current_date)
+        player_item.add_transaction(transaction)
+        if self.journal is not None:
+            self.journal.append(self.market.cities[row], player_item.item_name, transaction)
+
+    def release_order(self, order: Order) -> None:
+        """
+        Returns the gold or cargo held by the unfilled rest of a cancelled order
+
+        Args:
+            order (Order): order cancelled
+        """
+        if order.trader != PLAYER:
+            self.merchants.release(order)
+        elif order.side == 'buy':
+            self.player.inv.gold += order.limit * order.remaining
+        else:
+            self.player.inv.get_player_item(self.market.goods[order.cell % len(self.market.goods)]).quantity += order.remaining
+
+    # Headless stepping API, each step is a plain method call that returns its result
+    def get_travel_time(self, destination: str) -> timedelta:
+        """
+        Returns time it takes the player to travel from their current location to destination
+
+        Args:
+            destination (str): Name of destination city
+
+        Raises:
+            ValueError: if no open sea route reaches destination, such as when a modifier closed its port
+
+        Returns:
+            timedelta: travel time
+        """
+        return Player.get_time_to_travel(self.player, self.player.location, self.get_city(destination), self.travel_modifiers)
+
+    def travel(self, destination: str) -> TravelResult:
+        """
+        Sails the player to destination, advancing the clock and updating the market they arrive in
+
+        Args:
+            destination (str): Name of destination city
+
+        Raises:
+            ValueError: if no open sea route reaches destination, see get_travel_time()
+
+        Returns:
+            TravelResult: where the player sailed from and to and how long it took
+        """
+        origin = self.player.location.name
+        time_passed = self.get_travel_time(destination)
+        self.advance_time(time_passed)
+        self.player.location = self.get_city(destination)
+        self.update_market(self.player.location)
+        return TravelResult(origin=origin, destination=destination, time_passed=time_passed, arrival_date=self.current_date)
+
+    def trade(self, item_name: str, quantity: int, buying_or_selling: Literal['buying', 'selling']) -> TradeResult:
+        """
+        Validates and executes a trade in the market of the city the player is in, in order book mode the trade is queued, see place_order()
+
+        Args:
+            item_name (str): TradeGood to trade
+            quantity (int): quantity to trade
+            buying_or_selling (Literal['buying', 'selling']): side of the trade from the player's point of view
+
+        Returns:
+            TradeResult: the trade and the player's gold after it, success is False if the trade was rejected
+        """
+        market_item = self.player.location.inv.get_market_item(item_name)
+        player_item = self.player.inv.get_player_item(item_name)
+        # the average price the trade fills at, or the limit of the order it queues
+        price = market_item.fill_price(-quantity if buying_or_selling == 'buying' else quantity)
+
+        if quantity <= 0:
+            reason = 'quantity must be positive'
+        elif buying_or_selling == 'buying' and not market_item.check_buy(quantity, self.player.inv.gold):
+            reason = 'not enough stock or gold'
+        elif buying_or_selling == 'buying' and quantity > self.free_cargo():
+            reason = 'not enough room in the cargo hold'
+        elif buying_or_selling == 'selling' and not (player_item.check_sell() and quantity <= player_item.quantity):
+            reason = 'not enough cargo'
+        elif buying_or_selling not in ('buying', 'selling'):
+            reason = f'unknown trade side {buying_or_selling}'
+        else:
+            reason = ''
+
+        order = None
+        if not reason:
+            order = self.execute_trade(market_item, quantity, self.player.inv,
+                                       self.player.location.inv, buying_or_selling)
+
+        return TradeResult(item_name=item_name, quantity=quantity, price=price, buying_or_selling=buying_or_selling,
+                           success=not reason, gold=self.player.inv.gold, reason=reason, order=order)
+
+    def plan_trade_route(self, hops: int = 3, horizon: timedelta = timedelta(days=14), beam_width: int = 16) -> TradePlan:
+        """
+        Finds the most profitable itinerary from the player's location for their gold and free cargo space, see planner.plan_trade_route()
+
+        Args:
+            hops (int, optional): maximum number of legs. Defaults to 3.
+            horizon (timedelta, optional): maximum total sailing time. Defaults to 14 days.
+            beam_width (int, optional): number of partial itineraries kept after each hop. Defaults to 16.
+
+        Returns:
+            TradePlan: the best itinerary found
+        """
+        speed = self.player.nautical_miles_per_hour
+        horizon_hours = horizon.total_seconds() / 3600
+        # no voyage is faster than with every speed bonus of the player, and the largest of any city at both ends, so cities further than that can sail
+        # in the horizon are not looked at
+        city_bonus = max(sum(max(mod.speed, 0) for mod in self.get_city(city).travel_mod_list) for city in self.market.cities)
+        fastest = speed * (1 + sum(max(mod.speed, 0) for mod in self.player.travel_mod_list) + 2 * city_bonus)
+        reachable: dict[int, list[tuple[int, float]]] = {}
+
+        def destinations(row: int) -> list[tuple[int, float]]:
+            if row not in reachable:
+                origin = self.get_city(self.market.cities[row])
+                reachable[row] = []
+                for name, distance in self.routes.nearest(origin.name):
+                    if distance / fastest > horizon_hours:
+                        break
+                    destination = self.get_city(name)
+                    hours = distance / (speed * self.travel_modifiers.speed_multiplier(self.player, origin, destination))
+                    if hours <= horizon_hours:
+                        reachable[row].append((self.market.get_row(name), hours))
+            return reachable[row]
+
+        from planner import plan_trade_route
+
+        return plan_trade_route(self.market, self.player.location.name, self.player.inv.gold, self.free_cargo(),
+                                destinations, hops=hops, horizon_hours=horizon_hours, beam_width=beam_width)
+
+    def get_wait_time(self) -> timedelta:
+        """
+        Returns time until 6am the next day, when markets refresh
+
+        Returns:
+            timedelta: time to wait
+        """
+        # use timedelta to advance day by one
+        next_day_datetime = self.current_date + timedelta(days=1)
+
+        # use datetime.replace() function to set the date time to start of day when markets refresh
+        next_day_datetime = next_day_datetime.replace(
+            hour=6, minute=0, second=0)
+
+        return next_day_datetime - self.current_date
+
+    def wait(self) -> WaitResult:
+        """
+        Waits until 6am the next day, when markets refresh, and updates the market the player is in
+
+        Returns:
+            WaitResult: how long the player waited and the new date
+        """
+        time_passed = self.get_wait_time()
+        self.advance_time(time_passed)
+        self.update_market(self.player.location)
+        return WaitResult(time_passed=time_passed, current_date=self.current_date)
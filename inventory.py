@@ -1,9 +1,11 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from random import normalvariate
 
 from item import Item, PlayerItem, MarketItem
-from enumerations import MARKET_GOODS
+from enumerations import WORLD
+from market import MarketData
+from profiler import instrument
+from world import World
 
 
 @dataclass()
@@ -12,18 +14,74 @@ class Inventory:
     Class that describes an Inventory object, super class to PlayerInventory and MarketInventory
     """
 
+    def __init__(self) -> None:
+        """
+        Initializes the item registry of the Inventory
+
+        Items are kept in an ordered registry keyed by item_name, along with inverted indexes by TradeGoodsCategory and by input good.
+        The indexes are updated by add_item() and remove_item() so that lookups never need to walk the whole inventory.
+        """
+        self._items: dict[str, Item] = {}
+        self._by_category: dict[str, list[Item]] = {}
+        self._by_input: dict[str, list[Item]] = {}
+
     def __repr__(self) -> str:
-        return f"{self.item}"
+        return f"{self.get_list_of_items()}"
+
+    def add_item(self, item: Item) -> None:
+        """
+        Adds an item to the inventory, replacing any item with the same item_name, and indexes it
+
+        Args:
+            item (Item): Item object to add
+        """
+        if item.item_name in self._items:
+            self.remove_item(item.item_name)
+        self._items[item.item_name] = item
+        self._by_category.setdefault(item.category, []).append(item)
+        for trade_good in item.inputs:
+            self._by_input.setdefault(trade_good, []).append(item)
+
+    def remove_item(self, item_name: str) -> Item:
+        """
+        Removes an item from the inventory and from its indexes
 
+        Args:
+            item_name (str): name of item to remove
+
+        Returns:
+            Item: The removed Item object
+        """
+        item = self._items.pop(item_name)
+        self._by_category[item.category].remove(item)
+        for trade_good in item.inputs:
+            self._by_input[trade_good].remove(item)
+        return item
+
+    @instrument()
+    def get_item(self, item_name: str) -> Item:
+        """
+        Returns an item by name from the registry
+
+        Args:
+            item_name (str): item name to lookup
+
+        Returns:
+            Item: The Item object
+        """
+        return self._items[item_name]
+
+    @instrument()
     def get_list_of_items(self) -> list[Item]:
         """
-        Returns list of items in inventory
+        Returns list of items in inventory, in the order they were added
 
         Returns:
             list[Item]: list of Item objects
         """
-        return [getattr(self, items) for items in self.__dict__ if isinstance(getattr(self, items), Item)]
+        return list(self._items.values())
 
+    @instrument()
     def has_input(self, trade_good: str) -> list[Item]:
         """
         Returns list of items that have inputs of a given trade_good
@@ -34,9 +92,9 @@ class Inventory:
         Returns:
             list[Item]: List of Item objects
         """
-        return [item for item in self.get_list_of_items(
-        ) if trade_good in item.inputs]
+        return list(self._by_input.get(trade_good, ()))
 
+    @instrument()
     def has_category(self, trade_good_category: str) -> list[Item]:
         """
         Returns list of items that have a specific trade_good_category
@@ -47,7 +105,7 @@ class Inventory:
         Returns:
             list[Item]: List of Item objects
         """
-        return [item for item in self.get_list_of_items() if item.category is trade_good_category]
+        return list(self._by_category.get(trade_good_category, ()))
 
 
 @dataclass(kw_only=True)
@@ -57,21 +115,24 @@ class PlayerInv(Inventory):
 
     """
 
-    def __init__(self) -> None:
+    def __init__(self, world: World = WORLD) -> None:
         """
         Initializes PlayerInventory
+
+        Args:
+            world (World, optional): world whose goods the player can hold. Defaults to WORLD.
         """
+        super().__init__()
         self.gold = 1000
-        for item, info in MARKET_GOODS.items():
-            trade_good = PlayerItem(item_name=item, quantity=0,
-                                    category=info['category'], inputs=info['inputs'])
-            setattr(self, item, trade_good)
+        for info in world.info:
+            self.add_item(PlayerItem(info=info, quantity=0))
 
+    @instrument()
     def get_player_item(self, item: str) -> PlayerItem:
         """
         Returns player_item via an accessor method.
 
-        While not traditionally "pythonic" this prevents runtime errors if an item attribute is not a keyword property of the PlayerInventory
+        Items are looked up in the inventory registry rather than as attributes of the PlayerInventory
 
         Args:
             item (str): item name to lookup
@@ -79,16 +140,7 @@ class PlayerInv(Inventory):
         Returns:
             PlayerItem: The PlayerItem object
         """
-        return getattr(self, item)
-
-    def get_list_of_items(self) -> list[PlayerItem]:
-        """
-        Returns list of items of PlayerItem type in PlayerInventory
-
-        Returns:
-            list[PlayerItem]: PlayerItem Objects
-        """
-        return [getattr(self, items) for items in self.__dict__ if isinstance(getattr(self, items), PlayerItem)]
+        return self.get_item(item)
 
 
 @dataclass(kw_only=True)
@@ -97,38 +149,40 @@ class MarketInv(Inventory):
     Class that describes an MarketInventory object, inherits from Inventory class
     """
 
-    def __init__(self) -> None:
-        """
-        Initializes MarketInventory
-        """
-        for item, info in MARKET_GOODS.items():
-            trade_good = MarketItem(item_name=item, quantity=100, price=100,
-                                    category=info['category'], inputs=info['inputs'])
-            setattr(self, item, trade_good)
-
-    def get_list_of_items(self) -> list[MarketItem]:
-        """
-        Returns list of MarketItems in MarketInventory
-
-        Returns:
-            list[MarketItem]: MarketItem object
+    def __init__(self, market: MarketData | None = None, city: str | None = None) -> None:
         """
-        return [getattr(self, items) for items in self.__dict__ if isinstance(getattr(self, items), MarketItem)]
+        Initializes MarketInventory as a view over one row of a MarketData store
 
+        Args:
+            market (MarketData, optional): Store shared by every city market. Defaults to a new single city store.
+            city (str, optional): Name of the city row in market. Defaults to the first row of market.
+        """
+        super().__init__()
+        if market is None:
+            market = MarketData(cities=[city or 'market'])
+        self.market = market
+        self.row = market.get_row(city) if city is not None else 0
+        start, _ = market.row_span(self.row)
+        world = market.world
+        for col, item in enumerate(market.goods):
+            self.add_item(MarketItem(info=world.info_of(item), market=market, cell=start + col))
+
+    @instrument()
     def get_market_item(self, item: str) -> MarketItem:
         """
-        Returns player_item via an accessor method.
+        Returns market_item via an accessor method.
 
-        While not traditionally "pythonic" this prevents runtime errors if an item attribute is not a keyword property of the PlayerInventory
+        Items are looked up in the inventory registry rather than as attributes of the MarketInventory
 
         Args:
             item (str): item name to lookup
 
         Returns:
-            PlayerItem: The PlayerItem object
+            MarketItem: The MarketItem object
         """
-        return getattr(self, item)
+        return self.get_item(item)
 
+    @instrument()
     def get_market_data(self) -> dict[str, dict[str, int]]:
         """
         Returns a list of list of [item_name, item.price, item.quantity] for all items in market
@@ -137,21 +191,21 @@ class MarketInv(Inventory):
             list[list[str,int,int]]: [[self.item_name, self.item.price, self.item.quantity]...[]]
         """
         market_inv = {}
-        for item in self.get_list_of_items():
-            name = item.item_name
-            quantity = item.quantity
-            price = item.price
-            market_inv[name] = {'quantity': quantity, 'price': price}
+        start, stop = self.market.row_span(self.row)
+        prices = self.market.price[start:stop]
+        quantities = self.market.quantity[start:stop]
+        for col, name in enumerate(self.market.goods):
+            market_inv[name] = {'quantity': quantities[col], 'price': prices[col]}
         return market_inv
 
     def update_item_pricing(self):
-        """_summary_
         """
-        # placeholder value
-        for item in self.get_list_of_items():
-            item.price = round(normalvariate(item.mu, item.sigma))
+        Draws new prices for every item in this market, see MarketData.update_pricing()
+        """
+        self.market.update_pricing([self.row])
 
     def update_item_quantity(self):
-        # self.quantity = 100
-        for item in self.get_list_of_items():
-            item.quantity = 100
+        """
+        Restocks every item in this market, see MarketData.update_quantity()
+        """
+        self.market.update_quantity([self.row])
@@ -1,8 +1,16 @@
 from __future__ import annotations
-from typing import Literal
+from typing import Iterator, Literal, TYPE_CHECKING
+from array import array
+from bisect import bisect_right
+from collections import deque
 from dataclasses import dataclass, field
-from enumerations import TradeGoods, TradeGoodsCategory, MARKET_GOODS
-from datetime import datetime
+from enumerations import CostBasis, DemandLevel, SupplyLevel
+from pricing import demand_level, supply_level
+from datetime import datetime, timedelta
+from world import GoodInfo
+
+if TYPE_CHECKING:
+    from market import MarketData
 
 
 @dataclass(kw_only=True)
@@ -16,51 +24,181 @@ class Transaction:
     date: datetime
 
 
-@dataclass(kw_only=True)
+class TransactionHistory:
+    """
+    Append-only column store of the Transactions of a PlayerItem
+
+    Rather than a list of Transaction dataclasses, each field is kept in its own compact array so that histories of hundreds of thousands of trades stay small.
+    Indexing or iterating the history rebuilds Transaction objects on the fly, so it can be used like the list it replaces.
+    """
+    # dates are stored as whole microseconds since datetime.min
+    _EPOCH = datetime.min
+    _MICROSECOND = timedelta(microseconds=1)
+    __slots__ = ('price', 'quantity', 'is_buy', 'date')
+
+    def __init__(self) -> None:
+        self.price = array('q')
+        self.quantity = array('q')
+        self.is_buy = array('b')
+        self.date = array('q')
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def __repr__(self) -> str:
+        return f"TransactionHistory({len(self)} transactions)"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TransactionHistory):
+            return NotImplemented
+        return (self.price, self.quantity, self.is_buy, self.date) == (other.price, other.quantity, other.is_buy, other.date)
+
+    def __getitem__(self, index: int) -> Transaction:
+        return Transaction(price=self.price[index], quantity=self.quantity[index],
+                           type_of_transaction='buy' if self.is_buy[index] else 'sell',
+                           date=self._EPOCH + timedelta(microseconds=self.date[index]))
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, transaction: Transaction) -> None:
+        """
+        Appends a Transaction to the end of the history
+
+        Args:
+            transaction (Transaction): Transaction to record
+        """
+        self.price.append(transaction.price)
+        self.quantity.append(transaction.quantity)
+        self.is_buy.append(transaction.type_of_transaction == 'buy')
+        self.date.append((transaction.date - self._EPOCH) // self._MICROSECOND)
+
+
+@dataclass(kw_only=True, slots=True, eq=False)
 class Item:
     """
     Class that describes an Item or "TradeGood", super class to PlayerItem and MarketItem
+
+    Items are slotted and hold no static metadata of their own, the name, category and inputs are read from the GoodInfo shared by every item of the good.
+    Item leaves equality to its subclasses, comparing infos alone would make the same good in two cities equal.
     """
-    item_name: TradeGoods
-    quantity: int
-    category: TradeGoodsCategory
-    inputs: list[TradeGoods]
+    info: GoodInfo
+
+    @property
+    def item_name(self) -> str:
+        return self.info.name
+
+    @property
+    def category(self) -> str:
+        return self.info.category
+
+    @property
+    def inputs(self) -> tuple[str, ...]:
+        return self.info.inputs
 
 
-@dataclass()
+@dataclass(slots=True)
 class PlayerItem(Item):
     """
     Class that describes a PlayerItem object, inherits from Item
 
+    cost is tracked incrementally from running totals so that adding a transaction is O(1) however long the transaction_history grows.
+    cost_basis selects how cost is computed:
+        CostBasis.AVERAGE: weighted average price of every purchase
+        CostBasis.FIFO: average price of the lots still held, selling the oldest lots first
+        CostBasis.LIFO: average price of the lots still held, selling the newest lots first
     """
+    quantity: int = 0
     cost: float = 0
+    cost_basis: CostBasis = CostBasis.AVERAGE
     last_seen_price: int = 0
     last_purchase_price: int = 0
     last_purchase_quantity: int = 0
     # last_seen_demand: DemandLevel = DemandLevel.NORMAL
     last_sale_price: int = 0
     last_sale_quantity: int = 0
-    transaction_history: list[Transaction] = field(default_factory=list)
+    transaction_history: TransactionHistory = field(
+        default_factory=TransactionHistory)
+    # running totals used by update_item_cost()
+    _total_buy_cost: int = field(default=0, init=False, repr=False)
+    _total_buy_quantity: int = field(default=0, init=False, repr=False)
+    _lots: deque[list[int]] = field(
+        default_factory=deque, init=False, repr=False)
+    _lots_cost: int = field(default=0, init=False, repr=False)
+    _lots_quantity: int = field(default=0, init=False, repr=False)
 
     def add_transaction(self, transaction):
         self.transaction_history.append(transaction)
+        self._record_transaction(transaction.price, transaction.quantity,
+                                 transaction.type_of_transaction == 'buy')
+        if transaction.type_of_transaction == 'buy':
+            self.last_purchase_price = transaction.price
+            self.last_purchase_quantity = transaction.quantity
+        else:
+            self.last_sale_price = transaction.price
+            self.last_sale_quantity = transaction.quantity
         self.update_item_cost()
 
-    def update_item_cost(self):
-        # use transaction_history to build out an average cost, computed as the sum of all costs divided by the number of purchases, has a rolling average effect so that the user can sell items and then buy more at a different price and the average will reflect this
-        total_cost = 0
-        total_quantity = 0
+    def _record_transaction(self, price: int, quantity: int, is_buy: bool) -> None:
+        """
+        Folds a single transaction into the running totals
 
-        for transaction in self.transaction_history:
-            if transaction.type_of_transaction == 'buy':
-                total_cost += transaction.price * transaction.quantity
-                total_quantity += transaction.quantity
+        Buys add to the weighted average totals and push a lot, sells consume lots from the front (FIFO) or the back (LIFO)
+        """
+        if is_buy:
+            self._total_buy_cost += price * quantity
+            self._total_buy_quantity += quantity
+            self._lots.append([quantity, price])
+            self._lots_cost += price * quantity
+            self._lots_quantity += quantity
+            return
+
+        remaining = quantity
+        while remaining > 0 and self._lots:
+            lot = self._lots[-1] if self.cost_basis == CostBasis.LIFO else self._lots[0]
+            used = min(remaining, lot[0])
+            lot[0] -= used
+            remaining -= used
+            self._lots_cost -= used * lot[1]
+            self._lots_quantity -= used
+            if lot[0] == 0:
+                if self.cost_basis == CostBasis.LIFO:
+                    self._lots.pop()
+                else:
+                    self._lots.popleft()
+
+    def update_item_cost(self):
+        # weighted average cost is the sum of all purchase costs divided by the quantity purchased, has a rolling average effect so that the user can sell items and then buy more at a different price and the average will reflect this
+        # FIFO and LIFO cost is the value of the lots still held divided by the quantity still held
+        if self.cost_basis == CostBasis.AVERAGE:
+            total_cost, total_quantity = self._total_buy_cost, self._total_buy_quantity
+        else:
+            total_cost, total_quantity = self._lots_cost, self._lots_quantity
 
         if total_quantity > 0:
             self.cost = total_cost / total_quantity
         else:
             self.cost = 0
 
+    def set_cost_basis(self, cost_basis: CostBasis) -> None:
+        """
+        Changes the cost basis of the item and recomputes cost
+
+        FIFO and LIFO consume different lots, so the running totals are rebuilt once from transaction_history
+
+        Args:
+            cost_basis (CostBasis): cost basis to use from now on
+        """
+        self.cost_basis = CostBasis(cost_basis)
+        self._total_buy_cost = self._total_buy_quantity = 0
+        self._lots_cost = self._lots_quantity = 0
+        self._lots.clear()
+        history = self.transaction_history
+        for price, quantity, is_buy in zip(history.price, history.quantity, history.is_buy):
+            self._record_transaction(price, quantity, bool(is_buy))
+        self.update_item_cost()
+
     def check_sell(self):
         output = bool
         if self.quantity > 0:
@@ -70,30 +208,103 @@ class PlayerItem(Item):
         return output
 
 
-@dataclass()
 class MarketItem(Item):
     """
     Class that describes a MarketItem object, inherits from Item
 
+    A MarketItem does not hold its own price and quantity, it is a view over one cell of the MarketData store shared by every city
+    Reading or setting price and quantity reads or writes that cell, so a batched market refresh is seen by every MarketItem
     """
-    price: int = 0
-    # demand: DemandLevel = DemandLevel.NORMAL
-    # supply: SupplyLevel = SupplyLevel.NORMAL
     # previous_price: int = 0
     # previous_quantity: int = 0
     # previous_day_demand: DemandLevel = DemandLevel.NORMAL
     # previous_day_supply: SupplyLevel = SupplyLevel.NORMAL
+    __slots__ = ('market', 'cell')
+
+    def __init__(self, *, info: GoodInfo, market: MarketData, cell: int) -> None:
+        """
+        Initializes MarketItem
+
+        Args:
+            info (GoodInfo): static metadata of the TradeGood, shared with every other item of it
+            market (MarketData): store that holds the price and quantity of the item
+            cell (int): index of the item in the MarketData columns
+        """
+        self.info = info
+        self.market = market
+        self.cell = cell
+
+    def __repr__(self) -> str:
+        return f"MarketItem(item_name={self.item_name!r}, quantity={self.quantity}, price={self.price})"
+
+    # two MarketItems are the same item when they view the same cell of the same store, so they can be kept in sets and used as dict keys
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MarketItem):
+            return NotImplemented
+        return self.market is other.market and self.cell == other.cell
+
+    def __hash__(self) -> int:
+        return hash((id(self.market), self.cell))
 
-    def __post_init__(self):
+    @property
+    def price(self) -> int:
+        return self.market.price[self.cell]
+
+    @price.setter
+    def price(self, value: int) -> None:
+        self.market.price[self.cell] = value
+
+    @property
+    def quantity(self) -> int:
+        return self.market.quantity[self.cell]
+
+    @quantity.setter
+    def quantity(self, value: int) -> None:
+        self.market.quantity[self.cell] = value
+
+    @property
+    def mu(self) -> float:
+        return self.market.mu[self.cell]
+
+    @property
+    def sigma(self) -> float:
+        return self.market.sigma[self.cell]
+
+    @property
+    def supply(self) -> SupplyLevel:
+        return supply_level(self.quantity, self.market.base_quantity[self.cell])
+
+    @property
+    def demand(self) -> DemandLevel:
+        return demand_level(self.market.demand[self.cell] * self.market.demand_shock[self.cell])
+
+    def fill_price(self, quantity_change: int) -> int:
+        """
+        Returns the average price per unit a trade of the item would fill at now, see MarketData.fill_price()
+
+        Args:
+            quantity_change (int): change in the market's stock, negative for a buy
+
+        Returns:
+            int: average price per unit
         """
+        return self.market.fill_price(self.cell, quantity_change)
+
+    def max_buy_quantity(self, gold: int) -> int:
+        """
+        Returns the most units of the item that gold pays for, with the price rising as the stock is bought out
+
+        Args:
+            gold (int): gold to spend
 
+        Returns:
+            int: units, at most the stock of the market
         """
-        self.sigma = MARKET_GOODS[self.item_name]['sigma']
-        self.mu = MARKET_GOODS[self.item_name]['mu']
+        return max(0, bisect_right(range(self.quantity + 1), gold, key=lambda quantity: quantity * self.fill_price(-quantity)) - 1)
 
     def check_buy(self, buy_qty, player_gold):
         output = bool
-        if buy_qty <= self.quantity and player_gold >= buy_qty * self.price:
+        if buy_qty <= self.quantity and player_gold >= buy_qty * self.fill_price(-buy_qty):
             output = True
         else:
             output = False
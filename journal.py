@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Iterator, Literal
+
+from item import Transaction
+
+if TYPE_CHECKING:
+    from game import Game
+
+# each record is a header of (payload length, crc32 of payload) followed by the payload
+_RECORD_HEADER = struct.Struct('<II')
+# payload: date in microseconds since datetime.min, price, quantity, is_buy, then city and item name as utf-8 joined by a NUL
+_RECORD_FIELDS = struct.Struct('<qqq?')
+_EPOCH = datetime.min
+_MICROSECOND = timedelta(microseconds=1)
+
+# records buffered before they are written and fsynced
+SYNC_EVERY = 256
+# size of the reads the streaming reader makes
+READ_CHUNK_SIZE = 1 << 16
+
+
+@dataclass()
+class JournalEntry:
+    """
+    One trade read back from a TransactionJournal
+    """
+    city: str
+    item_name: str
+    price: int
+    quantity: int
+    type_of_transaction: Literal['buy', 'sell']
+    date: datetime
+
+    @property
+    def transaction(self) -> Transaction:
+        return Transaction(price=self.price, quantity=self.quantity, type_of_transaction=self.type_of_transaction, date=self.date)
+
+
+class TransactionJournal:
+    """
+    Append-only on-disk log of every trade a Game executes
+
+    Records are buffered and written and fsynced SYNC_EVERY records at a time, or on flush() and close(). Every record carries its length and a checksum,
+    so a crash mid write leaves at most a torn record at the end of the file. The torn tail is ignored by read_journal() and cut off when the journal is
+    reopened, so appending can safely resume after a crash.
+    """
+
+    def __init__(self, path: str, sync_every: int = SYNC_EVERY) -> None:
+        """
+        Opens a journal for appending, creating it if it does not exist
+
+        Args:
+            path (str): journal file
+            sync_every (int, optional): records buffered between fsyncs. Defaults to SYNC_EVERY.
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self._buffer = bytearray()
+        self._pending = 0
+        valid_length = _valid_length(path) if os.path.exists(path) else 0
+        self._file = open(path, 'ab')
+        if self._file.tell() != valid_length:
+            self._file.truncate(valid_length)
+            self._file.seek(valid_length)
+
+    def __enter__(self) -> TransactionJournal:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, city: str, item_name: str, transaction: Transaction) -> None:
+        """
+        Adds a trade to the journal
+
+        Args:
+            city (str): Name of city the trade happened in
+            item_name (str): TradeGood traded
+            transaction (Transaction): the trade
+        """
+        payload = _RECORD_FIELDS.pack((transaction.date - _EPOCH) // _MICROSECOND, transaction.price, transaction.quantity,
+                                      transaction.type_of_transaction == 'buy') + f'{city}\0{item_name}'.encode()
+        self._buffer += _RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+        self._buffer += payload
+        self._pending += 1
+        if self._pending >= self.sync_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes every buffered record and fsyncs the journal
+        """
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+            self._pending = 0
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """
+        Flushes and closes the journal
+        """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def _records(path: str) -> Iterator[tuple[int, bytes]]:
+    """
+    Yields (end offset, payload) of every intact record in a journal, stopping at the first torn or corrupt one
+    """
+    with open(path, 'rb') as file:
+        data = b''
+        offset = 0
+        position = 0
+        while True:
+            chunk = file.read(READ_CHUNK_SIZE)
+            data = data[position:] + chunk
+            position = 0
+            while len(data) - position >= _RECORD_HEADER.size:
+                length, checksum = _RECORD_HEADER.unpack_from(data, position)
+                end = position + _RECORD_HEADER.size + length
+                if end > len(data):
+                    break
+                payload = data[position + _RECORD_HEADER.size:end]
+                if zlib.crc32(payload) != checksum or length < _RECORD_FIELDS.size:
+                    return
+                offset += end - position
+                position = end
+                yield offset, payload
+            if not chunk:
+                return
+
+
+def _valid_length(path: str) -> int:
+    offset = 0
+    for offset, payload in _records(path):
+        pass
+    return offset
+
+
+def read_journal(path: str) -> Iterator[JournalEntry]:
+    """
+    Streams the trades in a journal, oldest first, without loading the whole file
+
+    Args:
+        path (str): journal file
+
+    Yields:
+        JournalEntry: each trade
+    """
+    for offset, payload in _records(path):
+        date, price, quantity, is_buy = _RECORD_FIELDS.unpack_from(payload)
+        city, item_name = payload[_RECORD_FIELDS.size:].decode().split('\0')
+        yield JournalEntry(city=city, item_name=item_name, price=price, quantity=quantity,
+                           type_of_transaction='buy' if is_buy else 'sell', date=_EPOCH + date * _MICROSECOND)
+
+
+def replay_journal(game: Game, path: str) -> int:
+    """
+    Rebuilds the player's gold, cargo and transaction histories by replaying a journal into a fresh Game
+
+    Only the player's side of each trade is replayed, markets keep the state of the Game they are replayed into
+
+    Args:
+        game (Game): Game to replay into
+        path (str): journal file
+
+    Returns:
+        int: number of trades replayed
+    """
+    trades = 0
+    for entry in read_journal(path):
+        player_item = game.player.inv.get_player_item(entry.item_name)
+        if entry.type_of_transaction == 'buy':
+            player_item.quantity += entry.quantity
+            game.player.inv.gold -= entry.price * entry.quantity
+        else:
+            player_item.quantity -= entry.quantity
+            game.player.inv.gold += entry.price * entry.quantity
+        player_item.add_transaction(entry.transaction)
+        trades += 1
+    return trades
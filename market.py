@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import random
+from array import array
+from functools import partial
+from typing import Callable
+
+from enumerations import WORLD
+from production import ProductionGraph, propagate
+from pricing import (BASE_QUANTITY, CONSUMED_DEMAND, CONSUMED_QUANTITY, PRODUCED_DEMAND, PRODUCED_QUANTITY,
+                     apply_trade_impact, fill_price, fill_quantity, simulate_row, target_prices)
+from rng import PRICING, RNGStreams
+from world import World
+
+
+class MarketData:
+    """
+    Columnar store for the markets of every city in the game
+
+    Instead of each MarketItem holding its own price and quantity, every value lives in one flat array per column (price, quantity, mu, sigma, base_quantity, demand).
+    The arrays are laid out row-major as a cities x goods matrix, so the cell for a city, good pair is row * number_of_goods + col.
+
+    This lets the game refresh every market in every city in a single batched pass instead of looping city by city, item by item.
+    MarketInv and MarketItem are views over a row and a cell of this store.
+
+    Goods and cities are looked up in a World, see world.py
+    base_quantity and demand come from the city's productions: cities keep more stock of the goods they produce and pay less for them. See pricing.py for how they drive price.
+    anchor and stock_target start as mu and base_quantity and are derived from input goods for composite goods, see production.py.
+    """
+
+    def __init__(self, cities: list[str] | None = None, goods: list[str] | None = None, rng: RNGStreams | random.Random | None = None,
+                 world: World = WORLD) -> None:
+        """
+        Initializes MarketData
+
+        Args:
+            cities (list[str], optional): Names of the cities (rows) in the store, cities outside of world get neutral productions. Defaults to every city in world.
+            goods (list[str], optional): Names of the trade goods (columns) in the store. Defaults to every good in world.
+            rng (RNGStreams | random.Random, optional): Random number generators used for pricing draws. With RNGStreams every city draws from its own
+                PRICING stream, so a city's prices do not depend on which other cities were simulated. Defaults to the global random module.
+            world (World, optional): World the cities and goods are defined in. Defaults to WORLD.
+        """
+        self.world = world
+        self.cities = list(world.cities if cities is None else cities)
+        self.goods = list(world.goods if goods is None else goods)
+        self.city_index = {city: row for row, city in enumerate(self.cities)}
+        self.good_index = {good: col for col, good in enumerate(self.goods)}
+        if isinstance(rng, RNGStreams):
+            self.rngs = [rng.stream(PRICING, city) for city in self.cities]
+        else:
+            self.rngs = [random if rng is None else rng] * len(self.cities)
+
+        number_of_cities = len(self.cities)
+        world_cols = [world.good_index[good] for good in self.goods]
+        self.mu = array('d', [world.mu[good]
+                        for good in world_cols] * number_of_cities)
+        self.sigma = array('d', [world.sigma[good]
+                           for good in world_cols] * number_of_cities)
+        self.base_quantity = array('d')
+        self.demand = array('d')
+        for city in self.cities:
+            world_row = world.city_index.get(city)
+            produced = None if world_row is None else world.produced[world_row]
+            for good in world_cols:
+                if produced is None:
+                    self.base_quantity.append(BASE_QUANTITY)
+                    self.demand.append(1)
+                elif good in produced:
+                    self.base_quantity.append(PRODUCED_QUANTITY)
+                    self.demand.append(PRODUCED_DEMAND)
+                else:
+                    self.base_quantity.append(CONSUMED_QUANTITY)
+                    self.demand.append(CONSUMED_DEMAND)
+        self.price = array('q', [100]) * len(self.mu)
+        self.quantity = array('q', [round(base)
+                              for base in self.base_quantity])
+
+        self.production = ProductionGraph(self.goods, world)
+        self.anchor = array('d', self.mu)
+        self.stock_target = array('d', self.base_quantity)
+        self.propagated_index = array('d', [1]) * len(self.mu)
+        # multipliers on demand and stock_target from active MarketEvents, see modifiers.EventScheduler
+        self.demand_shock = array('d', [1]) * len(self.mu)
+        self.supply_shock = array('d', [1]) * len(self.mu)
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def get_row(self, city: str) -> int:
+        """
+        Returns the row index of a city
+
+        Args:
+            city (str): Name of city
+
+        Returns:
+            int: row index into the store
+        """
+        return self.city_index[city]
+
+    def get_cell(self, city: str, good: str) -> int:
+        """
+        Returns the flat index of a city, good pair
+
+        Args:
+            city (str): Name of city
+            good (str): TradeGood
+
+        Returns:
+            int: index into every column array
+        """
+        return self.city_index[city] * len(self.goods) + self.good_index[good]
+
+    def row_span(self, row: int) -> tuple[int, int]:
+        """
+        Returns the start and stop indexes of a row in the column arrays
+
+        Args:
+            row (int): row index of a city
+
+        Returns:
+            tuple[int, int]: (start, stop) slice bounds
+        """
+        start = row * len(self.goods)
+        return start, start + len(self.goods)
+
+    def update_pricing(self, rows: list[int] | None = None) -> None:
+        """
+        Draws new prices around their target price for the given rows, or for every city when rows is None, in one batched pass over each row
+
+        Args:
+            rows (list[int], optional): Row indexes of the cities to refresh. Defaults to None (all cities).
+        """
+        for row in range(len(self.cities)) if rows is None else rows:
+            start, stop = self.row_span(row)
+            gauss = self.rngs[row].gauss
+            self.price[start:stop] = array('q', [max(1, round(gauss(target, sigma))) for target, sigma in zip(
+                target_prices(self, start, stop), self.sigma[start:stop])])
+            propagate(self, row)
+
+    def update_quantity(self, rows: list[int] | None = None) -> None:
+        """
+        Restocks the given rows to their base_quantity, or every city when rows is None
+
+        Args:
+            rows (list[int], optional): Row indexes of the cities to restock. Defaults to None (all cities).
+        """
+        for row in range(len(self.cities)) if rows is None else rows:
+            start, stop = self.row_span(row)
+            self.quantity[start:stop] = array(
+                'q', [round(base) for base in self.base_quantity[start:stop]])
+            propagate(self, row)
+
+    def catch_up(self, rows: list[int], hours: list[float], on_step: Callable[[int, float], None] | None = None) -> None:
+        """
+        Simulates the markets of the given rows forward by a number of game hours each, see pricing.simulate_row()
+
+        Args:
+            rows (list[int]): Row indexes of the cities to simulate
+            hours (list[float]): Game hours elapsed for each row since it was last simulated
+            on_step (Callable[[int, float], None], optional): called after each simulation step with the row and the game hours it has been simulated so far.
+                Defaults to None.
+        """
+        for row, elapsed in zip(rows, hours):
+            simulate_row(self, row, elapsed, None if on_step is None else partial(on_step, row))
+
+    def fill_price(self, cell: int, quantity_change: int) -> int:
+        """
+        Returns the average price per unit a trade in a cell would fill at now, see pricing.fill_price()
+
+        Args:
+            cell (int): index of the city, good pair traded
+            quantity_change (int): change in the market's stock, negative when the player buys
+
+        Returns:
+            int: average price per unit
+        """
+        return fill_price(self, cell, quantity_change)
+
+    def fill_quantity(self, cell: int, quantity_change: int, limit: int) -> int:
+        """
+        Returns how many units of a trade in a cell would fill now within a limit price, see pricing.fill_quantity()
+
+        Args:
+            cell (int): index of the city, good pair traded
+            quantity_change (int): change in the market's stock the whole trade would make, negative when the player buys
+            limit (int): highest average price a buy pays, or lowest a sale gets
+
+        Returns:
+            int: units that fill
+        """
+        return fill_quantity(self, cell, quantity_change, limit)
+
+    def apply_trade(self, cell: int, quantity_change: int) -> int:
+        """
+        Changes the stock of a cell by a trade, moving its price, see pricing.apply_trade_impact(), and re-derives the goods built from it
+
+        Args:
+            cell (int): index of the city, good pair traded
+            quantity_change (int): change in the market's stock, negative when the player buys
+
+        Returns:
+            int: average price per unit the trade filled at
+        """
+        price = apply_trade_impact(self, cell, quantity_change)
+        row, col = divmod(cell, len(self.goods))
+        propagate(self, row, [col])
+        return price
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import os
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from math import floor
+from typing import TYPE_CHECKING, Callable
+
+from orderbook import Order
+from pricing import apply_trade_impact, fill_price
+from production import propagate
+from rng import MERCHANTS, CounterRandom, derive_key
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+    from market import MarketData
+    from orderbook import OrderBooks
+    from rng import RNGStreams
+    from routing import RouteTable
+
+# AI merchants act every MERCHANT_TICK_HOURS game hours, the merchants docked in a city trade together as one batch each tick
+MERCHANT_TICK_HOURS = 6
+# gold, hold and speed of an AI merchant's cog, the same as the player's
+MERCHANT_GOLD = 1000
+MERCHANT_CARGO_CAPACITY = 500
+MERCHANT_SPEED = 6
+# share of its gold a merchant spends on a purchase, as in simulation.greedy_strategy()
+MERCHANT_SPEND_SHARE = 0.5
+# a merchant sails on to one of this many nearest ports
+MERCHANT_DESTINATIONS = 5
+# the docked cities of a tick are split into this many shards per process, so that busy and quiet cities even out across the pool
+SHARDS_PER_PROCESS = 4
+# a shard is only sent to the process pool with at least this many docked merchants, below that pickling it costs more than trading it here
+MIN_SHARD_MERCHANTS = 250
+
+
+@dataclass(slots=True)
+class DockedCity:
+    """
+    One city's market and the merchants docked there for one tick, the unit of work a shard trades
+
+    price, quantity and mu are copies of the city's row of MarketData, and gold, cargo and cost are copies of the docked merchants' rows, cargo and cost
+    laid out merchants x goods. Being plain copies, a DockedCity can be traded in another process and sent back, see trade_city().
+    """
+    row: int
+    # key of the city's stream for the tick, see trade_city()
+    key: int
+    price: array
+    quantity: array
+    mu: array
+    merchants: list[int]
+    gold: array
+    cargo: array
+    cost: array
+    # (row, sailing hours) of the ports the merchants may sail on to
+    voyages: list[tuple[int, float]]
+    # filled in by trade_city(), the port each merchant sails to and the hours it sails for
+    destination: array | None = None
+    sailing_hours: array | None = None
+    trades: int = 0
+
+
+def decide_city(docked: DockedCity) -> tuple[list[list[int]], int | None]:
+    """
+    Makes the trading decisions of every merchant docked in a city at once, from the market as the merchants found it
+
+    The price index (price / mu) of the row is computed once and shared by every merchant. Each merchant sells every good worth more than it paid,
+    and buys the good that is cheapest relative to its usual price, as in simulation.greedy_strategy().
+
+    Args:
+        docked (DockedCity): city to decide for
+
+    Returns:
+        tuple[list[list[int]], int | None]: the goods each merchant sells, and the good to buy, None if the market is sold out
+    """
+    goods = len(docked.price)
+    price, cargo, cost = docked.price, docked.cargo, docked.cost
+    price_index = [item_price / mu for item_price, mu in zip(price, docked.mu)]
+    in_stock = [good for good in range(goods) if docked.quantity[good] > 0]
+    buy = min(in_stock, key=price_index.__getitem__) if in_stock else None
+    sells = [[good for good, (held, paid, item_price) in enumerate(zip(cargo[slot * goods:(slot + 1) * goods], cost[slot * goods:(slot + 1) * goods], price))
+              if held > 0 and item_price > paid] for slot in range(len(docked.merchants))]
+    return sells, buy
+
+
+def buy_quantity(price: int, stock: int, gold: int, held: int) -> int:
+    """
+    Returns how much of a good a merchant buys at a price
+
+    Args:
+        price (int): price of the good
+        stock (int): stock of the good in the market
+        gold (int): gold of the merchant
+        held (int): units of cargo the merchant already holds
+
+    Returns:
+        int: units to buy, what the market has, what fits in the hold and what MERCHANT_SPEND_SHARE of the merchant's gold pays for
+    """
+    return min(stock, MERCHANT_CARGO_CAPACITY - held, floor(gold * MERCHANT_SPEND_SHARE / price))
+
+
+def choose_voyages(docked: DockedCity, rng: CounterRandom) -> None:
+    """
+    Picks the port each merchant docked in a city sails to next, and how long it sails for
+
+    Args:
+        docked (DockedCity): city the merchants sail from, destination and sailing_hours are filled in
+        rng (CounterRandom): the city's stream for the tick
+    """
+    docked.destination = array('l')
+    docked.sailing_hours = array('d')
+    for slot in range(len(docked.merchants)):
+        destination, hours = rng.choice(docked.voyages) if docked.voyages else (docked.row, MERCHANT_TICK_HOURS)
+        docked.destination.append(destination)
+        docked.sailing_hours.append(hours)
+
+
+def trade_city(docked: DockedCity) -> DockedCity:
+    """
+    Trades every merchant docked in a city against the city's market in one batch, and picks the port each one sails to next
+
+    Decisions are made for the whole batch at once, see decide_city(). The orders then fill one merchant at a time, in an order shuffled by the city's
+    stream for the tick. Orders for the same MarketItem conflict deterministically: every fill moves the price and stock the next merchant trades at,
+    see pricing.apply_trade_impact(), and a buy is cut down to the stock left and the gold the merchant has at the new price. Each fill is at the average
+    price along its own price impact, at most twice the quote at the STOCK_ELASTICITY of 0.5, so spending MERCHANT_SPEND_SHARE of the gold at the quote
+    cannot overdraw.
+
+    Args:
+        docked (DockedCity): city to trade, updated in place
+
+    Returns:
+        DockedCity: the traded city
+    """
+    goods = len(docked.price)
+    price, quantity, gold, cargo, cost = docked.price, docked.quantity, docked.gold, docked.cargo, docked.cost
+    rng = CounterRandom(docked.key)
+    sells, buy = decide_city(docked)
+
+    # fills, one merchant at a time in the order drawn for the tick
+    order = list(range(len(docked.merchants)))
+    rng.shuffle(order)
+    for slot in order:
+        base = slot * goods
+        for good in sells[slot]:
+            held = cargo[base + good]
+            gold[slot] += apply_trade_impact(docked, good, held) * held
+            cargo[base + good] = 0
+            docked.trades += 1
+        if buy is not None:
+            quantity_bought = buy_quantity(price[buy], quantity[buy], gold[slot], sum(cargo[base:base + goods]))
+            if quantity_bought > 0:
+                held = cargo[base + buy]
+                paid = apply_trade_impact(docked, buy, -quantity_bought)
+                cost[base + buy] = (cost[base + buy] * held + paid * quantity_bought) / (held + quantity_bought)
+                gold[slot] -= paid * quantity_bought
+                cargo[base + buy] = held + quantity_bought
+                docked.trades += 1
+
+    choose_voyages(docked, rng)
+    return docked
+
+
+def trade_shard(shard: list[DockedCity]) -> list[DockedCity]:
+    """
+    Trades a shard of docked cities, see trade_city(), run in a worker process by MerchantFleet
+
+    Args:
+        shard (list[DockedCity]): cities to trade
+
+    Returns:
+        list[DockedCity]: the traded cities
+    """
+    return [trade_city(docked) for docked in shard]
+
+
+class MerchantFleet:
+    """
+    AI merchants competing with the player for the goods of the same City markets
+
+    Merchants are kept column-wise like MarketData: location, gold and arrival (game hours since start) are flat arrays indexed by merchant, and cargo and
+    cost (average price paid) are merchants x goods matrices, so a fleet of thousands of merchants is a handful of arrays rather than thousands of objects.
+
+    Every MERCHANT_TICK_HOURS the merchants docked in each city trade as one batch against its market, see trade_city(), and sail on to one of the
+    nearest ports. Within a tick a city's batch only touches its own row of the market and only draws from its own stream for the tick, so the docked
+    cities are split into shards that a process pool trades in parallel, and the results are identical for any number of processes. Ticks with too few
+    docked merchants to fill two shards of MIN_SHARD_MERCHANTS, or a machine with a single core, trade in this process, see step().
+
+    With OrderBooks the merchants' decisions become limit orders instead, matched with the orders of the player and every other merchant in the city in
+    one batch auction at the end of the tick. Their gold and cargo are escrowed when an order is placed and settled by settle() and release().
+    """
+
+    def __init__(self, market: MarketData, routes: RouteTable, rng: RNGStreams, count: int, start: datetime,
+                 on_dock: Callable[[str, datetime], None] | None = None, processes: int = 1, books: OrderBooks | None = None) -> None:
+        """
+        Initializes MerchantFleet, merchant i starts docked in city i of the market, wrapping around
+
+        Args:
+            market (MarketData): store the merchants trade in
+            routes (RouteTable): sea routes the merchants sail
+            rng (RNGStreams): streams of the game, merchants draw from MERCHANTS streams keyed by city and tick
+            count (int): number of merchants
+            start (datetime): game date of the first tick
+            on_dock (Callable[[str, datetime], None], optional): called before merchants trade in a city, to bring its market up to date. Defaults to None.
+            processes (int, optional): Size of the process pool the shards are traded in, at most one per core, 1 trades in this process. Defaults to 1.
+            books (OrderBooks, optional): order books to trade through, the auctions run in this process. Defaults to None (trade with the market directly).
+        """
+        self.market = market
+        self.routes = routes
+        self.rng = rng
+        self.start = start
+        self.on_dock = on_dock
+        self.processes = processes
+        self.books = books
+        self.tick = 0
+        self.trades = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+        goods = len(market.goods)
+        self.location = array('l', [merchant % len(market.cities) for merchant in range(count)])
+        self.gold = array('q', [MERCHANT_GOLD]) * count
+        self.arrival = array('d', [0]) * count
+        self.cargo = array('q', [0]) * (count * goods)
+        self.cost = array('d', [0]) * (count * goods)
+
+    def __len__(self) -> int:
+        return len(self.gold)
+
+    def __repr__(self) -> str:
+        return f"MerchantFleet({len(self)} merchants, tick {self.tick})"
+
+    @property
+    def next_tick_date(self) -> datetime:
+        return self.start + timedelta(hours=self.tick * MERCHANT_TICK_HOURS)
+
+    def advance(self, now: datetime) -> None:
+        """
+        Plays every tick due by now
+
+        Args:
+            now (datetime): current game date
+        """
+        while self.next_tick_date <= now:
+            self.step()
+
+    def step(self) -> None:
+        """
+        Plays one tick: every merchant that has arrived trades in the city it is docked in, and sets sail again
+        """
+        when = self.next_tick_date
+        hours = self.tick * MERCHANT_TICK_HOURS
+        docked: dict[int, list[int]] = {}
+        for merchant, (row, arrival) in enumerate(zip(self.location, self.arrival)):
+            if arrival <= hours:
+                docked.setdefault(row, []).append(merchant)
+
+        batches = [self._dock(row, docked[row], when) for row in sorted(docked)]
+        # more processes than cores only adds pickling
+        processes = min(self.processes, os.cpu_count() or 1)
+        number_of_shards = min(len(batches), processes * SHARDS_PER_PROCESS, sum(len(batch.merchants) for batch in batches) // MIN_SHARD_MERCHANTS)
+        if self.books is not None:
+            self._auction(batches, when, hours)
+        elif processes == 1 or number_of_shards < 2:
+            traded = trade_shard(batches)
+        else:
+            if self._executor is None:
+                # the process pool is only imported and started by fleets that shard, headless starts stay light
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._executor = ProcessPoolExecutor(max_workers=processes)
+            shards = [batches[shard::number_of_shards] for shard in range(number_of_shards)]
+            traded = [batch for shard in self._executor.map(trade_shard, shards) for batch in shard]
+
+        if self.books is None:
+            for batch in traded:
+                self._undock(batch, hours)
+        self.tick += 1
+
+    def _auction(self, batches: list[DockedCity], when: datetime, hours: float) -> None:
+        goods = len(self.market.goods)
+        voyages = []
+        for batch in batches:
+            rng = CounterRandom(batch.key)
+            sells, buy = decide_city(batch)
+            start = batch.row * goods
+            order = list(range(len(batch.merchants)))
+            rng.shuffle(order)
+            for slot in order:
+                merchant = batch.merchants[slot]
+                base = merchant * goods
+                for good in sells[slot]:
+                    # a merchant only sells for more than it paid, the cargo is held by the order until it fills
+                    held = self.cargo[base + good]
+                    self.cargo[base + good] = 0
+                    self.books.submit(Order(merchant, 'sell', start + good, held, floor(self.cost[base + good]) + 1, resting=False))
+                if buy is not None:
+                    quantity = buy_quantity(batch.price[buy], batch.quantity[buy], self.gold[merchant], sum(self.cargo[base:base + goods]))
+                    if quantity > 0:
+                        # the limit is what the buy would fill at in the market as the merchant found it, see pricing.fill_price()
+                        limit = fill_price(batch, buy, -quantity)
+                        self.gold[merchant] -= limit * quantity
+                        self.books.submit(Order(merchant, 'buy', start + buy, quantity, limit, resting=False))
+            voyages.append((batch, rng))
+
+        self.books.match(when, [batch.row for batch in batches])
+        for batch, rng in voyages:
+            choose_voyages(batch, rng)
+            for slot, merchant in enumerate(batch.merchants):
+                self.location[merchant] = batch.destination[slot]
+                self.arrival[merchant] = hours + batch.sailing_hours[slot]
+
+    def settle(self, order: Order, quantity: int, price: int) -> None:
+        """
+        Settles a fill of a merchant's order, the escrowed gold a buy did not need is refunded
+
+        Args:
+            order (Order): order filled
+            quantity (int): quantity filled
+            price (int): price filled at
+        """
+        merchant = order.trader
+        cell = merchant * len(self.market.goods) + order.cell % len(self.market.goods)
+        if order.side == 'buy':
+            held = self.cargo[cell]
+            self.cost[cell] = (self.cost[cell] * held + price * quantity) / (held + quantity)
+            self.cargo[cell] = held + quantity
+            self.gold[merchant] += (order.limit - price) * quantity
+        else:
+            self.gold[merchant] += price * quantity
+        self.trades += 1
+
+    def release(self, order: Order) -> None:
+        """
+        Returns what a merchant escrowed for the unfilled rest of a cancelled order
+
+        Args:
+            order (Order): order cancelled
+        """
+        if order.side == 'buy':
+            self.gold[order.trader] += order.limit * order.remaining
+        else:
+            self.cargo[order.trader * len(self.market.goods) + order.cell % len(self.market.goods)] += order.remaining
+
+    def _dock(self, row: int, merchants: list[int], when: datetime) -> DockedCity:
+        city = self.market.cities[row]
+        if self.on_dock is not None:
+            self.on_dock(city, when)
+        start, stop = self.market.row_span(row)
+        goods = stop - start
+        cargo, cost = array('q'), array('d')
+        for merchant in merchants:
+            cargo.extend(self.cargo[merchant * goods:(merchant + 1) * goods])
+            cost.extend(self.cost[merchant * goods:(merchant + 1) * goods])
+        voyages = [(self.market.city_index[destination], distance / MERCHANT_SPEED)
+                   for destination, distance in self.routes.nearest(city)[:MERCHANT_DESTINATIONS] if destination in self.market.city_index]
+        return DockedCity(row=row, key=derive_key(self.rng.seed, MERCHANTS, city, str(self.tick)), price=self.market.price[start:stop],
+                          quantity=self.market.quantity[start:stop], mu=self.market.mu[start:stop], merchants=merchants,
+                          gold=array('q', [self.gold[merchant] for merchant in merchants]), cargo=cargo, cost=cost, voyages=voyages)
+
+    def _undock(self, batch: DockedCity, hours: float) -> None:
+        start, stop = self.market.row_span(batch.row)
+        changed = [good for good, (old, new) in enumerate(zip(self.market.quantity[start:stop], batch.quantity)) if old != new]
+        if changed:
+            self.market.price[start:stop] = batch.price
+            self.market.quantity[start:stop] = batch.quantity
+            propagate(self.market, batch.row, changed)
+        goods = stop - start
+        for slot, merchant in enumerate(batch.merchants):
+            self.gold[merchant] = batch.gold[slot]
+            self.cargo[merchant * goods:(merchant + 1) * goods] = batch.cargo[slot * goods:(slot + 1) * goods]
+            self.cost[merchant * goods:(merchant + 1) * goods] = batch.cost[slot * goods:(slot + 1) * goods]
+            self.location[merchant] = batch.destination[slot]
+            self.arrival[merchant] = hours + batch.sailing_hours[slot]
+        self.trades += batch.trades
+
+    def close(self) -> None:
+        """
+        Shuts down the process pool, if one was started
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def main():
+    import argparse
+    import statistics
+    import time
+
+    from game import Game
+
+    parser = argparse.ArgumentParser(description="Simulate AI merchants trading across the markets of a headless game")
+    parser.add_argument('merchants', type=int, help="number of AI merchants")
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--order-book', action='store_true',
+                        help="trade through per city order books matched in a batch auction each tick")
+    args = parser.parse_args()
+
+    with Game(seed=args.seed, merchants=args.merchants, processes=args.processes, order_book=args.order_book) as game:
+        started = time.perf_counter()
+        game.advance_time(timedelta(days=args.days))
+        elapsed = time.perf_counter() - started
+
+    gold = game.merchants.gold
+    print(f"Merchants: {len(gold)}, ticks: {game.merchants.tick}, trades: {game.merchants.trades}, {elapsed:.2f} s")
+    print(f"Gold: mean {statistics.fmean(gold):.0f}, median {statistics.median(gold):.0f}, min {min(gold)}, max {max(gold)}")
+
+
+if __name__ == "__main__":
+    main()
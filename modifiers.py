@@ -1,126 +1,459 @@
-# from __future__ import annotations
-
-# from dataclasses import dataclass
-# from datetime import datetime
-# from enum import Enum
-
-
-# @dataclass()
-# class MarketEvent:
-#     """
-#     MarketEvent()
-
-#     event_type: Supply(shock) | Demand(shock)
-#     affected_region: None | Region that is affected refer to class Regions(enum)
-#     affected_city: City affected (required) - Market Events are assigned at City level, cannot be populated to region alone
-#     affected_category: TradeGoodsCategory | None - Good category if specified
-#     affected_trade_good: TradeGoods | None - Trade good specifically affected
-#     time_to_expire: datetime.timedelta - to be used to set a specific time expiry
-#     time_sent: datetime - record of when MarketEvent object created, (may delete)
-
-#     Describes a MarketEvent object
-#     These are events that affect supply and demand for goods across the world
-#     They are generated by the game every turn at random and generally can be thought of as following a gaussian distribution in their affect and occurance
-
-#
-#     class also features the relevant classmethods
-#     """
-#     event_type: Enum
-#     affected_region: Enum
-#     affected_city: Enum
-#     affected_category: Enum
-#     affected_trade_good: Enum
-#     time_to_expire: datetime
-#     time_sent: datetime
-
-#     @classmethod
-#     def get_MarketEvent(cls, city, item):
-#         """
-#         Returns list of MarketEvent() objects for a given city, item pair
-#         Allows lookup of specific events with regards to specific items in specific cities
-#         Args:
-#             city (City): City that you are looking for checking for a MarketEvent
-#             item (MarketItem(item)): Item or TradeGood that you are checking for an applicable MarketEvent
-
-#         Returns:
-#             list[MarketEvent]: All MarketEvent objects for a given city, item pair
-#         """
-#         [getattr(city, event) for event in city.__dict__ if isinstance(
-#             getattr(city, event), MarketEvent)]
-
-#     @classmethod
-#     def delete_MarketEvent(cls, event: MarketEvent):
-#         """
-#         Deletes MarketEvent from city attributes when called
-
-#         Args:
-#             event (MarketEvent): MarketEvent obj to be deleted
-#         """
-#         delattr(event.affected_city, event.__repr__())
-
-#     @classmethod
-#     def get_all_events(cls, city):
-#         """
-#         Returns list of MarketEvents in a city when called
-
-#         Args:
-#             city (City): City MarketEvent are in city attributes at time of call
-
-#         Returns:
-#             List[MarketEvent]: List of all MarketEvent objects
-#         """
-#         return [getattr(city, events) for events in city.__dict__ if isinstance(getattr(city, events), MarketEvent)]
-
-#     @classmethod
-#     def create_MarketEvent(cls, city, event):
-#         """
-#         Placeholder - working on UUID system for marketevents, MarketEvent Generator
-
-#         Args:
-#             city (_type_): _description_
-#             rumor (_type_): _description_
-#         """
-#         pass
-
-
-# @dataclass()
-# class TravelModifier:
-#     """
-#     Describes a TravelModifier object, modifies travel speed and thereby time to arrival in a city. This can affect whether or not a player can arrive in time before a MarketEvent expires changing pricing and available good quantities.
-#     """
-#     speed: float | None
-#     # pirates: bool | None
-#     # blockade: bool | None
-
-#     # speed is a % mod ranging from -50% to +50%
-#     @classmethod
-#     def set_travel_modifiers(cls, obj, travel_modifier):
-#         """
-#         Sets or appends TravelModifier Objects to Player | City  objects current TravelModifiers as called by get_travel_modifiers(obj)
-
-#         Args:
-#             obj (Any): Player | City
-#             travel_modifier (TravelModifier): TravelModifier object to append to obj
-
-#         Calls:
-#             cls.get_travel_modifiers(obj): Returns list of TravelModifier
-
-#         Returns:
-#             None
-#         """
-#         mod_list = cls.get_travel_modifiers(obj)
-#         mod_list.append(travel_modifier)
-#         setattr(obj, 'travel_mod_list', mod_list)
-
-#     @classmethod
-#     def get_travel_modifiers(cls, obj):
-#         """
-#         Returns list of TravlelModifier objects for a given object at time of method call
-
-#         Args:
-#             obj (Any): Player | City affected by a TravelModifier
-
-#         Returns:
-#             list[TravelModifier]: list of all TravelModifier applying to Player | City
-#         """
-#         return getattr(obj, 'travel_mod_list')
+from __future__ import annotations
+
+import heapq
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Callable, TYPE_CHECKING
+
+from enumerations import WORLD, DemandLevel, Region, SupplyLevel, TradeGoods, TradeGoodsCategory
+
+if TYPE_CHECKING:
+    from item import MarketItem
+    from market import MarketData
+    from routing import RouteTable
+    from tradeentity import City, Player
+    from world import World
+
+# multiplier a MarketEvent applies to demand (DemandLevel) or to the stock target (SupplyLevel) of the goods it affects
+EVENT_MULTIPLIERS: dict[DemandLevel | SupplyLevel, float] = {
+    DemandLevel.ABSENT: 0.2, DemandLevel.LOW: 0.6, DemandLevel.REDUCED: 0.85, DemandLevel.NORMAL: 1,
+    DemandLevel.ELEVATED: 1.25, DemandLevel.HIGH: 1.6, DemandLevel.EXTREME: 2.2,
+    SupplyLevel.ABSENT: 0.05, SupplyLevel.LOW: 0.3, SupplyLevel.REDUCED: 0.7, SupplyLevel.NORMAL: 1,
+    SupplyLevel.ELEVATED: 1.5, SupplyLevel.HIGH: 2.2, SupplyLevel.EXTREME: 3.5}
+
+
+@dataclass(eq=False)
+class MarketEvent:
+    """
+    MarketEvent()
+
+    event_type: DemandLevel | SupplyLevel - the demand or supply shock, e.g. SupplyLevel.LOW is a poor harvest, DemandLevel.HIGH a war
+    affected_city: City name affected, None to affect every city in affected_region
+    affected_region: None | Region that is affected refer to class Regions(enum)
+    affected_category: TradeGoodsCategory | None - Good category if specified
+    affected_trade_good: TradeGoods | None - Trade good specifically affected, every good in affected_category (or every good) if None
+    time_sent: datetime - when the event takes effect
+    time_to_expire: datetime - when the event stops taking effect
+
+    Describes a MarketEvent object
+    These are events that affect supply and demand for goods across the world
+    They are generated by the game every turn at random and generally can be thought of as following a gaussian distribution in their affect and occurance
+    """
+    event_type: DemandLevel | SupplyLevel
+    time_sent: datetime
+    time_to_expire: datetime
+    affected_city: str | None = None
+    affected_region: Region | None = None
+    affected_category: TradeGoodsCategory | None = None
+    affected_trade_good: TradeGoods | None = None
+
+    @property
+    def multiplier(self) -> float:
+        return EVENT_MULTIPLIERS[self.event_type]
+
+    def describe(self) -> str:
+        """
+        Returns a one line description of the event as a rumor heard in the trading house
+
+        Returns:
+            str: description
+        """
+        place = (self.affected_city or self.affected_region or 'the Hanse').title()
+        goods = self.affected_trade_good or self.affected_category or 'all goods'
+        kind = 'demand' if isinstance(self.event_type, DemandLevel) else 'supply'
+        return f"{self.event_type.name.lower()} {kind} of {goods} in {place} until {self.time_to_expire:%b %d}"
+
+
+class EventScheduler:
+    """
+    Time ordered scheduler of MarketEvents
+
+    Every scheduled event sits in a single min-heap keyed by the datetime it activates and, once active, the datetime it expires.
+    Advancing the clock pops only the events that are due, so a tick costs O(log n) per due event however many events are scheduled.
+    Active events are indexed by city and by market cell, so the events affecting a city or a MarketItem are a dictionary lookup away.
+
+    When an event activates or expires the demand_shock or supply_shock of the cells it affects is recomputed from the count of events still active there per level.
+    on_change, if set, is called with the city name and the event time first, so that a lazily simulated market can catch up under the old shocks.
+    """
+    _EXPIRE = 0
+    _ACTIVATE = 1
+
+    def __init__(self, market: MarketData, on_change: Callable[[str, datetime], None] | None = None) -> None:
+        """
+        Initializes EventScheduler
+
+        Args:
+            market (MarketData): market store the events affect
+            on_change (Callable[[str, datetime], None], optional): called before the shocks of a city change. Defaults to None.
+        """
+        self.market = market
+        self.on_change = on_change
+        self._queue: list[tuple[datetime, int, int, MarketEvent]] = []
+        self._sequence = count()
+        # events with an entry in the queue, and those of them that were cancelled and are skipped when popped
+        self._queued: set[MarketEvent] = set()
+        self._cancelled: set[MarketEvent] = set()
+        self.active_by_city: dict[str, set[MarketEvent]] = {}
+        self.active_by_cell: dict[int, set[MarketEvent]] = {}
+        self._cells: dict[MarketEvent, list[int]] = {}
+        self._level_counts: dict[tuple[int, bool], dict[DemandLevel | SupplyLevel, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._queue) - len(self._cancelled)
+
+    def schedule(self, event: MarketEvent) -> None:
+        """
+        Adds an event to the queue, it activates at its time_sent
+
+        Args:
+            event (MarketEvent): event to schedule
+        """
+        heapq.heappush(self._queue, (event.time_sent,
+                       self._ACTIVATE, next(self._sequence), event))
+        self._queued.add(event)
+
+    def cancel(self, event: MarketEvent, now: datetime) -> None:
+        """
+        Removes an event, deactivating it now if it is active. Its queue entry is skipped when popped rather than searched for. Events that were never
+        scheduled, have expired or are already cancelled are left alone.
+
+        Args:
+            event (MarketEvent): event to cancel
+            now (datetime): current game date
+        """
+        if event not in self._queued or event in self._cancelled:
+            return
+        self._cancelled.add(event)
+        if event in self._cells:
+            self._deactivate(event, now)
+
+    def advance(self, now: datetime) -> list[MarketEvent]:
+        """
+        Activates and expires every event due at or before now, in time order
+
+        Args:
+            now (datetime): current game date
+
+        Returns:
+            list[MarketEvent]: events that activated
+        """
+        activated = []
+        queue = self._queue
+        while queue and queue[0][0] <= now:
+            when, action, sequence, event = heapq.heappop(queue)
+            if event in self._cancelled:
+                # a cancelled event has exactly one entry left in the queue
+                self._cancelled.discard(event)
+                self._queued.discard(event)
+                continue
+            if action == self._ACTIVATE:
+                self._activate(event, when)
+                heapq.heappush(queue, (event.time_to_expire,
+                               self._EXPIRE, next(self._sequence), event))
+                activated.append(event)
+            else:
+                self._deactivate(event, when)
+                self._queued.discard(event)
+        return activated
+
+    def scheduled(self) -> list[tuple[MarketEvent, bool]]:
+        """
+        Returns every event still in the queue and whether it is active
+
+        Returns:
+            list[tuple[MarketEvent, bool]]: (event, active) pairs in queue order
+        """
+        return [(event, action == self._EXPIRE) for when, action, sequence, event in sorted(self._queue)
+                if event not in self._cancelled]
+
+    def restore(self, event: MarketEvent, active: bool) -> None:
+        """
+        Puts back an event returned by scheduled(), as when loading a saved game
+
+        Active events are re-indexed and their shocks reapplied without catching markets up, since the saved markets already reflect them
+
+        Args:
+            event (MarketEvent): event to restore
+            active (bool): whether the event had already activated
+        """
+        if not active:
+            self.schedule(event)
+            return
+        on_change, self.on_change = self.on_change, None
+        self._activate(event, event.time_sent)
+        self.on_change = on_change
+        heapq.heappush(self._queue, (event.time_to_expire,
+                       self._EXPIRE, next(self._sequence), event))
+        self._queued.add(event)
+
+    def events_for_city(self, city: str) -> list[MarketEvent]:
+        """
+        Returns every active event in a city
+
+        Args:
+            city (str): Name of city
+
+        Returns:
+            list[MarketEvent]: active events
+        """
+        return list(self.active_by_city.get(city, ()))
+
+    def events_for_item(self, item: MarketItem) -> list[MarketEvent]:
+        """
+        Returns every active event affecting a MarketItem
+
+        Args:
+            item (MarketItem): item to look up
+
+        Returns:
+            list[MarketEvent]: active events
+        """
+        return list(self.active_by_cell.get(item.cell, ()))
+
+    def _affected_cells(self, event: MarketEvent) -> dict[str, list[int]]:
+        market = self.market
+        if event.affected_city is not None:
+            cities = [event.affected_city]
+        else:
+            cities = [city for city in market.cities if event.affected_region is None
+                      or market.world.region_of(city) == event.affected_region]
+        if event.affected_trade_good is not None:
+            goods = [event.affected_trade_good]
+        elif event.affected_category is not None:
+            goods = [good for good in market.goods
+                     if market.world.category_of(good) == event.affected_category]
+        else:
+            goods = market.goods
+        cols = [market.good_index[good] for good in goods]
+        return {city: [market.get_row(city) * len(market.goods) + col for col in cols] for city in cities}
+
+    def _activate(self, event: MarketEvent, when: datetime) -> None:
+        cells_by_city = self._affected_cells(event)
+        self._cells[event] = [
+            cell for cells in cells_by_city.values() for cell in cells]
+        for city, cells in cells_by_city.items():
+            if self.on_change is not None:
+                self.on_change(city, when)
+            self.active_by_city.setdefault(city, set()).add(event)
+            for cell in cells:
+                self.active_by_cell.setdefault(cell, set()).add(event)
+            self._refresh(cells, event.event_type, 1)
+
+    def _deactivate(self, event: MarketEvent, when: datetime) -> None:
+        cells = self._cells.pop(event)
+        number_of_goods = len(self.market.goods)
+        for row in sorted({cell // number_of_goods for cell in cells}):
+            city = self.market.cities[row]
+            if self.on_change is not None:
+                self.on_change(city, when)
+            self.active_by_city[city].discard(event)
+        for cell in cells:
+            self.active_by_cell[cell].discard(event)
+        self._refresh(cells, event.event_type, -1)
+
+    def _refresh(self, cells: list[int], event_type: DemandLevel | SupplyLevel, change: int) -> None:
+        """
+        Counts events per level on each cell, so the shock is a product over at most seven levels however many events overlap
+        """
+        market = self.market
+        is_demand = isinstance(event_type, DemandLevel)
+        shock = market.demand_shock if is_demand else market.supply_shock
+        for cell in cells:
+            counts = self._level_counts.setdefault((cell, is_demand), {})
+            counts[event_type] = counts.get(event_type, 0) + change
+            product = 1.0
+            for level, number in counts.items():
+                if number:
+                    product *= EVENT_MULTIPLIERS[level] ** number
+            shock[cell] = product
+
+
+def generate_market_event(rng: random.Random, now: datetime, cities: list[str], goods: list[str], world: World = WORLD) -> MarketEvent:
+    """
+    Creates a random MarketEvent for a random city and good, starting within three days and lasting one to fourteen days
+
+    Args:
+        rng (random.Random): random number generator
+        now (datetime): current game date
+        cities (list[str]): cities to choose from
+        goods (list[str]): goods to choose from
+        world (World, optional): World the goods are defined in. Defaults to WORLD.
+
+    Returns:
+        MarketEvent: new event, not yet scheduled
+    """
+    event_type = rng.choice([level for level in (*DemandLevel, *SupplyLevel)
+                             if level not in (DemandLevel.NORMAL, SupplyLevel.NORMAL)])
+    time_sent = now + timedelta(hours=rng.uniform(0, 72))
+    time_to_expire = time_sent + timedelta(days=rng.uniform(1, 14))
+    city = rng.choice(cities)
+    good = rng.choice(goods)
+    # roughly one event in three hits a whole category of goods
+    if rng.random() < 0.3:
+        return MarketEvent(event_type=event_type, time_sent=time_sent, time_to_expire=time_to_expire,
+                           affected_city=city, affected_category=world.category_of(good))
+    return MarketEvent(event_type=event_type, time_sent=time_sent, time_to_expire=time_to_expire,
+                       affected_city=city, affected_trade_good=good)
+
+
+# slowest a voyage can be made by stacking modifiers
+MIN_SPEED_MULTIPLIER = 0.1
+
+# the random travel conditions a city can be hit by, see generate_travel_modifier(): the TravelModifier fields, how many days the condition lasts,
+# how often it is drawn relative to the others and, for ice, the months it can happen in
+TRAVEL_MODIFIER_PRESETS: dict[str, dict] = {
+    'ice': {'speed': 0, 'closes_port': True, 'days': (7, 30), 'weight': 2, 'months': (11, 12, 1, 2, 3)},
+    'blockade': {'speed': 0, 'closes_port': True, 'days': (3, 10), 'weight': 1},
+    'storms': {'speed': -0.3, 'days': (1, 4), 'weight': 4},
+    'pirates': {'speed': -0.25, 'days': (5, 20), 'weight': 2},
+    'favourable winds': {'speed': 0.15, 'days': (1, 5), 'weight': 4},
+}
+
+
+def generate_travel_modifier(rng: random.Random, now: datetime, cities: list[str]) -> tuple[str, TravelModifier]:
+    """
+    Creates a random TravelModifier from TRAVEL_MODIFIER_PRESETS for a random city, starting now and lasting as long as its preset says
+
+    Args:
+        rng (random.Random): random number generator
+        now (datetime): current game date
+        cities (list[str]): cities to choose from
+
+    Returns:
+        tuple[str, TravelModifier]: the city and its new modifier, not yet added
+    """
+    names = [name for name, preset in TRAVEL_MODIFIER_PRESETS.items() if now.month in preset.get('months', (now.month,))]
+    name = rng.choices(names, weights=[TRAVEL_MODIFIER_PRESETS[name]['weight'] for name in names])[0]
+    preset = TRAVEL_MODIFIER_PRESETS[name]
+    return rng.choice(cities), TravelModifier(name, preset['speed'], preset.get('closes_port', False), now + timedelta(days=rng.uniform(*preset['days'])))
+
+
+@dataclass(eq=False)
+class TravelModifier:
+    """
+    Describes a TravelModifier object, modifies travel speed and thereby time to arrival in a city. This can affect whether or not a player can arrive in time before a MarketEvent expires changing pricing and available good quantities.
+
+    speed is a % mod, e.g. -0.25 for pirates or +0.2 for a ship upgrade. The speeds of every modifier on the player, the origin and the destination are summed onto 1.
+    closes_port on a City modifier (ice, blockade) closes every sea lane into and out of the city until the modifier expires.
+    expires is the date the modifier is removed, None for a permanent modifier such as a ship upgrade.
+    """
+    name: str
+    speed: float = 0
+    closes_port: bool = False
+    expires: datetime | None = None
+
+    @staticmethod
+    def combined_speed(modifiers: list[TravelModifier]) -> float:
+        """
+        Returns the speed multiplier of a list of modifiers, never less than MIN_SPEED_MULTIPLIER
+
+        Args:
+            modifiers (list[TravelModifier]): modifiers that apply to a voyage
+
+        Returns:
+            float: multiplier on the player's travel speed
+        """
+        total_percentage = 1
+        for mod in modifiers:
+            total_percentage += mod.speed
+        return max(MIN_SPEED_MULTIPLIER, total_percentage)
+
+
+class TravelModifierRegistry:
+    """
+    Keeps the TravelModifiers of Players and Cities and a cache of the composite speed multiplier of every (player, origin, destination) voyage
+
+    Modifiers are stored on their owner's travel_mod_list as before. Adding or expiring a modifier only drops the cached voyages that involve its owner,
+    so planning routes can ask for thousands of travel times and only pay for summing modifiers once per voyage per change.
+    Modifiers that expire sit in a min-heap keyed by expiry date, advancing the clock pops only those that are due.
+    Port closing modifiers close and reopen the city in the RouteTable.
+    """
+
+    def __init__(self, routes: RouteTable) -> None:
+        """
+        Initializes TravelModifierRegistry
+
+        Args:
+            routes (RouteTable): RouteTable that port closing modifiers close ports in
+        """
+        self.routes = routes
+        self._cache: dict[tuple[int, str, str], float] = {}
+        self._keys_by_owner: dict[int, set[tuple[int, str, str]]] = {}
+        self._expiries: list[tuple[datetime, int, TravelModifier, Player | City]] = []
+        self._sequence = count()
+
+    def add(self, owner: Player | City, modifier: TravelModifier) -> None:
+        """
+        Adds a modifier to a Player or City
+
+        Args:
+            owner (Player | City): object the modifier applies to
+            modifier (TravelModifier): modifier to add
+        """
+        owner.travel_mod_list.append(modifier)
+        if modifier.expires is not None:
+            heapq.heappush(self._expiries, (modifier.expires,
+                           next(self._sequence), modifier, owner))
+        if modifier.closes_port and hasattr(owner, 'name'):
+            self.routes.close_port(owner.name)
+        self._invalidate(owner)
+
+    def remove(self, owner: Player | City, modifier: TravelModifier) -> None:
+        """
+        Removes a modifier from a Player or City, reopening its port if no other modifier keeps it closed
+
+        Args:
+            owner (Player | City): object the modifier applies to
+            modifier (TravelModifier): modifier to remove
+        """
+        if modifier not in owner.travel_mod_list:
+            return
+        owner.travel_mod_list.remove(modifier)
+        if modifier.closes_port and hasattr(owner, 'name') and not any(mod.closes_port for mod in owner.travel_mod_list):
+            self.routes.open_port(owner.name)
+        self._invalidate(owner)
+
+    def advance(self, now: datetime) -> list[TravelModifier]:
+        """
+        Removes every modifier that has expired by now
+
+        Args:
+            now (datetime): current game date
+
+        Returns:
+            list[TravelModifier]: expired modifiers
+        """
+        expired = []
+        while self._expiries and self._expiries[0][0] <= now:
+            when, sequence, modifier, owner = heapq.heappop(self._expiries)
+            self.remove(owner, modifier)
+            expired.append(modifier)
+        return expired
+
+    def speed_multiplier(self, player: Player, origin: City, destination: City) -> float:
+        """
+        Returns the composite speed multiplier of a voyage, cached until a modifier of the player, the origin or the destination changes
+
+        Args:
+            player (Player): Player sailing
+            origin (City): City sailed from
+            destination (City): City sailed to
+
+        Returns:
+            float: multiplier on the player's travel speed
+        """
+        key = (id(player), origin.name, destination.name)
+        multiplier = self._cache.get(key)
+        if multiplier is None:
+            multiplier = TravelModifier.combined_speed(
+                player.travel_mod_list + origin.travel_mod_list + destination.travel_mod_list)
+            self._cache[key] = multiplier
+            for owner in (player, origin, destination):
+                self._keys_by_owner.setdefault(id(owner), set()).add(key)
+        return multiplier
+
+    def _invalidate(self, owner: Player | City) -> None:
+        for key in self._keys_by_owner.pop(id(owner), ()):
+            self._cache.pop(key, None)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Literal
+
+if TYPE_CHECKING:
+    from market import MarketData
+
+# trader id of the player's orders, AI merchants are numbered from 0, see merchants.MerchantFleet
+PLAYER = -1
+
+
+@dataclass(slots=True, eq=False)
+class Order:
+    """
+    A limit order for a good in a city, cell is the city, good pair's index in MarketData
+
+    A buy fills at limit or less and a sell at limit or more. Resting orders stay in their book until they fill or are cancelled, other orders are
+    cancelled by the first auction they do not fill in.
+    """
+    trader: int
+    side: Literal['buy', 'sell']
+    cell: int
+    quantity: int
+    limit: int
+    resting: bool = True
+    filled: int = 0
+    cancelled: bool = False
+    # set by OrderBooks.submit(), earlier orders fill first at the same limit
+    sequence: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return 0 if self.cancelled else self.quantity - self.filled
+
+
+class OrderBook:
+    """
+    The limit orders for one good in one city, kept in a max-heap of bids and a min-heap of asks keyed by (limit, sequence)
+
+    Adding an order is O(log n) and the orders stay in heap order between auctions, so no auction ever re-sorts the book. Filled and cancelled orders
+    are dropped lazily when they reach the top of their heap.
+    """
+
+    def __init__(self) -> None:
+        self.bids: list[tuple[int, int, Order]] = []
+        self.asks: list[tuple[int, int, Order]] = []
+        # non-resting orders added since the last auction, cancelled by it if they do not fill
+        self.expiring: list[Order] = []
+        # cancelled orders still in the heaps
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self.bids) + len(self.asks)
+
+    def add(self, order: Order) -> None:
+        if order.side == 'buy':
+            heapq.heappush(self.bids, (-order.limit, order.sequence, order))
+        else:
+            heapq.heappush(self.asks, (order.limit, order.sequence, order))
+        if not order.resting:
+            self.expiring.append(order)
+
+    @staticmethod
+    def top(heap: list[tuple[int, int, Order]]) -> Order | None:
+        """
+        Returns the best live order of a heap, dropping the filled and cancelled orders above it
+        """
+        while heap and heap[0][2].remaining == 0:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def discard(self) -> None:
+        """
+        Counts an order cancelled inside the heaps, and drops every dead order once they make up half the book
+        """
+        self.stale += 1
+        if self.stale * 2 > len(self):
+            self.bids[:] = [entry for entry in self.bids if entry[2].remaining]
+            self.asks[:] = [entry for entry in self.asks if entry[2].remaining]
+            heapq.heapify(self.bids)
+            heapq.heapify(self.asks)
+            self.stale = 0
+
+
+class OrderBooks:
+    """
+    Limit order books for every city, good pair of a MarketData store, matched in batch auctions
+
+    Orders are queued with submit() during a tick and matched at the tick's end by match(). In each book the crossing bids and asks are matched best
+    first, and every trade between traders clears at one uniform price, the market's quote clamped to the limits of the last bid and ask matched.
+    Whatever still crosses the city's own market then trades with it as a direct trade would, at the average price along its price impact and moving its
+    price and stock, see MarketData.apply_trade().
+
+    The books do not touch gold or cargo, whoever submits an order escrows what it needs and settles fills and cancels through on_fill and on_cancel.
+    """
+
+    def __init__(self, market: MarketData, on_fill: Callable[[Order, int, int], None], on_cancel: Callable[[Order], None],
+                 before_match: Callable[[str, datetime], None] | None = None) -> None:
+        """
+        Initializes OrderBooks
+
+        Args:
+            market (MarketData): store whose cities and goods the books trade
+            on_fill (Callable[[Order, int, int], None]): called with an order, the quantity filled and the price it filled at
+            on_cancel (Callable[[Order], None]): called with an order when it is cancelled, to release what is left of it
+            before_match (Callable[[str, datetime], None], optional): called before a city's books are matched, to bring its market up to date. Defaults to None.
+        """
+        self.market = market
+        self.on_fill = on_fill
+        self.on_cancel = on_cancel
+        self.before_match = before_match
+        self.books: dict[int, OrderBook] = {}
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return sum(len(book) for book in self.books.values())
+
+    def submit(self, order: Order) -> Order:
+        """
+        Queues an order in the book of its cell, it fills at the next match()
+
+        Args:
+            order (Order): order to queue
+
+        Returns:
+            Order: the order, to check on or cancel later
+        """
+        self._sequence += 1
+        order.sequence = self._sequence
+        book = self.books.get(order.cell)
+        if book is None:
+            book = self.books[order.cell] = OrderBook()
+        book.add(order)
+        return order
+
+    def cancel(self, order: Order) -> None:
+        """
+        Cancels what is left of an order
+
+        Args:
+            order (Order): order to cancel
+        """
+        if order.remaining:
+            self.on_cancel(order)
+            order.cancelled = True
+            self.books[order.cell].discard()
+
+    def open_orders(self, trader: int | None = None) -> list[Order]:
+        """
+        Returns the live orders of a trader, or of every trader
+
+        Args:
+            trader (int, optional): trader id. Defaults to None (every trader).
+
+        Returns:
+            list[Order]: orders with quantity left to fill
+        """
+        return [order for book in self.books.values() for heap in (book.bids, book.asks) for _, _, order in heap
+                if order.remaining and (trader is None or order.trader == trader)]
+
+    def match(self, when: datetime, rows: list[int] | None = None) -> None:
+        """
+        Runs the batch auction of every book with orders in the given rows, or in every city when rows is None
+
+        Args:
+            when (datetime): game date of the auction
+            rows (list[int], optional): Row indexes of the cities to match. Defaults to None (all cities).
+        """
+        goods = len(self.market.goods)
+        if rows is None:
+            cells = sorted(self.books)
+        else:
+            rows = set(rows)
+            cells = sorted(cell for cell in self.books if cell // goods in rows)
+        row = None
+        for cell in cells:
+            if self.before_match is not None and cell // goods != row:
+                row = cell // goods
+                self.before_match(self.market.cities[row], when)
+            book = self.books[cell]
+            self._auction(cell, book)
+            if not len(book):
+                del self.books[cell]
+
+    def _auction(self, cell: int, book: OrderBook) -> None:
+        market = self.market
+        bids, asks = book.bids, book.asks
+
+        # trader against trader, best prices first, all at one clearing price
+        crossed: list[tuple[Order, Order, int]] = []
+        while (bid := book.top(bids)) is not None and (ask := book.top(asks)) is not None and bid.limit >= ask.limit:
+            quantity = min(bid.remaining, ask.remaining)
+            crossed.append((bid, ask, quantity))
+            bid.filled += quantity
+            ask.filled += quantity
+            low, high = ask.limit, bid.limit
+        if crossed:
+            price = min(high, max(low, market.price[cell]))
+            for bid, ask, quantity in crossed:
+                self.on_fill(bid, quantity, price)
+                self.on_fill(ask, quantity, price)
+
+        # what is left against the city's market, only one side can still cross its quote. Each fill is at the average price along its price impact, and
+        # only as much of an order fills as keeps that average within its limit, see MarketData.fill_quantity()
+        while (bid := book.top(bids)) is not None and bid.limit >= market.price[cell] and market.quantity[cell] > 0:
+            quantity = market.fill_quantity(cell, -min(bid.remaining, market.quantity[cell]), bid.limit)
+            if not quantity:
+                break
+            bid.filled += quantity
+            self.on_fill(bid, quantity, market.apply_trade(cell, -quantity))
+        while (ask := book.top(asks)) is not None and ask.limit <= market.price[cell]:
+            quantity = market.fill_quantity(cell, ask.remaining, ask.limit)
+            if not quantity:
+                break
+            ask.filled += quantity
+            self.on_fill(ask, quantity, market.apply_trade(cell, quantity))
+
+        for order in book.expiring:
+            self.cancel(order)
+        book.expiring.clear()
+        book.top(bids)
+        book.top(asks)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from math import inf
+from typing import Callable
+
+from market import MarketData
+
+
+@dataclass()
+class TradeLeg:
+    """
+    Describes one leg of a TradePlan: buy a good in origin, sail to destination and sell it there
+
+    good is None for a leg that sails empty to reach a better market
+    """
+    origin: str
+    destination: str
+    good: str | None
+    quantity: int
+    buy_price: int
+    sell_price: int
+    profit: int
+    hours: float
+
+
+@dataclass()
+class TradePlan:
+    """
+    Describes an itinerary found by plan_trade_route()
+    """
+    legs: list[TradeLeg] = field(default_factory=list)
+    profit: int = 0
+    hours: float = 0
+
+    @property
+    def profit_per_hour(self) -> float:
+        return self.profit / self.hours if self.hours else 0.0
+
+
+class ProfitTable:
+    """
+    The goods that sell for more in a destination than they cost in an origin, worked out for a pair of cities the first time the search reaches it
+
+    Each entry is a list of (margin, col) pairs sorted best margin first, so the leg search only has to look at goods that make money. Building every
+    pair up front would cost cities * cities * goods, most of it for pairs no itinerary ever sails between.
+    """
+
+    def __init__(self, market: MarketData) -> None:
+        self.market = market
+        self._margins: dict[tuple[int, int], list[tuple[int, int]]] = {}
+
+    def margins(self, origin: int, destination: int) -> list[tuple[int, int]]:
+        """
+        Returns the profitable goods from origin to destination
+
+        Args:
+            origin (int): row of the city bought in
+            destination (int): row of the city sold in
+
+        Returns:
+            list[tuple[int, int]]: (margin, col) pairs, best margin first
+        """
+        margins = self._margins.get((origin, destination))
+        if margins is None:
+            buy_start, buy_stop = self.market.row_span(origin)
+            sell_start, sell_stop = self.market.row_span(destination)
+            margins = self._margins[origin, destination] = sorted(
+                ((sell - buy, col) for col, (buy, sell) in enumerate(zip(self.market.price[buy_start:buy_stop], self.market.price[sell_start:sell_stop]))
+                 if buy > 0 and sell > buy), reverse=True)
+        return margins
+
+
+def plan_trade_route(market: MarketData, origin: str, gold: int, capacity: int, destinations: Callable[[int], list[tuple[int, float]]],
+                     hops: int = 3, horizon_hours: float = inf, beam_width: int = 16) -> TradePlan:
+    """
+    Finds the itinerary of up to hops legs starting in origin that makes the most profit per hour with a beam search
+
+    Every leg carries a single good bought in the city it leaves and sold in the city it reaches, limited by cargo capacity, the gold on hand and the stock in
+    the market, less what earlier legs of the itinerary already bought there. Gold earned on one leg funds the next. After each hop only the best state per
+    city is kept, and of those the beam_width best by profit per hour.
+
+    Args:
+        market (MarketData): market store to read prices and stock from
+        origin (str): Name of city the itinerary starts in
+        gold (int): gold available to buy with
+        capacity (int): free cargo space in units
+        destinations (Callable[[int], list[tuple[int, float]]]): returns the rows of the cities that can be reached from a row within the horizon, and the
+            hours it takes to sail to each
+        hops (int, optional): maximum number of legs. Defaults to 3.
+        horizon_hours (float, optional): maximum total sailing time. Defaults to no limit.
+        beam_width (int, optional): number of partial itineraries kept after each hop. Defaults to 16.
+
+    Returns:
+        TradePlan: the best itinerary found, with no legs if nothing is profitable within the horizon
+    """
+    profits = ProfitTable(market)
+    number_of_goods = len(market.goods)
+    prices = market.price
+    quantities = market.quantity
+
+    # a beam state is (gold, hours, row, legs, units bought so far by cell)
+    beam = [(gold, 0.0, market.get_row(origin), [], {})]
+    best, best_rate = TradePlan(), 0.0
+
+    for hop in range(hops):
+        best_per_city = {}
+        for state_gold, state_hours, row, legs, bought in beam:
+            for destination, leg_hours in destinations(row):
+                hours = state_hours + leg_hours
+                if destination == row or hours > horizon_hours or hours <= 0:
+                    continue
+
+                leg_profit, leg_good, leg_quantity = 0, None, 0
+                for margin, col in profits.margins(row, destination):
+                    if margin * capacity <= leg_profit:
+                        break
+                    cell = row * number_of_goods + col
+                    quantity = min(capacity, quantities[cell] - bought.get(cell, 0), state_gold // prices[cell])
+                    if quantity * margin > leg_profit:
+                        leg_profit, leg_good, leg_quantity = quantity * margin, col, quantity
+
+                new_gold = state_gold + leg_profit
+                rate = (new_gold - gold) / hours
+                current = best_per_city.get(destination)
+                if current is None or rate > current[0]:
+                    if leg_good is None:
+                        new_bought = bought
+                    else:
+                        cell = row * number_of_goods + leg_good
+                        new_bought = {**bought, cell: bought.get(cell, 0) + leg_quantity}
+                    best_per_city[destination] = (rate, (
+                        new_gold, hours, destination, legs + [(row, destination, leg_good, leg_quantity, leg_profit, leg_hours)], new_bought))
+
+        ranked = sorted(best_per_city.values(), key=lambda entry: entry[0], reverse=True)[:beam_width]
+        if not ranked:
+            break
+        beam = [state for rate, state in ranked]
+        if ranked[0][0] > best_rate:
+            best_rate = ranked[0][0]
+            best = _build_plan(market, beam[0], gold)
+
+    return best
+
+
+def _build_plan(market: MarketData, state: tuple, starting_gold: int) -> TradePlan:
+    final_gold, hours, row, raw_legs, bought = state
+    number_of_goods = len(market.goods)
+    legs = []
+    for origin, destination, col, quantity, profit, leg_hours in raw_legs:
+        if col is None:
+            good, buy_price, sell_price = None, 0, 0
+        else:
+            good = market.goods[col]
+            buy_price = market.price[origin * number_of_goods + col]
+            sell_price = market.price[destination * number_of_goods + col]
+        legs.append(TradeLeg(origin=market.cities[origin], destination=market.cities[destination], good=good, quantity=quantity,
+                             buy_price=buy_price, sell_price=sell_price, profit=profit, hours=leg_hours))
+    return TradePlan(legs=legs, profit=final_gold - starting_gold, hours=hours)
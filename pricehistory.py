@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from math import floor, inf
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from market import MarketData
+
+# times are kept as game hours since HISTORY_EPOCH, a Monday at midnight, so daily and weekly buckets start at midnight and on Mondays
+HISTORY_EPOCH = datetime(year=1300, month=1, day=4)
+# raw samples kept per city, the oldest sample is dropped once the ring is full
+SAMPLE_CAPACITY = 96
+# rollup resolutions, the width of a bucket in game hours and the number of closed buckets kept per city
+ROLLUPS = {'hourly': (1, 48), 'daily': (24, 60), 'weekly': (168, 260)}
+# columns of a raw sample, the typecodes of MarketData's so a sample is a plain slice of it
+SAMPLE_COLUMNS = {'price': 'q', 'quantity': 'q'}
+# columns of a rollup bucket, sums rather than means so buckets are merged and closed without dividing, queries work out the means
+BUCKET_COLUMNS = {'price_min': 'q', 'price_max': 'q', 'price_sum': 'q', 'price_last': 'q',
+                  'quantity_min': 'q', 'quantity_max': 'q', 'quantity_sum': 'q', 'quantity_last': 'q'}
+
+
+@dataclass(slots=True)
+class Series:
+    """
+    Time series of one good in one city, returned by PriceHistory queries
+
+    hours is the time of every sample, or the start of every rollup bucket, in game hours since HISTORY_EPOCH. Means are sample means. Raw samples have
+    no spread, so for them min, max and last are the same array.
+    """
+    hours: array
+    price_min: array
+    price_max: array
+    price_mean: array
+    price_last: array
+    quantity_min: array
+    quantity_max: array
+    quantity_mean: array
+    quantity_last: array
+
+    def __len__(self) -> int:
+        return len(self.hours)
+
+    @property
+    def dates(self) -> list[datetime]:
+        return [HISTORY_EPOCH + timedelta(hours=hour) for hour in self.hours]
+
+
+class Ring:
+    """
+    Fixed capacity ring buffer of values for every good of a city, one slot per sample or bucket
+
+    Columns are laid out slot major, slot * goods + col, so the series of one good is a strided slice of its column. Slots are written in time order,
+    so the slots in a time range are found by binary search over start.
+    """
+    __slots__ = ('capacity', 'goods', 'start', 'count', 'columns', 'head', 'size')
+
+    def __init__(self, capacity: int, goods: int, columns: dict[str, str]) -> None:
+        """
+        Initializes Ring
+
+        Args:
+            capacity (int): number of slots
+            goods (int): number of goods of the city
+            columns (dict[str, str]): array typecode of each column
+        """
+        self.capacity = capacity
+        self.goods = goods
+        # time and number of samples of each slot
+        self.start = array('d', bytes(8 * capacity))
+        self.count = array('i', bytes(4 * capacity))
+        self.columns = {name: array(typecode, bytes(array(typecode).itemsize * capacity * goods))
+                        for name, typecode in columns.items()}
+        # slot written next, and number of slots in use
+        self.head = 0
+        self.size = 0
+
+    def append(self, hour: float, count: int, values: dict[str, array]) -> None:
+        slot = self.head
+        self.start[slot] = hour
+        self.count[slot] = count
+        low = slot * self.goods
+        for name, column in self.columns.items():
+            column[low:low + self.goods] = values[name]
+        self.head = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    @property
+    def first(self) -> int:
+        # slot of the oldest value
+        return (self.head - self.size) % self.capacity
+
+    def last_hour(self) -> float:
+        return self.start[(self.head - 1) % self.capacity] if self.size else -inf
+
+    def position(self, hour: float) -> int:
+        """
+        Returns how many of the slots, oldest first, start before hour
+        """
+        start, first, capacity = self.start, self.first, self.capacity
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if start[(first + middle) % capacity] < hour:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def series(self, column: array, col: int, low: int, high: int) -> array:
+        """
+        Returns the values of one good from the low-th to the high-th oldest slot
+
+        Args:
+            column (array): one of columns, or start or count with col 0
+            col (int): index of the good
+            low (int): position of the first slot, see position()
+            high (int): position after the last slot
+
+        Returns:
+            array: the values, oldest first
+        """
+        goods = len(column) // self.capacity
+        slot = (self.first + low) % self.capacity
+        count = high - low
+        # a range that wraps around the end of the ring is two slices
+        head = min(count, self.capacity - slot)
+        values = column[slot * goods + col:(slot + head) * goods:goods]
+        if count > head:
+            values += column[col:(count - head) * goods:goods]
+        return values
+
+
+class Rollup:
+    """
+    The closed buckets of one resolution for a city, in a Ring, and the bucket still open
+
+    Rollups are chained finest first. The finest takes every sample and each coarser one only takes the buckets closed by the one below it, so a sample
+    costs the same however many resolutions are kept. The open bucket of a coarser rollup does not include the open buckets below it yet, see
+    PriceHistory.rollup().
+    """
+    __slots__ = ('width', 'ring', 'above', 'open_start', 'count', 'open')
+
+    def __init__(self, width: float, capacity: int, goods: int, above: Rollup | None = None) -> None:
+        """
+        Initializes Rollup
+
+        Args:
+            width (float): width of a bucket in game hours
+            capacity (int): closed buckets kept
+            goods (int): number of goods of the city
+            above (Rollup, optional): coarser rollup the closed buckets are added to. Defaults to None.
+        """
+        self.width = width
+        self.ring = Ring(capacity, goods, BUCKET_COLUMNS)
+        self.above = above
+        # start of the open bucket, and the number of samples in it, 0 when there is none
+        self.open_start = 0.0
+        self.count = 0
+        # BUCKET_COLUMNS of the open bucket, every add merges into them, so the open bucket stays one bucket however many samples it takes
+        self.open: list[array] = []
+
+    def add(self, start: float, count: int, *columns: array) -> None:
+        """
+        Adds samples to the bucket start falls in, closing the open bucket first if it is an earlier one
+
+        Args:
+            start (float): game hour of the samples
+            count (int): number of samples
+            *columns (array): the samples' BUCKET_COLUMNS, a single sample has its prices and quantities as min, max, sum and last
+        """
+        bucket = floor(start / self.width) * self.width
+        if self.count and bucket != self.open_start:
+            self.close()
+        if not self.count:
+            # the arrays added are never changed afterwards, so they are shared until the next add replaces them
+            self.open_start = bucket
+            self.open = list(columns)
+        else:
+            # comprehensions rather than map(min, ...), calling min per good costs several times more
+            price_min, price_max, price_sum, price_last, quantity_min, quantity_max, quantity_sum, quantity_last = self.open
+            self.open = [array('q', [a if a < b else b for a, b in zip(price_min, columns[0])]),
+                         array('q', [a if a > b else b for a, b in zip(price_max, columns[1])]),
+                         array('q', [a + b for a, b in zip(price_sum, columns[2])]),
+                         columns[3],
+                         array('q', [a if a < b else b for a, b in zip(quantity_min, columns[4])]),
+                         array('q', [a if a > b else b for a, b in zip(quantity_max, columns[5])]),
+                         array('q', [a + b for a, b in zip(quantity_sum, columns[6])]),
+                         columns[7]]
+        self.count += count
+
+    def close(self) -> None:
+        bucket = self.bucket()
+        self.ring.append(self.open_start, self.count, bucket)
+        if self.above is not None:
+            self.above.add(self.open_start, self.count, *self.open)
+        self.count = 0
+        self.open = []
+
+    def bucket(self) -> dict[str, array]:
+        """
+        Returns the columns of the open bucket, by BUCKET_COLUMNS
+        """
+        return dict(zip(BUCKET_COLUMNS, self.open))
+
+
+class CityHistory:
+    """
+    The raw samples of a city's market and their rollups
+    """
+    __slots__ = ('samples', 'rollups')
+
+    def __init__(self, goods: int, sample_capacity: int, rollups: dict[str, tuple[float, int]]) -> None:
+        self.samples = Ring(sample_capacity, goods, SAMPLE_COLUMNS)
+        self.rollups: dict[str, Rollup] = {}
+        above = None
+        # chained coarsest first, so each rollup is created with the one above it
+        for resolution, (width, capacity) in sorted(rollups.items(), key=lambda rollup: -rollup[1][0]):
+            above = self.rollups[resolution] = Rollup(width, capacity, goods, above)
+        self.rollups = dict(reversed(self.rollups.items()))
+
+
+class PriceHistory:
+    """
+    Price and quantity time series of every good in every city of a MarketData store, in fixed size ring buffers
+
+    A sample snapshots the prices and stock of a whole city at a game time, see record(). The latest SAMPLE_CAPACITY samples are kept as they are, and
+    every sample is also rolled up into hourly, daily and weekly buckets of min, max, mean and last, see ROLLUPS. Every ring has a fixed capacity and the
+    oldest values are overwritten, so memory stays the same however long the game runs, while the coarser rollups reach further back.
+
+    A city's rings are only allocated when it is first sampled. Queries find their range by binary search and copy each column out with one strided
+    slice, so they cost the length of the range rather than of the history.
+    """
+
+    def __init__(self, market: MarketData, sample_capacity: int = SAMPLE_CAPACITY, rollups: dict[str, tuple[float, int]] = ROLLUPS) -> None:
+        """
+        Initializes PriceHistory
+
+        Args:
+            market (MarketData): store whose markets are sampled
+            sample_capacity (int, optional): raw samples kept per city. Defaults to SAMPLE_CAPACITY.
+            rollups (dict[str, tuple[float, int]], optional): bucket width in game hours and buckets kept of each resolution. Defaults to ROLLUPS.
+        """
+        self.market = market
+        self.sample_capacity = sample_capacity
+        self.rollups = rollups
+        self.cities: dict[int, CityHistory] = {}
+
+    @staticmethod
+    def hour(when: datetime) -> float:
+        """
+        Returns a game date in game hours since HISTORY_EPOCH
+        """
+        return (when - HISTORY_EPOCH) / timedelta(hours=1)
+
+    def record(self, row: int, hour: float) -> None:
+        """
+        Samples the prices and stock of every good of a city
+
+        Args:
+            row (int): row index of the city
+            hour (float): game time of the sample, see hour(). A sample older than the city's last one is taken at the time of the last one.
+        """
+        history = self.cities.get(row)
+        if history is None:
+            history = self.cities[row] = CityHistory(len(self.market.goods), self.sample_capacity, self.rollups)
+        hour = max(hour, history.samples.last_hour())
+        start, stop = self.market.row_span(row)
+        prices = self.market.price[start:stop]
+        quantities = self.market.quantity[start:stop]
+        history.samples.append(hour, 1, {'price': prices, 'quantity': quantities})
+        finest = next(iter(history.rollups.values()), None)
+        if finest is not None:
+            finest.add(hour, 1, prices, prices, prices, prices, quantities, quantities, quantities, quantities)
+
+    def samples(self, city: str, good: str, start: datetime | None = None, stop: datetime | None = None) -> Series:
+        """
+        Returns the raw samples of a good in a city taken from start until stop
+
+        Args:
+            city (str): name of the city
+            good (str): name of the good
+            start (datetime, optional): earliest sample time. Defaults to None (the oldest sample kept).
+            stop (datetime, optional): samples at or after stop are left out. Defaults to None (up to the latest sample).
+
+        Returns:
+            Series: the samples, oldest first
+        """
+        history = self.cities.get(self.market.get_row(city))
+        if history is None:
+            return self._empty()
+        ring = history.samples
+        low, high = self._range(ring, start, stop)
+        col = self.market.good_index[good]
+        prices = ring.series(ring.columns['price'], col, low, high)
+        quantities = ring.series(ring.columns['quantity'], col, low, high)
+        return Series(ring.series(ring.start, 0, low, high), prices, prices, array('f', prices), prices,
+                      quantities, quantities, array('f', quantities), quantities)
+
+    def rollup(self, city: str, good: str, resolution: Literal['hourly', 'daily', 'weekly'], start: datetime | None = None,
+               stop: datetime | None = None) -> Series:
+        """
+        Returns the rollup buckets of a good in a city that start from start until stop, the last one may still be open
+
+        Args:
+            city (str): name of the city
+            good (str): name of the good
+            resolution (Literal['hourly', 'daily', 'weekly']): resolution, one of the keys of the rollups
+            start (datetime, optional): earliest bucket start. Defaults to None (the oldest bucket kept).
+            stop (datetime, optional): buckets starting at or after stop are left out. Defaults to None (up to the open bucket).
+
+        Raises:
+            KeyError: if resolution is not one of the rollups
+
+        Returns:
+            Series: the buckets, oldest first
+        """
+        if resolution not in self.rollups:
+            raise KeyError(resolution)
+        history = self.cities.get(self.market.get_row(city))
+        if history is None:
+            return self._empty()
+        rollup = history.rollups[resolution]
+        ring = rollup.ring
+        low, high = self._range(ring, start, stop)
+        col = self.market.good_index[good]
+        hours = ring.series(ring.start, 0, low, high)
+        counts = ring.series(ring.count, 0, low, high)
+        columns = {name: ring.series(column, col, low, high) for name, column in ring.columns.items()}
+
+        # the open bucket, with the open buckets of the finer rollups added to a copy of it, which may close it and open the next, all closed into
+        # the copy's ring
+        chain = list(history.rollups.values())
+        below = chain[:chain.index(rollup)]
+        latest = Rollup(rollup.width, len(below) + 1, len(self.market.goods))
+        latest.open_start, latest.count, latest.open = rollup.open_start, rollup.count, list(rollup.open)
+        for finer in reversed(below):
+            if finer.count:
+                latest.add(finer.open_start, finer.count, *finer.bucket().values())
+        if latest.count:
+            latest.close()
+        first, last = (-inf if start is None else self.hour(start)), (inf if stop is None else self.hour(stop))
+        recent = latest.ring
+        for slot in range(recent.size):
+            if first <= recent.start[slot] < last:
+                hours.append(recent.start[slot])
+                counts.append(recent.count[slot])
+                for name, column in recent.columns.items():
+                    columns[name].append(column[slot * recent.goods + col])
+
+        return Series(hours, columns['price_min'], columns['price_max'],
+                      array('f', [total / count for total, count in zip(columns['price_sum'], counts)]), columns['price_last'],
+                      columns['quantity_min'], columns['quantity_max'],
+                      array('f', [total / count for total, count in zip(columns['quantity_sum'], counts)]), columns['quantity_last'])
+
+    def _range(self, ring: Ring, start: datetime | None, stop: datetime | None) -> tuple[int, int]:
+        return (0 if start is None else ring.position(self.hour(start)),
+                ring.size if stop is None else ring.position(self.hour(stop)))
+
+    @staticmethod
+    def _empty() -> Series:
+        return Series(array('d'), array('q'), array('q'), array('f'), array('q'), array('q'), array('q'), array('f'), array('q'))
+
+    def state(self) -> dict:
+        """
+        Returns the positions of every ring and the open buckets, the rings themselves are returned by arrays()
+
+        Returns:
+            dict: JSON serializable state, see restore()
+        """
+        return {row: {'samples': [history.samples.head, history.samples.size],
+                      'rollups': {resolution: [rollup.ring.head, rollup.ring.size, rollup.open_start, rollup.count]
+                                  for resolution, rollup in history.rollups.items()}}
+                for row, history in self.cities.items()}
+
+    def arrays(self) -> dict[str, array]:
+        """
+        Returns every array of the history by name, the open buckets included, see restore()
+
+        Returns:
+            dict[str, array]: arrays to save
+        """
+        arrays = {}
+        for row, history in self.cities.items():
+            for prefix, ring in self._rings(history).items():
+                arrays[f'{row}.{prefix}.start'] = ring.start
+                arrays[f'{row}.{prefix}.count'] = ring.count
+                for name, column in ring.columns.items():
+                    arrays[f'{row}.{prefix}.{name}'] = column
+            for resolution, rollup in history.rollups.items():
+                if rollup.count:
+                    for name, column in rollup.bucket().items():
+                        arrays[f'{row}.{resolution}.open.{name}'] = column
+        return arrays
+
+    def restore(self, state: dict, arrays: dict[str, array]) -> None:
+        """
+        Restores the history saved from state() and arrays(), the rings must have the capacities they were saved with
+
+        Args:
+            state (dict): state from state(), row keys may be strings
+            arrays (dict[str, array]): arrays from arrays()
+        """
+        self.cities = {}
+        for row, info in state.items():
+            row = int(row)
+            history = self.cities[row] = CityHistory(len(self.market.goods), self.sample_capacity, self.rollups)
+            history.samples.head, history.samples.size = info['samples']
+            for resolution, rollup in history.rollups.items():
+                rollup.ring.head, rollup.ring.size, rollup.open_start, rollup.count = info['rollups'][resolution]
+                if rollup.count:
+                    rollup.open = [arrays[f'{row}.{resolution}.open.{name}'] for name in BUCKET_COLUMNS]
+            for prefix, ring in self._rings(history).items():
+                ring.start = arrays[f'{row}.{prefix}.start']
+                ring.count = arrays[f'{row}.{prefix}.count']
+                for name in ring.columns:
+                    ring.columns[name] = arrays[f'{row}.{prefix}.{name}']
+
+    @staticmethod
+    def _rings(history: CityHistory) -> dict[str, Ring]:
+        return {'samples': history.samples, **{resolution: rollup.ring for resolution, rollup in history.rollups.items()}}
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from math import ceil, exp, log, sqrt
+from typing import TYPE_CHECKING, Callable
+
+from enumerations import DemandLevel, SupplyLevel
+from production import changed_inputs, propagate
+
+if TYPE_CHECKING:
+    from market import MarketData
+
+# stock a city keeps of a good at equilibrium, cities that produce a good keep more of it
+BASE_QUANTITY = 100
+PRODUCED_QUANTITY = 200
+CONSUMED_QUANTITY = 60
+
+# demand multiplier on mu, cities that produce a good need less of it
+PRODUCED_DEMAND = 0.85
+CONSUMED_DEMAND = 1.15
+
+# how strongly price responds to stock: target = mu * demand * (base_quantity / quantity) ** STOCK_ELASTICITY
+STOCK_ELASTICITY = 0.5
+
+# rates per game hour at which price reverts to its target and stock to its base quantity
+PRICE_REVERSION_PER_HOUR = 0.05
+STOCK_REVERSION_PER_HOUR = 0.1
+
+# markets are stepped SIMULATION_STEP_HOURS at a time, at most MAX_SIMULATION_STEPS steps per catch up
+SIMULATION_STEP_HOURS = 6
+MAX_SIMULATION_STEPS = 8
+
+SUPPLY_THRESHOLDS = [(0.25, SupplyLevel.LOW), (0.6, SupplyLevel.REDUCED), (1.4, SupplyLevel.NORMAL),
+                     (2, SupplyLevel.ELEVATED), (3, SupplyLevel.HIGH)]
+DEMAND_THRESHOLDS = [(0.6, DemandLevel.LOW), (0.9, DemandLevel.REDUCED), (1.1, DemandLevel.NORMAL),
+                     (1.35, DemandLevel.ELEVATED), (1.75, DemandLevel.HIGH)]
+
+
+def supply_level(quantity: float, base_quantity: float) -> SupplyLevel:
+    """
+    Returns the SupplyLevel of a market from its stock relative to its base quantity
+
+    Args:
+        quantity (float): stock in the market
+        base_quantity (float): stock the market keeps at equilibrium
+
+    Returns:
+        SupplyLevel: supply level
+    """
+    ratio = quantity / base_quantity if base_quantity else 0
+    if ratio <= 0:
+        return SupplyLevel.ABSENT
+    for threshold, level in SUPPLY_THRESHOLDS:
+        if ratio < threshold:
+            return level
+    return SupplyLevel.EXTREME
+
+
+def demand_level(demand: float) -> DemandLevel:
+    """
+    Returns the DemandLevel of a market from its demand multiplier
+
+    Args:
+        demand (float): demand multiplier, 1 is normal
+
+    Returns:
+        DemandLevel: demand level
+    """
+    if demand <= 0:
+        return DemandLevel.ABSENT
+    for threshold, level in DEMAND_THRESHOLDS:
+        if demand < threshold:
+            return level
+    return DemandLevel.EXTREME
+
+
+def target_prices(market: MarketData, start: int, stop: int) -> list[float]:
+    """
+    Returns the price each market in a span of cells is pulled toward, given its demand and current stock
+
+    The anchor price is mu for raw goods and is derived from input prices for composite goods, see production.propagate()
+    Demand is scaled by the demand_shock of active MarketEvents
+
+    Args:
+        market (MarketData): market store
+        start (int): first cell
+        stop (int): cell after the last
+
+    Returns:
+        list[float]: target price of each cell
+    """
+    return [anchor * demand * shock * (base / max(quantity, 1)) ** STOCK_ELASTICITY for anchor, demand, shock, base, quantity in zip(
+        market.anchor[start:stop], market.demand[start:stop], market.demand_shock[start:stop], market.base_quantity[start:stop], market.quantity[start:stop])]
+
+
+def simulate_row(market: MarketData, row: int, hours: float, on_step: Callable[[float], None] | None = None) -> None:
+    """
+    Simulates every good in a city's market forward by a number of game hours, one vectorized pass over the row per step
+
+    Stock relaxes toward its stock target, scaled by the supply_shock of active MarketEvents, as the city produces and consumes goods, in closed form. Price follows a mean-reverting process toward the target
+    price of the current stock and demand, with long run spread sigma. Because the target moves with stock the market is stepped in batches of
+    SIMULATION_STEP_HOURS; anything beyond MAX_SIMULATION_STEPS steps is first applied to stock in one closed form jump.
+    After each step the composite goods downstream of any raw good whose price moved are re-derived, see production.propagate().
+
+    Args:
+        market (MarketData): market store
+        row (int): row index of the city
+        hours (float): game hours to simulate
+        on_step (Callable[[float], None], optional): called after each step with the game hours simulated so far, such as to sample the prices. Defaults to None.
+    """
+    if hours <= 0:
+        return
+    start, stop = market.row_span(row)
+    gauss = market.rngs[row].gauss
+
+    steps = min(MAX_SIMULATION_STEPS, ceil(hours / SIMULATION_STEP_HOURS))
+    step_hours = min(hours, steps * SIMULATION_STEP_HOURS) / steps
+    skipped_hours = hours - steps * step_hours
+    if skipped_hours > 0:
+        _relax_stock(market, start, stop, skipped_hours)
+
+    price_decay = exp(-PRICE_REVERSION_PER_HOUR * step_hours)
+    noise = sqrt(1 - price_decay * price_decay)
+    for step in range(steps):
+        _relax_stock(market, start, stop, step_hours)
+        market.price[start:stop] = array('q', [max(1, round(target + (price - target) * price_decay + sigma * noise * gauss(0, 1)))
+                                               for price, target, sigma in zip(market.price[start:stop], target_prices(market, start, stop), market.sigma[start:stop])])
+        changed = changed_inputs(market, row)
+        if changed:
+            propagate(market, row, changed)
+        if on_step is not None:
+            on_step(skipped_hours + (step + 1) * step_hours)
+
+
+def _relax_stock(market: MarketData, start: int, stop: int, hours: float) -> None:
+    stock_decay = exp(-STOCK_REVERSION_PER_HOUR * hours)
+    market.quantity[start:stop] = array('q', [round(target * shock + (quantity - target * shock) * stock_decay) for quantity, target, shock in zip(
+        market.quantity[start:stop], market.stock_target[start:stop], market.supply_shock[start:stop])])
+
+
+def fill_price(market: MarketData, cell: int, quantity_change: int) -> int:
+    """
+    Returns the average price per unit a trade fills at, walking the price along the same curve apply_trade_impact() moves it by
+
+    Every unit fills a little worse than the one before, so a large trade has slippage: a big buy pays more than the quote and a big sale gets less
+
+    Args:
+        market (MarketData): market store
+        cell (int): cell traded in
+        quantity_change (int): change in the market's stock, negative for a buy
+
+    Returns:
+        int: average price per unit
+    """
+    price = market.price[cell]
+    old_quantity = max(market.quantity[cell], 1)
+    new_quantity = max(market.quantity[cell] + quantity_change, 1)
+    if old_quantity == new_quantity:
+        return price
+    # the integral of price * (old_quantity / quantity) ** STOCK_ELASTICITY over the stock traded, divided by the stock traded
+    power = 1 - STOCK_ELASTICITY
+    if power == 0:
+        area = log(old_quantity / new_quantity)
+    else:
+        area = (old_quantity ** power - new_quantity ** power) / power
+    return max(1, round(price * old_quantity ** STOCK_ELASTICITY * area / (old_quantity - new_quantity)))
+
+
+def fill_quantity(market: MarketData, cell: int, quantity_change: int, limit: int) -> int:
+    """
+    Returns how many units of a trade fill within a limit price, the most whose average fill price is no worse than limit, see fill_price()
+
+    Args:
+        market (MarketData): market store
+        cell (int): cell traded in
+        quantity_change (int): change in the market's stock the whole trade would make, negative for a buy
+        limit (int): highest average price a buy pays, or lowest a sale gets
+
+    Returns:
+        int: units that fill
+    """
+    units = range(abs(quantity_change) + 1)
+    if quantity_change < 0:
+        return max(0, bisect_right(units, limit, key=lambda unit: fill_price(market, cell, -unit)) - 1)
+    return max(0, bisect_right(units, -limit, key=lambda unit: -fill_price(market, cell, unit)) - 1)
+
+
+def apply_trade_impact(market: MarketData, cell: int, quantity_change: int) -> int:
+    """
+    Changes the stock of a market by a trade and moves its price by the same ratio its target price moves
+
+    Buying stock out of a market (negative quantity_change) raises its price, selling into it lowers its price
+
+    Args:
+        market (MarketData): market store
+        cell (int): cell traded in
+        quantity_change (int): change in the market's stock
+
+    Returns:
+        int: average price per unit the trade filled at, see fill_price()
+    """
+    price = fill_price(market, cell, quantity_change)
+    old_quantity = max(market.quantity[cell], 1)
+    market.quantity[cell] += quantity_change
+    new_quantity = max(market.quantity[cell], 1)
+    market.price[cell] = max(1, round(market.price[cell] *
+                             (old_quantity / new_quantity) ** STOCK_ELASTICITY))
+    return price
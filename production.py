@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from market import MarketData
+    from world import World
+
+# share of a composite good's anchor price and stock target that follows its inputs, the rest is its own mu and base_quantity
+INPUT_PRICE_WEIGHT = 0.5
+INPUT_SUPPLY_WEIGHT = 0.5
+# input supply is clamped to this range before it moves a composite's stock target
+MIN_SUPPLY_INDEX = 0.25
+MAX_SUPPLY_INDEX = 2.0
+# a raw good's price must move by more than this share of mu before its descendants are recomputed
+PROPAGATION_TOLERANCE = 0.01
+
+
+class ProductionGraph:
+    """
+    Production chains of a World's goods compiled into a dependency DAG
+
+    Each good's 'inputs' are edges from the input to the good. The graph is topologically sorted once, and the descendants of every good are precomputed,
+    so that when an input's price moves only the goods built from it, directly or through other goods, need to be recomputed, in dependency order.
+    Goods are referred to by their column index in a MarketData store.
+    """
+
+    def __init__(self, goods: list[str], world: World) -> None:
+        """
+        Initializes ProductionGraph
+
+        Args:
+            goods (list[str]): TradeGoods in column order
+            world (World): World the goods and their inputs are defined in
+
+        Raises:
+            ValueError: if the production chains contain a cycle
+        """
+        self.goods = goods
+        col = {good: i for i, good in enumerate(goods)}
+        self.input_cols = [[col[world.goods[trade_good]] for trade_good in world.inputs[world.good_index[good]] if world.goods[trade_good] in col]
+                           for good in goods]
+        output_cols = [[] for good in goods]
+        for good, inputs in enumerate(self.input_cols):
+            for input_col in inputs:
+                output_cols[input_col].append(good)
+
+        # Kahn's algorithm
+        waiting_on = [len(inputs) for inputs in self.input_cols]
+        ready = [good for good, count in enumerate(waiting_on) if count == 0]
+        self.order = []
+        while ready:
+            good = ready.pop(0)
+            self.order.append(good)
+            for output in output_cols[good]:
+                waiting_on[output] -= 1
+                if waiting_on[output] == 0:
+                    ready.append(output)
+        if len(self.order) != len(goods):
+            cycle = [goods[good]
+                     for good, count in enumerate(waiting_on) if count]
+            raise ValueError(f"Production chains contain a cycle through {cycle}")
+
+        self.position = {good: i for i, good in enumerate(self.order)}
+        self.composites = [
+            good for good in self.order if self.input_cols[good]]
+        self.raw = [good for good in self.order if not self.input_cols[good]]
+
+        # descendants in reverse topological order, each good's set is its outputs plus theirs
+        self.descendants: list[frozenset[int]] = [frozenset()] * len(goods)
+        for good in reversed(self.order):
+            self.descendants[good] = frozenset(output_cols[good]).union(
+                *(self.descendants[output] for output in output_cols[good]))
+
+    def affected(self, changed: Iterable[int]) -> list[int]:
+        """
+        Returns every good downstream of the changed goods, in dependency order
+
+        Args:
+            changed (Iterable[int]): columns of goods whose price or supply changed
+
+        Returns:
+            list[int]: columns to recompute
+        """
+        downstream = set().union(*(self.descendants[good] for good in changed))
+        return sorted(downstream, key=self.position.__getitem__)
+
+
+def propagate(market: MarketData, row: int, changed: Iterable[int] | None = None) -> None:
+    """
+    Derives the anchor price and stock target of composite goods in a city from their inputs, in a single pass in dependency order
+
+    A composite's anchor moves with the mean price index (price / mu) of its inputs, and its stock target with the mean supply of its inputs,
+    each by INPUT_PRICE_WEIGHT and INPUT_SUPPLY_WEIGHT. Composite inputs contribute their own freshly derived anchor and stock target.
+
+    Args:
+        market (MarketData): market store
+        row (int): row index of the city
+        changed (Iterable[int], optional): columns of goods that changed, only their descendants are recomputed. Defaults to None (every composite good).
+    """
+    graph = market.production
+    goods_to_update = graph.composites if changed is None else graph.affected(
+        changed)
+    base = row * len(market.goods)
+    mu, anchor, price = market.mu, market.anchor, market.price
+    base_quantity, stock_target, quantity = market.base_quantity, market.stock_target, market.quantity
+
+    for good in goods_to_update:
+        inputs = graph.input_cols[good]
+        price_index = 0.0
+        supply_index = 0.0
+        for input_col in inputs:
+            cell = base + input_col
+            if graph.input_cols[input_col]:
+                price_index += anchor[cell] / mu[cell]
+                supply_index += stock_target[cell] / base_quantity[cell]
+            else:
+                price_index += price[cell] / mu[cell]
+                supply_index += quantity[cell] / base_quantity[cell]
+        price_index /= len(inputs)
+        supply_index = min(MAX_SUPPLY_INDEX, max(
+            MIN_SUPPLY_INDEX, supply_index / len(inputs)))
+
+        cell = base + good
+        anchor[cell] = mu[cell] * \
+            (1 - INPUT_PRICE_WEIGHT + INPUT_PRICE_WEIGHT * price_index)
+        stock_target[cell] = base_quantity[cell] * \
+            (1 - INPUT_SUPPLY_WEIGHT + INPUT_SUPPLY_WEIGHT * supply_index)
+
+    for good in graph.raw if changed is None else changed:
+        cell = base + good
+        market.propagated_index[cell] = price[cell] / mu[cell]
+
+
+def changed_inputs(market: MarketData, row: int) -> list[int]:
+    """
+    Returns the raw goods of a city whose price index moved by more than PROPAGATION_TOLERANCE since it was last propagated
+
+    Args:
+        market (MarketData): market store
+        row (int): row index of the city
+
+    Returns:
+        list[int]: columns of changed raw goods
+    """
+    base = row * len(market.goods)
+    return [good for good in market.production.raw
+            if abs(market.price[base + good] / market.mu[base + good] - market.propagated_index[base + good]) > PROPAGATION_TOLERANCE]
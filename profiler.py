@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from functools import wraps
+from time import perf_counter
+from typing import Callable, TypeVar
+
+# instrumentation is switched on by setting PYMERCHANT_PROFILE before the game modules are imported, see pymerchant.py --profile
+ENABLED = bool(os.environ.get('PYMERCHANT_PROFILE'))
+# default file write_collapsed() dumps to
+COLLAPSED_STACKS_PATH = 'pymerchant.folded'
+
+F = TypeVar('F', bound=Callable)
+
+
+@dataclass()
+class CallStats:
+    """
+    Call count and timings of one instrumented function, total includes the time spent in instrumented functions it calls and own does not
+    """
+    name: str
+    calls: int = 0
+    total: float = 0.0
+    own: float = 0.0
+    max: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class Profiler:
+    """
+    Records per-call timing of instrumented functions, along with the stack of instrumented callers each call was made from
+
+    Time is split between the function and the instrumented functions it calls, so the stacks can be written out in the collapsed format read by
+    flamegraph.pl, speedscope and inferno, one 'caller;callee microseconds' line per stack.
+    """
+
+    def __init__(self) -> None:
+        self.stats: dict[str, CallStats] = {}
+        self.stacks: dict[str, float] = {}
+        self._stack: list[str] = []
+        # time spent in instrumented callees of each frame on _stack
+        self._child_time: list[float] = []
+
+    def reset(self) -> None:
+        """
+        Clears everything recorded so far
+        """
+        self.stats.clear()
+        self.stacks.clear()
+
+    def call(self, name: str, func: Callable, args: tuple, kwargs: dict):
+        """
+        Calls func and records the call under name
+
+        Args:
+            name (str): name to record the call under
+            func (Callable): function to call
+            args (tuple): positional arguments
+            kwargs (dict): keyword arguments
+
+        Returns:
+            the return value of func
+        """
+        self._stack.append(name)
+        self._child_time.append(0.0)
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            own = elapsed - self._child_time.pop()
+            stack = ';'.join(self._stack)
+            self._stack.pop()
+            if self._child_time:
+                self._child_time[-1] += elapsed
+
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = CallStats(name)
+            stats.calls += 1
+            stats.total += elapsed
+            stats.own += own
+            stats.max = max(stats.max, elapsed)
+            self.stacks[stack] = self.stacks.get(stack, 0.0) + own
+
+    def summary(self) -> list[CallStats]:
+        """
+        Returns the stats of every instrumented function, most total time first
+
+        Returns:
+            list[CallStats]: stats of each function
+        """
+        return sorted(self.stats.values(), key=lambda stats: stats.total, reverse=True)
+
+    def write_collapsed(self, path: str = COLLAPSED_STACKS_PATH) -> str:
+        """
+        Writes the recorded stacks in collapsed stack format, with each stack's own time in whole microseconds
+
+        Args:
+            path (str, optional): file to write. Defaults to COLLAPSED_STACKS_PATH.
+
+        Returns:
+            str: the path written
+        """
+        with open(path, 'w') as file:
+            for stack, seconds in self.stacks.items():
+                file.write(f'{stack} {round(seconds * 1e6)}\n')
+        return path
+
+
+PROFILER = Profiler()
+
+
+def instrument(name: str | None = None) -> Callable[[F], F]:
+    """
+    Decorator that records every call of a function in PROFILER
+
+    When profiling is not ENABLED the function is returned undecorated, so instrumented code costs nothing unless profiling was asked for
+
+    Args:
+        name (str, optional): name to record calls under. Defaults to the function's qualified name.
+
+    Returns:
+        Callable[[F], F]: decorator
+    """
+    def decorate(func: F) -> F:
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+        call = PROFILER.call
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return call(label, func, args, kwargs)
+        return wrapper
+    return decorate
@@ -1,8 +1,40 @@
-from view import View
+import argparse
+import os
 
 
 def main():
-    console = View()
+    parser = argparse.ArgumentParser(description="PyMerchant - A Hanseatic Trade League Simulation")
+    parser.add_argument('--instant', action='store_true',
+                        help="advance time instantly instead of animating travel and waiting")
+    parser.add_argument('--profile', action='store_true',
+                        help="record call timings, shown under the Debug entry of the main menu")
+    parser.add_argument('--world', metavar='PATH', default=None,
+                        help="world file to play in, such as one made by world.py")
+    parser.add_argument('--paused', action='store_true',
+                        help="start with the game clock paused, it can be resumed from the main menu")
+    parser.add_argument('--load', metavar='PATH', default=None,
+                        help="continue a saved game, such as the autosave")
+    parser.add_argument('--no-autosave', action='store_true',
+                        help="do not save the game periodically and on quitting")
+    parser.add_argument('--order-book', action='store_true',
+                        help="trade through limit orders that fill as time passes, instead of trading with the market at once")
+    args = parser.parse_args()
+
+    # instrumentation and the world are decided when the game modules are imported, so they are imported after the flags are read
+    if args.profile:
+        os.environ['PYMERCHANT_PROFILE'] = '1'
+    if args.world:
+        os.environ['PYMERCHANT_WORLD'] = args.world
+    from view import AUTOSAVE_PATH, View
+
+    game = None
+    if args.load:
+        from savegame import load_game
+        game = load_game(args.load)
+    elif args.order_book:
+        from game import Game
+        game = Game(order_book=True)
+    console = View(animate=not args.instant, clock=not args.paused, autosave_path=None if args.no_autosave else AUTOSAVE_PATH, game=game)
     console.game_loop()
 
 
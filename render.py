@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from typing import Callable, Hashable, Iterable
+
+from rich.console import Console, Group, RenderableType
+from rich.control import Control, ControlType
+from rich.live import Live
+from rich.segment import Segment, Segments
+from rich.table import Table
+from rich.text import Text
+
+# VT100 save and restore cursor, used to rewrite lines above a prompt without moving the player's typing
+_SAVE_CURSOR = Segment('\x1b7')
+_RESTORE_CURSOR = Segment('\x1b8')
+
+
+class CachedTable:
+    """
+    A rich Table whose rows are only formatted again when the values they show change
+
+    Every row has a key, the tuple of raw values it is formatted from. update() formats just the rows whose key changed since the last update, and the
+    Table itself is only rebuilt when a row changed, so redrawing a screen whose items did not change formats nothing at all.
+    """
+
+    def __init__(self, title: str, columns: list[tuple[str, str]], format_row: Callable[..., tuple[str, ...]]) -> None:
+        """
+        Initializes CachedTable
+
+        Args:
+            title (str): title of the table
+            columns (list[tuple[str, str]]): header and justification of each column
+            format_row (Callable[..., tuple[str, ...]]): called with the row number, counting from 1, and the values of a row key, returns the row's cells
+        """
+        self.title = title
+        self.columns = columns
+        self.format_row = format_row
+        self._keys: list[tuple | None] = []
+        self._rows: list[tuple[str, ...]] = []
+        self._table: Table | None = None
+        # rows formatted since the table was created, to see what the cache saves
+        self.formatted = 0
+
+    def update(self, keys: Iterable[tuple]) -> Table:
+        """
+        Brings the table up to date with the row keys, formatting only the rows that changed
+
+        Args:
+            keys (Iterable[tuple]): key of every row, in order
+
+        Returns:
+            Table: the table, the same object as last time if no row changed
+        """
+        keys = list(keys)
+        changed = self._table is None
+        if len(keys) != len(self._keys):
+            self._keys = [None] * len(keys)
+            self._rows = [()] * len(keys)
+            changed = True
+        for index, key in enumerate(keys):
+            if key != self._keys[index]:
+                self._keys[index] = key
+                self._rows[index] = self.format_row(index + 1, *key)
+                self.formatted += 1
+                changed = True
+
+        if changed:
+            self._table = Table(title=self.title)
+            for header, justify in self.columns:
+                self._table.add_column(header, justify=justify)
+            for row in self._rows:
+                self._table.add_row(*row)
+        return self._table
+
+
+class CachedRenderable:
+    """
+    Holds a renderable built from a key, and only builds it again when the key changes
+    """
+
+    def __init__(self, build: Callable[..., RenderableType]) -> None:
+        """
+        Initializes CachedRenderable
+
+        Args:
+            build (Callable[..., RenderableType]): called with the values of the key, returns the renderable
+        """
+        self.build = build
+        self._key: Hashable = None
+        self._renderable: RenderableType | None = None
+
+    def get(self, *key: Hashable) -> RenderableType:
+        if self._renderable is None or key != self._key:
+            self._key = key
+            self._renderable = self.build(*key)
+        return self._renderable
+
+
+class Computed:
+    """
+    A renderable that is computed again every time the screen is drawn, so Screen.refresh() shows its current state
+
+    Wrap cached renderables in it, such as a CachedTable's update(), so a refresh only formats what changed
+    """
+
+    def __init__(self, compute: Callable[[], RenderableType]) -> None:
+        self.compute = compute
+
+    def __rich__(self) -> RenderableType:
+        return self.compute()
+
+
+class _Write:
+    """
+    Wraps a segment for Console.control(), which writes it straight to the terminal, print() would redraw the Live around it
+    """
+    __slots__ = ('segment',)
+
+    def __init__(self, segment: Segment) -> None:
+        self.segment = segment
+
+
+class Screen:
+    """
+    The one in place display every screen of the game is drawn into, a rich Live
+
+    show() replaces what is on screen by redrawing the Live over it, rather than clearing the terminal and printing everything below, so nothing
+    scrolls and no clear command is run. Prompts are drawn as the last line of the display and typed on that line, and the echoed line is erased after
+    the answer is read, so the display stays where it is.
+
+    Prompts are awaited, stdin is read by the event loop, so other tasks keep running while the player reads and types. They can call refresh() to
+    draw the Computed parts of the screen again, while a prompt is open only the lines that changed are rewritten, above the line being typed.
+
+    Consoles that are not interactive, such as a pipe, cannot be redrawn, there every screen is simply printed.
+    """
+
+    def __init__(self, console: Console) -> None:
+        """
+        Initializes Screen
+
+        Args:
+            console (Console): console to draw on
+        """
+        self.console = console
+        self.in_place = console.is_interactive
+        self.live = Live(console=console, auto_refresh=False, redirect_stdout=False, redirect_stderr=False,
+                         vertical_overflow='visible')
+        self._renderables: list[RenderableType] = []
+        # prompt drawn under the renderables while an answer is awaited
+        self._prompt: Text | None = None
+        # lines of the last draw, to find the ones a refresh changes
+        self._lines: list[list[Segment]] = []
+        # lines read from stdin and not asked for yet, None once stdin is closed
+        self._answers: asyncio.Queue[str | None] | None = None
+        self._pending = b''
+
+    def __enter__(self) -> Screen:
+        if self.in_place:
+            self.live.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.in_place:
+            self.live.stop()
+        if self._answers is not None:
+            self._stop_reading()
+            self._answers = None
+
+    def show(self, *renderables: RenderableType) -> None:
+        """
+        Replaces the screen with renderables
+
+        Args:
+            *renderables (RenderableType): what to draw, top to bottom
+        """
+        self._renderables = list(renderables)
+        self._prompt = None
+        self._draw()
+
+    def refresh(self) -> None:
+        """
+        Draws the screen again, picking up changes to its Computed renderables
+
+        While a prompt is open only the lines that changed are rewritten, and nothing is when the number of lines changed, the next show() draws it.
+        """
+        if not self.in_place:
+            return
+        if self._prompt is None:
+            self._draw()
+            return
+        if self._answers is not None and not self._answers.empty():
+            # the answer was typed and echoed, the cursor is no longer on the prompt line
+            return
+        lines = self._render()
+        if len(lines) != len(self._lines):
+            return
+        writes = []
+        for index, (line, old) in enumerate(zip(lines, self._lines)):
+            up = len(lines) - 1 - index
+            # the prompt line itself is left alone, and lines scrolled out of the terminal cannot be reached
+            if line == old or up == 0 or up >= self.console.height:
+                continue
+            writes += [_SAVE_CURSOR, Control.move(0, -up).segment, Control((ControlType.CARRIAGE_RETURN,)).segment, *line,
+                       Control((ControlType.ERASE_IN_LINE, 0)).segment, _RESTORE_CURSOR]
+        if writes:
+            self.console.control(*(_Write(segment) for segment in writes))
+            self._lines = lines
+
+    def _render(self) -> list[list[Segment]]:
+        renderables = self._renderables if self._prompt is None else [*self._renderables, self._prompt]
+        return self.console.render_lines(Group(*renderables), self.console.options, pad=False)
+
+    def _draw(self) -> None:
+        if self.in_place:
+            self._lines = self._render()
+            segments = []
+            for index, line in enumerate(self._lines):
+                if index:
+                    segments.append(Segment.line())
+                segments += line
+            self.live.update(Segments(segments), refresh=True)
+        else:
+            self.console.print(Group(*self._renderables))
+
+    async def ask(self, prompt: str) -> str:
+        """
+        Draws a prompt under the screen and waits for a line, other tasks keep running meanwhile
+
+        Args:
+            prompt (str): prompt, rich markup
+
+        Raises:
+            EOFError: if stdin is closed
+
+        Returns:
+            str: the line typed
+        """
+        self._prompt = Text.from_markup(prompt + ' ', end='')
+        if self.in_place:
+            self._draw()
+        else:
+            # the screen was printed by show(), only the prompt goes under it
+            self.console.print(self._prompt)
+        try:
+            answer = await self._read_line()
+        finally:
+            self._prompt = None
+        if answer is None:
+            raise EOFError
+        if self.in_place:
+            # the typed line was echoed, go back up to the last line of the display so the next redraw covers it
+            self.console.control(Control.move(0, -1), Control((ControlType.ERASE_IN_LINE, 2)))
+        return answer.strip()
+
+    async def _read_line(self) -> str | None:
+        if self._answers is None:
+            self._answers = asyncio.Queue()
+            try:
+                asyncio.get_running_loop().add_reader(sys.stdin.fileno(), self._on_stdin)
+            except NotImplementedError:
+                # event loops without add_reader, such as the Windows proactor loop, read each line in a thread
+                self._answers = None
+                return await asyncio.to_thread(lambda: sys.stdin.readline() or None)
+        answer = await self._answers.get()
+        if answer is None:
+            # stay closed for every later prompt too
+            self._answers.put_nowait(None)
+        return answer
+
+    def _on_stdin(self) -> None:
+        # stdin is read unbuffered, a buffered reader could hold lines the event loop is never told about
+        data = os.read(sys.stdin.fileno(), 4096)
+        if not data:
+            self._answers.put_nowait(None)
+            self._stop_reading()
+            return
+        *lines, self._pending = (self._pending + data).split(b'\n')
+        for line in lines:
+            self._answers.put_nowait(line.decode(errors='replace'))
+
+    def _stop_reading(self) -> None:
+        try:
+            asyncio.get_running_loop().remove_reader(sys.stdin.fileno())
+        except RuntimeError:
+            # the event loop is already closed, and its readers with it
+            pass
+
+    async def ask_number(self, prompt: str, maximum: int) -> int:
+        """
+        Draws a prompt under the screen and reads a number from 1 to maximum, asking again until one is given
+
+        Args:
+            prompt (str): prompt, rich markup
+            maximum (int): largest number accepted
+
+        Returns:
+            int: the number typed
+        """
+        message = prompt
+        while True:
+            answer = await self.ask(message)
+            if answer.isdigit() and 1 <= int(answer) <= maximum:
+                return int(answer)
+            message = f"[prompt.invalid]Please enter a number from 1 to {maximum}[/]\n{prompt}"
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import random
+
+_MASK = (1 << 64) - 1
+# SplitMix64 constants, the golden ratio increment and its two finalizer multipliers
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+_MIX_1 = 0xBF58476D1CE4E5B9
+_MIX_2 = 0x94D049BB133111EB
+
+# names of the game's subsystem streams, see RNGStreams.stream(): market price draws per city, MarketEvents, travel conditions such as ice and
+# storms, the AI merchants per city and tick, and the View's flavour text
+PRICING = 'pricing'
+EVENTS = 'events'
+TRAVEL = 'travel'
+MERCHANTS = 'merchants'
+DIALOGUE = 'dialogue'
+
+
+def _mix(value: int) -> int:
+    value = (value ^ (value >> 30)) * _MIX_1 & _MASK
+    value = (value ^ (value >> 27)) * _MIX_2 & _MASK
+    return value ^ (value >> 31)
+
+
+def derive_key(seed: int, *path: str) -> int:
+    """
+    Derives a 64 bit stream key from a seed and a path of names, the same on every platform and in every process
+
+    Args:
+        seed (int): root seed
+        *path (str): names identifying the stream, e.g. ('pricing', 'bergen')
+
+    Returns:
+        int: stream key
+    """
+    # the names are folded 8 bytes at a time through the SplitMix64 finalizer, which avoids importing hashlib at startup
+    data = '\0'.join([str(seed), *path]).encode()
+    key = len(data)
+    for start in range(0, len(data), 8):
+        key = _mix((key ^ int.from_bytes(data[start:start + 8], 'little')) + _GOLDEN_GAMMA & _MASK)
+    return key
+
+
+class CounterRandom(random.Random):
+    """
+    Counter-based random number generator: draw n of a stream is a pure function of its key and n
+
+    Each draw hashes key + n * golden ratio with the SplitMix64 finalizer, so a stream's whole state is its key and a counter. Streams with different keys
+    are independent, never share state and can be handed to other threads or processes, and every distribution of random.Random works on top of it.
+    """
+
+    def __init__(self, key: int = 0) -> None:
+        """
+        Initializes CounterRandom
+
+        Args:
+            key (int, optional): 64 bit stream key, see derive_key(). Defaults to 0.
+        """
+        super().__init__(key)
+
+    def seed(self, a: int = 0, version: int = 2) -> None:
+        self.key = a & _MASK
+        self.counter = 0
+        self.gauss_next = None
+
+    def _next(self) -> int:
+        self.counter += 1
+        return _mix((self.key + self.counter * _GOLDEN_GAMMA) & _MASK)
+
+    def random(self) -> float:
+        return (self._next() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k: int) -> int:
+        bits = 0
+        for shift in range(0, k, 64):
+            bits |= self._next() << shift
+        return bits & ((1 << k) - 1)
+
+    def getstate(self) -> tuple[int, int, float | None]:
+        return self.key, self.counter, self.gauss_next
+
+    def setstate(self, state: tuple[int, int, float | None]) -> None:
+        self.key, self.counter, self.gauss_next = state
+
+
+class RNGStreams:
+    """
+    Seeded hierarchy of independent CounterRandom streams owned by a Game
+
+    Every subsystem (PRICING, EVENTS, TRAVEL, MERCHANTS, DIALOGUE) and every city within a subsystem draws from its own stream, keyed by the game seed and the stream's path.
+    Because no stream depends on how often another one was drawn from, results stay bit-identical however the work is split across threads or processes.
+    """
+
+    def __init__(self, seed: int | None = None) -> None:
+        """
+        Initializes RNGStreams
+
+        Args:
+            seed (int, optional): root seed. Defaults to None (a random seed).
+        """
+        self.seed = random.SystemRandom().getrandbits(64) if seed is None else seed
+        self._streams: dict[tuple[str, ...], CounterRandom] = {}
+
+    def stream(self, *path: str) -> CounterRandom:
+        """
+        Returns the stream for a path of names, created on first use
+
+        Args:
+            *path (str): names identifying the stream, e.g. stream(PRICING, 'bergen') or stream(EVENTS)
+
+        Returns:
+            CounterRandom: the stream, the same object on every call with the same path
+        """
+        rng = self._streams.get(path)
+        if rng is None:
+            rng = self._streams[path] = CounterRandom(
+                derive_key(self.seed, *path))
+        return rng
+
+    def getstate(self) -> dict:
+        """
+        Returns the seed and the position of every stream in use, as plain JSON serializable data
+        """
+        return {'seed': self.seed, 'streams': [[list(path), rng.counter, rng.gauss_next] for path, rng in self._streams.items()]}
+
+    def setstate(self, state: dict) -> None:
+        """
+        Restores a state returned by getstate(), streams already handed out are moved to their saved position
+
+        Args:
+            state (dict): state to restore
+        """
+        if state['seed'] != self.seed:
+            self.seed = state['seed']
+            for path, rng in self._streams.items():
+                rng.seed(derive_key(self.seed, *path))
+        for path, counter, gauss_next in state['streams']:
+            rng = self.stream(*path)
+            rng.counter = counter
+            rng.gauss_next = gauss_next
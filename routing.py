@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import heapq
+from datetime import timedelta
+from functools import cache
+from math import inf
+
+from enumerations import WORLD
+from world import World
+
+
+class RouteTable:
+    """
+    Shortest sea routes between the cities of a World
+
+    Routes from a city are found with Dijkstra's algorithm over the world's sea lanes the first time that city is asked about, and kept, so that travel
+    distance, multi-hop routes and nearest city orderings are O(1) lookups afterwards. Only the cities actually sailed from are ever solved, which keeps
+    worlds of thousands of ports cheap, where an all-pairs Floyd-Warshall would be cubic in the number of ports.
+
+    Sea lanes can be closed, for example when a port freezes over, with close_edge() or close_port(). Closing or reopening a lane bumps version and drops
+    every solved route, and routes are solved again on the next query.
+    """
+
+    def __init__(self, world: World = WORLD) -> None:
+        """
+        Initializes RouteTable
+
+        Args:
+            world (World, optional): World whose cities and sea lanes to route over. Defaults to WORLD.
+        """
+        self.cities = world.cities
+        self.index = world.city_index
+        self.lanes = world.lanes
+
+        self.closed_edges: set[tuple[str, str]] = set()
+        self.closed_ports: set[str] = set()
+        self.version = 0
+        # solved routes by origin row, (distance to every row, previous row on the route to every row)
+        self._solved: dict[int, tuple[list[float], list[int]]] = {}
+        self._nearest: dict[str, list[tuple[str, float]]] = {}
+
+    # Closing and opening sea lanes
+    def _invalidate(self) -> None:
+        self.version += 1
+        self._solved.clear()
+        self._nearest.clear()
+
+    def close_edge(self, origin: str, destination: str) -> None:
+        """
+        Closes the sea lane from origin to destination
+
+        Args:
+            origin (str): Name of origin city
+            destination (str): Name of destination city
+        """
+        if (origin, destination) not in self.closed_edges:
+            self.closed_edges.add((origin, destination))
+            self._invalidate()
+
+    def open_edge(self, origin: str, destination: str) -> None:
+        """
+        Reopens a sea lane closed by close_edge()
+
+        Args:
+            origin (str): Name of origin city
+            destination (str): Name of destination city
+        """
+        if (origin, destination) in self.closed_edges:
+            self.closed_edges.discard((origin, destination))
+            self._invalidate()
+
+    def close_port(self, city: str) -> None:
+        """
+        Closes every sea lane into and out of a city
+
+        Args:
+            city (str): Name of city
+        """
+        if city not in self.closed_ports:
+            self.closed_ports.add(city)
+            self._invalidate()
+
+    def open_port(self, city: str) -> None:
+        """
+        Reopens a port closed by close_port()
+
+        Args:
+            city (str): Name of city
+        """
+        if city in self.closed_ports:
+            self.closed_ports.discard(city)
+            self._invalidate()
+
+    # Solving the routes
+    def _solve(self, origin: int) -> tuple[list[float], list[int]]:
+        """
+        Runs Dijkstra from origin over the open sea lanes, keeping the previous city on every shortest route
+        """
+        solved = self._solved.get(origin)
+        if solved is not None:
+            return solved
+
+        closed_ports = {self.index[city] for city in self.closed_ports}
+        closed_edges = {(self.index[a], self.index[b]) for a, b in self.closed_edges}
+        distance = [inf] * len(self.cities)
+        previous = [-1] * len(self.cities)
+        distance[origin] = 0
+        previous[origin] = origin
+        queue = [] if origin in closed_ports else [(0, origin)]
+        while queue:
+            distance_to_city, city = heapq.heappop(queue)
+            if distance_to_city > distance[city]:
+                continue
+            for destination, lane in self.lanes[city]:
+                through_city = distance_to_city + lane
+                if through_city < distance[destination] and destination not in closed_ports and (city, destination) not in closed_edges:
+                    distance[destination] = through_city
+                    previous[destination] = city
+                    heapq.heappush(queue, (through_city, destination))
+
+        solved = self._solved[origin] = (distance, previous)
+        return solved
+
+    # Queries
+    def distance(self, origin: str, destination: str) -> float:
+        """
+        Returns the length of the shortest open sea route from origin to destination
+
+        Args:
+            origin (str): Name of origin city
+            destination (str): Name of destination city
+
+        Returns:
+            float: distance in nautical miles, math.inf if no route is open
+        """
+        return self._solve(self.index[origin])[0][self.index[destination]]
+
+    def route(self, origin: str, destination: str) -> list[str]:
+        """
+        Returns the cities along the shortest open sea route from origin to destination
+
+        Args:
+            origin (str): Name of origin city
+            destination (str): Name of destination city
+
+        Returns:
+            list[str]: cities visited, starting with origin and ending with destination, empty if no route is open
+        """
+        start, current = self.index[origin], self.index[destination]
+        distance, previous = self._solve(start)
+        if distance[current] == inf:
+            return []
+        path = [destination]
+        while current != start:
+            current = previous[current]
+            path.append(self.cities[current])
+        return path[::-1]
+
+    def nearest(self, origin: str) -> list[tuple[str, float]]:
+        """
+        Returns every city reachable from origin, closest first, cached until a sea lane is closed or opened
+
+        Args:
+            origin (str): Name of origin city
+
+        Returns:
+            list[tuple[str, float]]: (city, distance) pairs sorted by distance
+        """
+        if origin not in self._nearest:
+            row = self._solve(self.index[origin])[0]
+            self._nearest[origin] = sorted(((city, row[i]) for i, city in enumerate(self.cities) if city != origin and row[i] < inf),
+                                           key=lambda tuple_from_items: tuple_from_items[1])
+        return self._nearest[origin]
+
+    def travel_time(self, origin: str, destination: str, speed: float) -> timedelta:
+        """
+        Returns the time it takes to sail the shortest open route at a given speed
+
+        Args:
+            origin (str): Name of origin city
+            destination (str): Name of destination city
+            speed (float): speed in nautical miles per hour
+
+        Raises:
+            ValueError: if no route from origin to destination is open
+
+        Returns:
+            timedelta: travel time
+        """
+        distance = self.distance(origin, destination)
+        if distance == inf:
+            raise ValueError(
+                f"No open sea route from {origin} to {destination}")
+        return timedelta(hours=distance / speed)
+
+
+@cache
+def default_route_table() -> RouteTable:
+    """
+    Returns a RouteTable over WORLD shared by cities created outside of a Game
+
+    Returns:
+        RouteTable: shared RouteTable
+    """
+    return RouteTable()
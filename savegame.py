@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+from datetime import datetime
+
+from enumerations import CostBasis, DemandLevel, SupplyLevel
+from game import Game
+from modifiers import MarketEvent, TravelModifier
+from orderbook import Order
+
+# file layout: MAGIC, a header of (version, metadata length), the JSON metadata, then every array packed and 8 byte aligned
+MAGIC = b'PYMERCH\0'
+SAVE_VERSION = 2
+_HEADER = struct.Struct('<II')
+_ALIGNMENT = 8
+
+# MarketData columns written to a snapshot
+MARKET_COLUMNS = ['mu', 'sigma', 'price', 'quantity', 'base_quantity', 'demand', 'anchor', 'stock_target',
+                  'propagated_index', 'demand_shock', 'supply_shock']
+# TransactionHistory columns written to a snapshot
+HISTORY_COLUMNS = ['price', 'quantity', 'is_buy', 'date']
+# MerchantFleet columns written to a snapshot of a game with AI merchants
+MERCHANT_COLUMNS = ['location', 'gold', 'arrival', 'cargo', 'cost']
+
+
+def _date(value: datetime | None) -> str | None:
+    return None if value is None else value.isoformat()
+
+
+def _parse_date(value: str | None) -> datetime | None:
+    return None if value is None else datetime.fromisoformat(value)
+
+
+def _modifier_to_dict(modifier: TravelModifier) -> dict:
+    return {'name': modifier.name, 'speed': modifier.speed, 'closes_port': modifier.closes_port, 'expires': _date(modifier.expires)}
+
+
+def _event_to_dict(event: MarketEvent, active: bool) -> dict:
+    return {'kind': type(event.event_type).__name__, 'level': event.event_type.name, 'active': active,
+            'time_sent': _date(event.time_sent), 'time_to_expire': _date(event.time_to_expire),
+            'affected_city': event.affected_city, 'affected_region': event.affected_region,
+            'affected_category': event.affected_category, 'affected_trade_good': event.affected_trade_good}
+
+
+def save_game(game: Game, path: str) -> None:
+    """
+    Writes a versioned binary snapshot of a game
+
+    Scalars, the player, cities, modifiers, events and open orders go into a JSON metadata block. The market columns, every transaction history column, the AI merchant columns and
+    the price history rings are written as raw packed arrays after it, so even long histories are written and read as a handful of contiguous blocks.
+
+    Args:
+        game (Game): Game to save
+        path (str): file to write
+    """
+    arrays: list[tuple[str, array]] = []
+    for column in MARKET_COLUMNS:
+        arrays.append((f'market.{column}', getattr(game.market, column)))
+
+    items = {}
+    for item in game.player.inv.get_list_of_items():
+        items[item.item_name] = {
+            'quantity': item.quantity, 'cost': item.cost, 'cost_basis': item.cost_basis,
+            'last_seen_price': item.last_seen_price, 'last_purchase_price': item.last_purchase_price,
+            'last_purchase_quantity': item.last_purchase_quantity, 'last_sale_price': item.last_sale_price,
+            'last_sale_quantity': item.last_sale_quantity, 'total_buy_cost': item._total_buy_cost,
+            'total_buy_quantity': item._total_buy_quantity, 'lots': list(item._lots)}
+        for column in HISTORY_COLUMNS:
+            arrays.append((f'history.{item.item_name}.{column}', getattr(
+                item.transaction_history, column)))
+
+    if game.merchants is not None:
+        for column in MERCHANT_COLUMNS:
+            arrays.append((f'merchants.{column}', getattr(game.merchants, column)))
+
+    if game.price_history is not None:
+        for name, values in game.price_history.arrays().items():
+            arrays.append((f'prices.{name}', values))
+
+    metadata = {
+        'byteorder': sys.byteorder,
+        'rng_state': game.rng.getstate(),
+        'current_date': _date(game.current_date),
+        'next_market_event_date': _date(game.next_market_event_date),
+        'next_travel_event_date': _date(game.next_travel_event_date),
+        'cities': {city: {'last_updated': _date(game.get_city(city).last_updated),
+                          'travel_mods': [_modifier_to_dict(mod) for mod in game.get_city(city).travel_mod_list]}
+                   for city in game.market.cities},
+        'player': {'location': game.player.location.name, 'gold': game.player.inv.gold, 'items': items,
+                   'travel_mods': [_modifier_to_dict(mod) for mod in game.player.travel_mod_list]},
+        'events': [_event_to_dict(event, active) for event, active in game.events.scheduled()],
+        'order_book': None if game.order_books is None else [[order.trader, order.side, order.cell, order.quantity, order.limit, order.resting, order.filled]
+                                                              for order in sorted(game.order_books.open_orders(), key=lambda order: order.sequence)],
+        'merchants': None if game.merchants is None else {'count': len(game.merchants), 'start': _date(game.merchants.start),
+                                                          'tick': game.merchants.tick, 'trades': game.merchants.trades},
+        'price_history': None if game.price_history is None else game.price_history.state(),
+        'arrays': {},
+    }
+
+    # offsets are relative to the end of the metadata block so they do not depend on its length
+    offset = 0
+    for name, values in arrays:
+        metadata['arrays'][name] = [offset, values.typecode, len(values)]
+        offset += -(-len(values) * values.itemsize // _ALIGNMENT) * _ALIGNMENT
+
+    encoded = json.dumps(metadata).encode()
+    encoded += b' ' * (-(len(MAGIC) + _HEADER.size + len(encoded)) % _ALIGNMENT)
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(_HEADER.pack(SAVE_VERSION, len(encoded)))
+        file.write(encoded)
+        for name, values in arrays:
+            data = values.tobytes()
+            file.write(data)
+            file.write(b'\0' * (-len(data) % _ALIGNMENT))
+
+
+def load_game(path: str) -> Game:
+    """
+    Loads a game written by save_game()
+
+    The file is memory mapped and each array is copied straight out of the mapping into its column, without parsing or building objects per record
+
+    Args:
+        path (str): file to read
+
+    Raises:
+        ValueError: if the file is not a snapshot or is from an unsupported version
+
+    Returns:
+        Game: the restored Game
+    """
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a pymerchant save file")
+        version, metadata_length = _HEADER.unpack_from(mapped, len(MAGIC))
+        if version != SAVE_VERSION:
+            raise ValueError(
+                f"{path} is save version {version}, expected {SAVE_VERSION}")
+        start = len(MAGIC) + _HEADER.size
+        metadata = json.loads(mapped[start:start + metadata_length])
+        data_start = start + metadata_length
+        swap = metadata['byteorder'] != sys.byteorder
+
+        columns: dict[str, array] = {}
+        with memoryview(mapped) as view:
+            for name, (offset, typecode, length) in metadata['arrays'].items():
+                values = array(typecode)
+                values.frombytes(view[data_start + offset:data_start + offset + length * values.itemsize])
+                if swap:
+                    values.byteswap()
+                columns[name] = values
+
+    game = Game()
+    game.rng.setstate(metadata['rng_state'])
+    game.current_date = _parse_date(metadata['current_date'])
+    game.next_market_event_date = _parse_date(
+        metadata['next_market_event_date'])
+    # snapshots from before travel conditions were generated have none pending
+    game.next_travel_event_date = _parse_date(
+        metadata.get('next_travel_event_date', metadata['current_date']))
+    for column in MARKET_COLUMNS:
+        setattr(game.market, column, columns[f'market.{column}'])
+
+    for city, info in metadata['cities'].items():
+        game.get_city(city).last_updated = _parse_date(info['last_updated'])
+        for mod in info['travel_mods']:
+            game.add_travel_modifier(game.get_city(city), TravelModifier(
+                mod['name'], mod['speed'], mod['closes_port'], _parse_date(mod['expires'])))
+
+    player_info = metadata['player']
+    game.player.location = game.get_city(player_info['location'])
+    game.player.inv.gold = player_info['gold']
+    for mod in player_info['travel_mods']:
+        game.add_travel_modifier(game.player, TravelModifier(
+            mod['name'], mod['speed'], mod['closes_port'], _parse_date(mod['expires'])))
+    for item_name, info in player_info['items'].items():
+        item = game.player.inv.get_player_item(item_name)
+        item.quantity = info['quantity']
+        item.cost = info['cost']
+        item.cost_basis = CostBasis(info['cost_basis'])
+        item.last_seen_price = info['last_seen_price']
+        item.last_purchase_price = info['last_purchase_price']
+        item.last_purchase_quantity = info['last_purchase_quantity']
+        item.last_sale_price = info['last_sale_price']
+        item.last_sale_quantity = info['last_sale_quantity']
+        item._total_buy_cost = info['total_buy_cost']
+        item._total_buy_quantity = info['total_buy_quantity']
+        item._lots = deque([quantity, price] for quantity, price in info['lots'])
+        item._lots_quantity = sum(quantity for quantity, price in item._lots)
+        item._lots_cost = sum(quantity * price for quantity, price in item._lots)
+        for column in HISTORY_COLUMNS:
+            setattr(item.transaction_history, column,
+                    columns[f'history.{item_name}.{column}'])
+
+    levels = {'DemandLevel': DemandLevel, 'SupplyLevel': SupplyLevel}
+    for info in metadata['events']:
+        event = MarketEvent(event_type=levels[info['kind']][info['level']], time_sent=_parse_date(info['time_sent']),
+                            time_to_expire=_parse_date(info['time_to_expire']), affected_city=info['affected_city'],
+                            affected_region=info['affected_region'], affected_category=info['affected_category'],
+                            affected_trade_good=info['affected_trade_good'])
+        game.events.restore(event, info['active'])
+
+    # snapshots written before order books, AI merchants and price history existed have no entries for them
+    if metadata.get('order_book') is not None:
+        game.order_books = game.create_order_books()
+        for trader, side, cell, quantity, limit, resting, filled in metadata['order_book']:
+            game.order_books.submit(Order(trader, side, cell, quantity, limit, resting, filled))
+    fleet_info = metadata.get('merchants')
+    if fleet_info is not None:
+        fleet = game.merchants = game.create_merchants(fleet_info['count'])
+        fleet.start = _parse_date(fleet_info['start'])
+        fleet.tick = fleet_info['tick']
+        fleet.trades = fleet_info['trades']
+        for column in MERCHANT_COLUMNS:
+            setattr(fleet, column, columns[f'merchants.{column}'])
+    # without a saved history the one sampled by Game() is of a different market, start from an empty one
+    if game.price_history is not None:
+        game.price_history.restore(metadata.get('price_history') or {},
+                                   {name[len('prices.'):]: values for name, values in columns.items() if name.startswith('prices.')})
+
+    return game
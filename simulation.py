@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from math import floor
+from typing import Callable
+
+from game import Game
+from journal import TransactionJournal
+
+
+@dataclass()
+class CareerResult:
+    """
+    Describes the outcome of one headless merchant career
+    """
+    seed: int
+    gold: int
+    days: float
+    trades: int
+    voyages: int
+
+
+@dataclass()
+class BatchSummary:
+    """
+    Aggregated gold and time statistics over a batch of careers
+    """
+    games: int
+    mean_gold: float
+    median_gold: float
+    stdev_gold: float
+    min_gold: int
+    max_gold: int
+    mean_days: float
+    mean_trades: float
+    results: list[CareerResult]
+
+
+def greedy_strategy(game: Game, rng: random.Random) -> None:
+    """
+    Plays one turn of a simple merchant: sell everything that is worth more than it cost, buy the good that is cheapest relative to its usual price, then sail somewhere else.
+    When no sea route leaves the port, such as when it is iced in or blockaded, the merchant waits for the next day instead.
+
+    Args:
+        game (Game): Game to play a turn of
+        rng (random.Random): Random number generator for the strategy's own choices
+    """
+    market = game.player.location.inv
+    for player_item in game.player.inv.get_list_of_items():
+        if player_item.quantity > 0 and market.get_market_item(player_item.item_name).price > player_item.cost:
+            game.trade(player_item.item_name, player_item.quantity, 'selling')
+
+    cheapest = min(market.get_list_of_items(),
+                   key=lambda market_item: market_item.price / market_item.mu)
+    if cheapest.price > 0:
+        quantity = min(cheapest.quantity, floor(
+            game.player.inv.gold / 2 / cheapest.price), game.free_cargo())
+        if quantity > 0:
+            game.trade(cheapest.item_name, quantity, 'buying')
+
+    destinations = list(game.player.location.sort_closest_cities())
+    if destinations:
+        game.travel(rng.choice(destinations[:5]))
+    else:
+        game.wait()
+
+
+def run_career(seed: int, turns: int = 100, strategy: Callable[[Game, random.Random], None] = greedy_strategy,
+               journal_dir: str | None = None) -> CareerResult:
+    """
+    Plays one headless career of a number of turns
+
+    Args:
+        seed (int): Seed for both the game and the strategy
+        turns (int, optional): Number of turns to play. Defaults to 100.
+        strategy (Callable[[Game, random.Random], None], optional): Function that plays one turn. Defaults to greedy_strategy.
+        journal_dir (str, optional): Directory to write the career's trades to, as career-<seed>.journal. Defaults to None (no journal).
+
+    Returns:
+        CareerResult: gold, days elapsed, trades and voyages of the career
+    """
+    if journal_dir is not None:
+        os.makedirs(journal_dir, exist_ok=True)
+        path = os.path.join(journal_dir, f'career-{seed}.journal')
+        # a career always starts a fresh journal rather than appending to one from an earlier run
+        if os.path.exists(path):
+            os.remove(path)
+        with TransactionJournal(path) as journal:
+            return _play_career(Game(seed=seed, journal=journal), seed, turns, strategy)
+    return _play_career(Game(seed=seed), seed, turns, strategy)
+
+
+def _play_career(game: Game, seed: int, turns: int, strategy: Callable[[Game, random.Random], None]) -> CareerResult:
+    rng = random.Random(seed)
+    start_date = game.current_date
+    trades = 0
+    voyages = 0
+
+    for turn in range(turns):
+        transactions_before = sum(len(player_item.transaction_history)
+                                  for player_item in game.player.inv.get_list_of_items())
+        location_before = game.player.location
+        strategy(game, rng)
+        trades += sum(len(player_item.transaction_history)
+                      for player_item in game.player.inv.get_list_of_items()) - transactions_before
+        voyages += game.player.location is not location_before
+
+    days = (game.current_date - start_date).total_seconds() / 86400
+    return CareerResult(seed=seed, gold=game.player.inv.gold, days=days, trades=trades, voyages=voyages)
+
+
+def summarize(results: list[CareerResult]) -> BatchSummary:
+    """
+    Aggregates a list of careers into a BatchSummary
+
+    Args:
+        results (list[CareerResult]): careers to aggregate
+
+    Raises:
+        ValueError: if results is empty
+
+    Returns:
+        BatchSummary: gold and time statistics
+    """
+    if not results:
+        raise ValueError("Cannot summarize an empty batch of careers")
+    gold = [result.gold for result in results]
+    return BatchSummary(games=len(results),
+                        mean_gold=statistics.fmean(gold),
+                        median_gold=statistics.median(gold),
+                        stdev_gold=statistics.stdev(gold) if len(gold) > 1 else 0.0,
+                        min_gold=min(gold),
+                        max_gold=max(gold),
+                        mean_days=statistics.fmean(
+                            result.days for result in results),
+                        mean_trades=statistics.fmean(
+                            result.trades for result in results),
+                        results=results)
+
+
+def run_batch(games: int, turns: int = 100, base_seed: int = 0, processes: int | None = None,
+              strategy: Callable[[Game, random.Random], None] = greedy_strategy, journal_dir: str | None = None) -> BatchSummary:
+    """
+    Runs independent careers across a process pool and aggregates them
+
+    Career i is seeded with base_seed + i, so a batch gives the same results however many processes it is split across
+
+    Args:
+        games (int): Number of careers to run
+        turns (int, optional): Number of turns per career. Defaults to 100.
+        base_seed (int, optional): Seed of the first career. Defaults to 0.
+        processes (int, optional): Size of the process pool, 1 runs in this process. Defaults to None (one per CPU).
+        strategy (Callable[[Game, random.Random], None], optional): Module level function that plays one turn. Defaults to greedy_strategy.
+        journal_dir (str, optional): Directory each career writes its trade journal to. Defaults to None (no journals).
+
+    Raises:
+        ValueError: if games is not positive, see summarize()
+
+    Returns:
+        BatchSummary: gold and time statistics over every career
+    """
+    seeds = range(base_seed, base_seed + games)
+    if processes == 1:
+        results = [run_career(seed, turns, strategy, journal_dir)
+                   for seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(run_career, seeds, [turns] * games, [strategy] * games, [journal_dir] * games,
+                                        chunksize=max(1, games // 64)))
+    return summarize(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless PyMerchant careers")
+    parser.add_argument('games', type=int, help="number of careers to run")
+    parser.add_argument('--turns', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--journal', metavar='DIR', default=None,
+                        help="write each career's trades to a journal in DIR")
+    args = parser.parse_args()
+
+    summary = run_batch(args.games, args.turns, args.seed,
+                        args.processes, journal_dir=args.journal)
+    print(f"Games: {summary.games}")
+    print(f"Gold: mean {summary.mean_gold:.0f}, median {summary.median_gold:.0f}, stdev {summary.stdev_gold:.0f}, "
+          f"min {summary.min_gold}, max {summary.max_gold}")
+    print(f"Days: mean {summary.mean_days:.1f}, trades: mean {summary.mean_trades:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import pytest
+
+from game import Game
+
+
+@pytest.fixture
+def game():
+    game = Game(seed=0)
+    game.player.inv.gold = 10 ** 9
+    return game
+
+
+def test_buy_beyond_the_cargo_hold_is_rejected(game):
+    item = game.player.location.inv.get_market_item('wine')
+    item.quantity = game.player.cargo_capacity * 2
+    result = game.trade('wine', game.player.cargo_capacity + 1, 'buying')
+    assert not result.success and result.reason == 'not enough room in the cargo hold'
+    assert game.player.inv.get_player_item('wine').quantity == 0
+
+
+def test_hold_fills_up_across_goods(game):
+    for item in game.player.location.inv.get_list_of_items():
+        item.quantity = game.player.cargo_capacity
+    assert game.trade('wine', game.player.cargo_capacity - 10, 'buying').success
+    assert game.free_cargo() == 10
+    other = next(item.item_name for item in game.player.location.inv.get_list_of_items() if item.item_name != 'wine')
+    assert not game.trade(other, 11, 'buying').success
+    assert game.trade(other, 10, 'buying').success
+    assert game.free_cargo() == 0
+
+
+def test_open_buy_orders_take_up_room_in_the_hold():
+    game = Game(seed=0, order_book=True)
+    game.player.inv.gold = 10 ** 9
+    item = game.player.location.inv.get_market_item('wine')
+    item.quantity = game.player.cargo_capacity
+    game.place_order(item, 100, 'buying', limit=1)
+    assert game.free_cargo() == game.player.cargo_capacity - 100
+    assert not game.trade('wine', game.player.cargo_capacity - 99, 'buying').success
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from enumerations import WORLD, CostBasis
+from item import PlayerItem, Transaction
+
+DATE = datetime(1400, 1, 1)
+
+
+@pytest.fixture
+def wine():
+    # ten bought at 100, ten at 200, then ten sold
+    item = PlayerItem(info=WORLD.info_of('wine'))
+    item.add_transaction(Transaction(price=100, quantity=10, type_of_transaction='buy', date=DATE))
+    item.add_transaction(Transaction(price=200, quantity=10, type_of_transaction='buy', date=DATE))
+    item.add_transaction(Transaction(price=300, quantity=10, type_of_transaction='sell', date=DATE))
+    return item
+
+
+def test_average_cost_weighs_every_purchase(wine):
+    assert wine.cost_basis == CostBasis.AVERAGE
+    assert wine.cost == 150
+
+
+def test_fifo_sells_the_oldest_lots_first(wine):
+    wine.set_cost_basis(CostBasis.FIFO)
+    assert wine.cost == 200
+
+
+def test_lifo_sells_the_newest_lots_first(wine):
+    wine.set_cost_basis(CostBasis.LIFO)
+    assert wine.cost == 100
+
+
+def test_cost_basis_can_be_switched_back_and_forth(wine):
+    wine.set_cost_basis(CostBasis.LIFO)
+    wine.set_cost_basis(CostBasis.FIFO)
+    wine.set_cost_basis(CostBasis.AVERAGE)
+    assert wine.cost == 150
+
+
+def test_lots_are_consumed_across_several_purchases():
+    item = PlayerItem(info=WORLD.info_of('wine'), cost_basis=CostBasis.FIFO)
+    for price in (100, 200, 300):
+        item.add_transaction(Transaction(price=price, quantity=10, type_of_transaction='buy', date=DATE))
+    item.add_transaction(Transaction(price=400, quantity=15, type_of_transaction='sell', date=DATE))
+    # five left of the 200 lot and all ten of the 300 lot
+    assert item.cost == pytest.approx((5 * 200 + 10 * 300) / 15)
+
+
+def test_selling_everything_leaves_no_cost():
+    item = PlayerItem(info=WORLD.info_of('wine'), cost_basis=CostBasis.LIFO)
+    item.add_transaction(Transaction(price=100, quantity=10, type_of_transaction='buy', date=DATE))
+    item.add_transaction(Transaction(price=150, quantity=10, type_of_transaction='sell', date=DATE))
+    assert item.cost == 0
+
+
+def test_transaction_history_round_trips_transactions(wine):
+    assert [transaction.price for transaction in wine.transaction_history] == [100, 200, 300]
+    assert wine.transaction_history[2] == Transaction(price=300, quantity=10, type_of_transaction='sell', date=DATE)
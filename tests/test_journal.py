@@ -0,0 +1,61 @@
+import os
+from datetime import datetime, timedelta
+
+from item import Transaction
+from journal import TransactionJournal, read_journal
+
+DATE = datetime(1400, 1, 1)
+
+
+def trades(count, start=0):
+    return [('lubeck', 'wine', Transaction(price=100 + i, quantity=i + 1, type_of_transaction='buy' if i % 2 else 'sell',
+                                           date=DATE + timedelta(hours=i))) for i in range(start, start + count)]
+
+
+def write(path, records, sync_every=256):
+    with TransactionJournal(path, sync_every=sync_every) as journal:
+        for city, item_name, transaction in records:
+            journal.append(city, item_name, transaction)
+
+
+def entries(path):
+    return [(entry.city, entry.item_name, entry.transaction) for entry in read_journal(path)]
+
+
+def test_journal_round_trips_trades(tmp_path):
+    path = str(tmp_path / 'trades.journal')
+    records = trades(10)
+    write(path, records, sync_every=3)
+    assert entries(path) == records
+
+
+def test_torn_tail_is_ignored_by_readers(tmp_path):
+    path = str(tmp_path / 'trades.journal')
+    records = trades(5)
+    write(path, records)
+    # a crash part way through writing the last record
+    os.truncate(path, os.path.getsize(path) - 3)
+    assert entries(path) == records[:-1]
+
+
+def test_reopening_cuts_off_the_torn_tail(tmp_path):
+    path = str(tmp_path / 'trades.journal')
+    write(path, trades(5))
+    intact = os.path.getsize(path)
+    with open(path, 'ab') as file:
+        file.write(b'\x07\x00\x00')
+    write(path, trades(2, start=5))
+    # the appends resume right after the last whole record
+    assert entries(path) == trades(7)
+    assert os.path.getsize(path) > intact
+
+
+def test_corrupt_record_ends_the_journal(tmp_path):
+    path = str(tmp_path / 'trades.journal')
+    write(path, trades(3))
+    with open(path, 'r+b') as file:
+        file.seek(-1, os.SEEK_END)
+        last = file.read(1)
+        file.seek(-1, os.SEEK_END)
+        file.write(bytes([last[0] ^ 0xFF]))
+    assert entries(path) == trades(2)
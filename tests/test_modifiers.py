@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from enumerations import WORLD, DemandLevel, SupplyLevel
+from game import Game
+from market import MarketData
+from modifiers import EVENT_MULTIPLIERS, TRAVEL_MODIFIER_PRESETS, EventScheduler, MarketEvent, generate_travel_modifier
+
+START = datetime(1400, 1, 1)
+
+
+@pytest.fixture
+def market():
+    return MarketData()
+
+
+@pytest.fixture
+def scheduler(market):
+    return EventScheduler(market)
+
+
+def war(city='lubeck', good='wine', days=(1, 3)):
+    return MarketEvent(DemandLevel.HIGH, START + timedelta(days=days[0]), START + timedelta(days=days[1]),
+                       affected_city=city, affected_trade_good=good)
+
+
+def test_event_waits_for_its_time_sent(market, scheduler):
+    event = war()
+    scheduler.schedule(event)
+    assert scheduler.advance(START) == []
+    assert scheduler.scheduled() == [(event, False)]
+    assert market.demand_shock[market.get_cell('lubeck', 'wine')] == 1
+
+
+def test_event_shocks_its_cells_until_it_expires(market, scheduler):
+    event = war()
+    scheduler.schedule(event)
+    cell = market.get_cell('lubeck', 'wine')
+    assert scheduler.advance(START + timedelta(days=1)) == [event]
+    assert market.demand_shock[cell] == EVENT_MULTIPLIERS[DemandLevel.HIGH]
+    assert scheduler.events_for_city('lubeck') == [event]
+    assert scheduler.scheduled() == [(event, True)]
+
+    assert scheduler.advance(START + timedelta(days=3)) == []
+    assert market.demand_shock[cell] == 1
+    assert scheduler.events_for_city('lubeck') == []
+    assert scheduler.scheduled() == []
+
+
+def test_event_that_expires_within_one_advance_leaves_no_shock(market, scheduler):
+    scheduler.schedule(war())
+    assert len(scheduler.advance(START + timedelta(days=10))) == 1
+    assert market.demand_shock[market.get_cell('lubeck', 'wine')] == 1
+
+
+def test_overlapping_events_multiply_and_unwind(market, scheduler):
+    first, second = war(days=(1, 3)), war(days=(2, 4))
+    scheduler.schedule(first)
+    scheduler.schedule(second)
+    cell = market.get_cell('lubeck', 'wine')
+    scheduler.advance(START + timedelta(days=2))
+    assert market.demand_shock[cell] == pytest.approx(EVENT_MULTIPLIERS[DemandLevel.HIGH] ** 2)
+    scheduler.advance(START + timedelta(days=3))
+    assert market.demand_shock[cell] == pytest.approx(EVENT_MULTIPLIERS[DemandLevel.HIGH])
+    scheduler.advance(START + timedelta(days=4))
+    assert market.demand_shock[cell] == 1
+
+
+def test_region_event_reaches_every_city_of_the_region(market, scheduler):
+    region = WORLD.region_of('lubeck')
+    event = MarketEvent(SupplyLevel.LOW, START, START + timedelta(days=1), affected_region=region, affected_trade_good='wine')
+    scheduler.schedule(event)
+    scheduler.advance(START)
+    for city in market.cities:
+        expected = EVENT_MULTIPLIERS[SupplyLevel.LOW] if WORLD.region_of(city) == region else 1
+        assert market.supply_shock[market.get_cell(city, 'wine')] == expected
+        assert market.demand_shock[market.get_cell(city, 'wine')] == 1
+
+
+def test_cancelled_event_is_deactivated_and_never_expires_again(market, scheduler):
+    event = war()
+    scheduler.schedule(event)
+    scheduler.advance(START + timedelta(days=1))
+    scheduler.cancel(event, START + timedelta(days=2))
+    assert market.demand_shock[market.get_cell('lubeck', 'wine')] == 1
+    assert scheduler.scheduled() == []
+    assert scheduler.advance(START + timedelta(days=5)) == []
+    assert market.demand_shock[market.get_cell('lubeck', 'wine')] == 1
+
+
+def test_on_change_is_called_before_shocks_change(market):
+    calls = []
+    scheduler = EventScheduler(market, on_change=lambda city, when: calls.append((city, when)))
+    scheduler.schedule(war())
+    scheduler.advance(START + timedelta(days=5))
+    assert calls == [('lubeck', START + timedelta(days=1)), ('lubeck', START + timedelta(days=3))]
+
+
+def test_ice_only_forms_in_winter():
+    rng = random.Random(0)
+    summer = {generate_travel_modifier(rng, datetime(1400, 7, 1), ['lubeck'])[1].name for draw in range(200)}
+    winter = {generate_travel_modifier(rng, datetime(1400, 1, 1), ['lubeck'])[1].name for draw in range(200)}
+    assert 'ice' not in summer
+    assert 'ice' in winter
+    assert summer <= set(TRAVEL_MODIFIER_PRESETS)
+
+
+def test_travel_conditions_come_and_go_as_time_passes():
+    game = Game(seed=0)
+    seen = set()
+    for day in range(120):
+        game.advance_time(timedelta(days=1))
+        for city in game.market.cities:
+            for modifier in game.get_city(city).travel_mod_list:
+                assert modifier.expires > game.current_date
+                seen.add(modifier.name)
+        closed = {city for city in game.market.cities if any(modifier.closes_port for modifier in game.get_city(city).travel_mod_list)}
+        assert game.routes.closed_ports == closed
+    assert seen
+
+
+def test_cancelling_an_event_that_is_not_queued_changes_nothing(scheduler):
+    pending, expired = war(days=(5, 6)), war(days=(1, 2))
+    scheduler.schedule(pending)
+    scheduler.schedule(expired)
+    scheduler.advance(START + timedelta(days=3))
+    scheduler.cancel(expired, START + timedelta(days=3))
+    scheduler.cancel(war(), START + timedelta(days=3))
+    assert len(scheduler) == 1
+    scheduler.cancel(pending, START + timedelta(days=3))
+    scheduler.cancel(pending, START + timedelta(days=3))
+    assert len(scheduler) == 0
+    scheduler.advance(START + timedelta(days=10))
+    assert len(scheduler) == 0 and scheduler._cancelled == set()
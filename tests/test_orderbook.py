@@ -0,0 +1,157 @@
+from datetime import datetime
+
+import pytest
+
+from game import Game
+from market import MarketData
+from orderbook import PLAYER, Order, OrderBooks
+
+WHEN = datetime(1400, 1, 1)
+
+
+class Books:
+    """
+    OrderBooks over a fresh market that record their fills and cancels
+    """
+
+    def __init__(self) -> None:
+        self.market = MarketData()
+        self.fills: list[tuple[Order, int, int]] = []
+        self.cancels: list[Order] = []
+        self.books = OrderBooks(self.market, on_fill=lambda order, quantity, price: self.fills.append((order, quantity, price)),
+                                on_cancel=self.cancels.append)
+        self.cell = self.market.get_cell('lubeck', 'wine')
+        self.market.price[self.cell] = 100
+
+    def submit(self, trader, side, quantity, limit, resting=True):
+        return self.books.submit(Order(trader, side, self.cell, quantity, limit, resting))
+
+
+@pytest.fixture
+def books():
+    return Books()
+
+
+def test_crossed_orders_clear_at_one_price(books):
+    books.market.quantity[books.cell] = 0
+    high = books.submit(0, 'buy', 5, 120)
+    low = books.submit(1, 'buy', 5, 110)
+    cheap = books.submit(2, 'sell', 4, 90)
+    dear = books.submit(3, 'sell', 6, 105)
+    books.books.match(WHEN)
+    # every crossed pair fills at the market's price, which lies between the marginal bid and ask
+    assert {price for order, quantity, price in books.fills} == {105}
+    assert high.filled == 5 and low.filled == 5
+    assert cheap.filled == 4 and dear.filled == 6
+
+
+def test_clearing_price_is_clamped_to_the_marginal_limits(books):
+    books.market.quantity[books.cell] = 0
+    books.market.price[books.cell] = 500
+    books.submit(0, 'buy', 3, 120)
+    books.submit(1, 'sell', 3, 90)
+    books.books.match(WHEN)
+    assert [price for order, quantity, price in books.fills] == [120, 120]
+
+
+def test_earlier_order_fills_first_at_the_same_limit(books):
+    books.market.quantity[books.cell] = 0
+    first = books.submit(0, 'buy', 3, 110)
+    second = books.submit(1, 'buy', 3, 110)
+    books.submit(2, 'sell', 3, 100)
+    books.books.match(WHEN)
+    assert first.filled == 3 and second.filled == 0
+    assert books.books.open_orders() == [second]
+
+
+def test_unmatched_orders_trade_against_the_market(books):
+    books.market.quantity[books.cell] = 10
+    price = books.market.fill_price(books.cell, -4)
+    buy = books.submit(0, 'buy', 4, 150)
+    books.books.match(WHEN)
+    assert buy.filled == 4
+    assert books.fills == [(buy, 4, price)]
+    assert 100 < price < books.market.price[books.cell]
+    assert books.market.quantity[books.cell] == 6
+
+
+def test_market_fills_stop_at_the_limit(books):
+    books.market.quantity[books.cell] = 10
+    buy = books.submit(0, 'buy', 8, 110)
+    books.books.match(WHEN)
+    # only the units whose average price stays within the limit fill, the rest of a resting order waits
+    [(order, quantity, price)] = books.fills
+    assert order is buy and 0 < quantity < 8 and price <= 110
+    assert books.books.open_orders() == [buy]
+
+
+def test_market_sales_stop_at_the_limit(books):
+    books.market.quantity[books.cell] = 10
+    sell = books.submit(0, 'sell', 50, 95, resting=False)
+    books.books.match(WHEN)
+    [(order, quantity, price)] = books.fills
+    assert order is sell and 0 < quantity < 50 and price >= 95
+    assert books.cancels == [sell]
+
+
+def test_non_resting_orders_are_cancelled_by_the_auction(books):
+    books.market.quantity[books.cell] = 0
+    resting = books.submit(0, 'buy', 2, 50)
+    once = books.submit(1, 'buy', 2, 50, resting=False)
+    books.books.match(WHEN)
+    assert books.cancels == [once]
+    assert books.books.open_orders() == [resting]
+
+
+def test_escrow_is_taken_by_a_buy_and_released_on_cancel():
+    game = Game(seed=0, order_book=True)
+    item = game.player.location.inv.get_market_item('wine')
+    gold = game.player.inv.gold
+    order = game.place_order(item, 5, 'buying', limit=1)
+    assert game.player.inv.gold == gold - 5
+    assert game.open_orders() == [order]
+    game.cancel_order(order)
+    assert game.player.inv.gold == gold
+    assert game.open_orders() == []
+    # cancelling again does not pay the escrow back twice
+    game.cancel_order(order)
+    assert game.player.inv.gold == gold
+
+
+def test_escrow_of_a_fill_below_the_limit_is_refunded():
+    game = Game(seed=0, order_book=True)
+    item = game.player.location.inv.get_market_item('wine')
+    gold, price = game.player.inv.gold, item.price
+    fill = item.fill_price(-2)
+    game.place_order(item, 2, 'buying', limit=price + 50)
+    game.order_books.match(game.current_date)
+    assert game.player.inv.gold == gold - 2 * fill
+    assert game.player.inv.get_player_item('wine').quantity == 2
+
+
+def test_only_the_players_orders_can_be_cancelled():
+    game = Game(seed=0, order_book=True)
+    item = game.player.location.inv.get_market_item('wine')
+    order = game.order_books.submit(Order(PLAYER + 1, 'buy', item.cell, 1, 1))
+    with pytest.raises(ValueError):
+        game.cancel_order(order)
+
+
+@pytest.mark.parametrize('quantity, side, limit', [(0, 'buying', 1), (1, 'buying', 0), (11, 'buying', 100), (1, 'selling', 1)])
+def test_orders_the_player_cannot_cover_are_refused(quantity, side, limit):
+    game = Game(seed=0, order_book=True)
+    game.player.inv.gold = 1000
+    item = game.player.location.inv.get_market_item('wine')
+    with pytest.raises(ValueError):
+        game.place_order(item, quantity, side, limit=limit)
+    assert game.player.inv.gold == 1000
+    assert game.player.inv.get_player_item('wine').quantity == 0
+    assert game.open_orders() == []
+
+
+def test_buy_orders_must_fit_in_the_hold():
+    game = Game(seed=0, order_book=True)
+    game.player.inv.gold = 10 ** 9
+    item = game.player.location.inv.get_market_item('wine')
+    with pytest.raises(ValueError):
+        game.place_order(item, game.player.cargo_capacity + 1, 'buying', limit=1)
@@ -0,0 +1,64 @@
+import math
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+import pytest
+
+from market import MarketData
+from pricehistory import HISTORY_EPOCH, ROLLUPS, PriceHistory
+from rng import RNGStreams
+
+
+@pytest.fixture(scope='module')
+def recorded():
+    # random prices and stock recorded at irregular steps, with the log to check the history against
+    market = MarketData(rng=RNGStreams(0))
+    market.update_pricing()
+    history = PriceHistory(market)
+    rng = random.Random(1)
+    row, good = 3, market.goods[5]
+    cell = row * len(market.goods) + 5
+    hour = history.hour(HISTORY_EPOCH + timedelta(days=8400))
+    log = []
+    for sample in range(3000):
+        hour += rng.choice([0, 1 / 6, 0.5, 1, 6, 30])
+        market.price[cell] = rng.randint(1, 1000)
+        market.quantity[cell] = rng.randint(0, 500)
+        history.record(row, hour)
+        log.append((hour, market.price[cell], market.quantity[cell]))
+    return history, market.cities[row], good, log
+
+
+@pytest.mark.parametrize('resolution', list(ROLLUPS))
+def test_rollups_match_the_samples(recorded, resolution):
+    history, city, good, log = recorded
+    width = ROLLUPS[resolution][0]
+    buckets = defaultdict(list)
+    for hour, price, quantity in log:
+        buckets[math.floor(hour / width) * width].append((price, quantity))
+    series = history.rollup(city, good, resolution)
+    starts = sorted(buckets)[-len(series):]
+    assert list(series.hours) == starts
+    for i, start in enumerate(starts):
+        prices = [price for price, quantity in buckets[start]]
+        quantities = [quantity for price, quantity in buckets[start]]
+        assert (series.price_min[i], series.price_max[i], series.price_last[i]) == (min(prices), max(prices), prices[-1])
+        assert (series.quantity_min[i], series.quantity_max[i], series.quantity_last[i]) == (min(quantities), max(quantities), quantities[-1])
+        assert series.price_mean[i] == pytest.approx(sum(prices) / len(prices))
+        assert series.quantity_mean[i] == pytest.approx(sum(quantities) / len(quantities))
+
+
+def test_open_bucket_stays_one_row_per_good(recorded):
+    history, city, good, log = recorded
+    for rollup in history.cities[history.market.get_row(city)].rollups.values():
+        assert all(len(column) == len(history.market.goods) for column in rollup.open)
+
+
+def test_samples_keep_the_latest(recorded):
+    history, city, good, log = recorded
+    series = history.samples(city, good)
+    kept = log[-len(series):]
+    assert list(zip(series.hours, series.price_last, series.quantity_last)) == kept
+    since = history.samples(city, good, HISTORY_EPOCH + timedelta(hours=kept[len(kept) // 2][0]))
+    assert list(since.hours) == [hour for hour, price, quantity in kept if hour >= kept[len(kept) // 2][0]]
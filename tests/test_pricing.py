@@ -0,0 +1,44 @@
+import pytest
+
+from market import MarketData
+
+
+@pytest.fixture
+def market():
+    market = MarketData()
+    market.price[0], market.quantity[0] = 100, 100
+    return market
+
+
+def test_small_trades_fill_near_the_quote(market):
+    assert market.fill_price(0, 0) == 100
+    assert market.fill_price(0, -1) == 100
+    assert market.fill_price(0, 1) == 100
+
+
+def test_large_trades_slip(market):
+    # the average of 100 * (100 / quantity) ** 0.5 over the stock traded
+    assert market.fill_price(0, -75) == 133
+    assert market.fill_price(0, 300) == 67
+    assert market.fill_price(0, -50) < market.fill_price(0, -75) < market.fill_price(0, -100)
+
+
+def test_trade_fills_between_the_old_and_new_price(market):
+    paid = market.apply_trade(0, -75)
+    assert market.price[0] == 200
+    assert 100 < paid < 200
+    got = market.apply_trade(0, 75)
+    assert market.price[0] == 100
+    assert 100 < got < 200
+
+
+def test_selling_a_huge_stack_does_not_get_the_quote_for_every_unit(market):
+    assert market.apply_trade(0, 100_000) * 100_000 < 100 * 100_000 / 10
+
+
+def test_fill_quantity_keeps_the_average_within_the_limit(market):
+    bought = market.fill_quantity(0, -100, 120)
+    assert market.fill_price(0, -bought) <= 120 < market.fill_price(0, -bought - 1)
+    sold = market.fill_quantity(0, 1000, 90)
+    assert market.fill_price(0, sold) >= 90 > market.fill_price(0, sold + 1)
+    assert market.fill_quantity(0, -100, 99) == 0
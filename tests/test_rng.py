@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from game import Game
+from rng import EVENTS, PRICING, TRAVEL, RNGStreams
+
+
+def test_streams_depend_only_on_the_seed_and_path():
+    first, second = RNGStreams(7), RNGStreams(7)
+    # drawing from one stream does not move another
+    first.stream(EVENTS).random()
+    assert first.stream(PRICING, 'bergen').random() == second.stream(PRICING, 'bergen').random()
+    assert first.stream(PRICING, 'bergen').random() != first.stream(PRICING, 'lubeck').random()
+    assert RNGStreams(8).stream(TRAVEL).random() != RNGStreams(7).stream(TRAVEL).random()
+
+
+def test_state_round_trips():
+    streams = RNGStreams(7)
+    for draw in range(5):
+        streams.stream(TRAVEL).random()
+    restored = RNGStreams(1)
+    restored.setstate(streams.getstate())
+    assert restored.stream(TRAVEL).random() == streams.stream(TRAVEL).random()
+
+
+def test_travel_conditions_do_not_depend_on_the_markets_simulated():
+    # one game simulates every market every day, the other never looks at them
+    busy, idle = Game(seed=4), Game(seed=4)
+    for day in range(60):
+        busy.advance_time(timedelta(days=1))
+        busy.update_all_markets()
+        idle.advance_time(timedelta(days=1))
+    for city in busy.market.cities:
+        assert ([(modifier.name, modifier.expires) for modifier in busy.get_city(city).travel_mod_list] ==
+                [(modifier.name, modifier.expires) for modifier in idle.get_city(city).travel_mod_list])
+    assert busy.routes.closed_ports == idle.routes.closed_ports
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from math import inf
+
+import pytest
+
+from routing import RouteTable
+from world import World
+
+
+def city(distances):
+    return {'region': 'north', 'distances': distances, 'productions': {}}
+
+
+@pytest.fixture
+def routes():
+    # a short way round from a to c through b, and a long direct lane, d only reachable through c
+    world = World({
+        'regions': ['north'],
+        'categories': ['food'],
+        'goods': {'grain': {'category': 'food', 'mu': 10, 'sigma': 1, 'inputs': []}},
+        'cities': {
+            'a': city({'b': 10, 'c': 50}),
+            'b': city({'a': 10, 'c': 10}),
+            'c': city({'a': 50, 'b': 10, 'd': 5}),
+            'd': city({'c': 5}),
+        },
+    })
+    return RouteTable(world)
+
+
+def test_shortest_route_is_solved(routes):
+    assert routes.distance('a', 'c') == 20
+    assert routes.route('a', 'd') == ['a', 'b', 'c', 'd']
+    assert routes.nearest('a') == [('b', 10), ('c', 20), ('d', 25)]
+    assert routes.travel_time('a', 'c', speed=5) == timedelta(hours=4)
+
+
+def test_closing_a_lane_reroutes(routes):
+    routes.nearest('a')
+    version = routes.version
+    routes.close_edge('b', 'c')
+    assert routes.version == version + 1
+    assert routes.distance('a', 'c') == 50
+    assert routes.route('a', 'c') == ['a', 'c']
+    assert routes.nearest('a') == [('b', 10), ('c', 50), ('d', 55)]
+    # only one direction was closed
+    assert routes.distance('c', 'a') == 20
+
+
+def test_reopening_a_lane_restores_the_route(routes):
+    routes.close_edge('b', 'c')
+    routes.distance('a', 'c')
+    routes.open_edge('b', 'c')
+    assert routes.distance('a', 'c') == 20
+    assert routes.nearest('a')[1] == ('c', 20)
+
+
+def test_closing_a_port_cuts_it_off(routes):
+    routes.nearest('a')
+    routes.close_port('c')
+    assert routes.distance('a', 'c') == inf
+    assert routes.distance('a', 'd') == inf
+    assert routes.route('a', 'd') == []
+    assert routes.nearest('a') == [('b', 10)]
+    assert routes.nearest('c') == []
+    with pytest.raises(ValueError):
+        routes.travel_time('a', 'd', speed=5)
+
+
+def test_reopening_a_port_restores_its_routes(routes):
+    routes.close_port('c')
+    routes.nearest('a')
+    routes.open_port('c')
+    assert routes.nearest('a') == [('b', 10), ('c', 20), ('d', 25)]
+
+
+def test_closing_twice_only_invalidates_once(routes):
+    routes.close_port('c')
+    version = routes.version
+    routes.close_port('c')
+    routes.open_edge('a', 'b')
+    assert routes.version == version
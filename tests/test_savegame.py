@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import pytest
+
+from enumerations import CostBasis
+from game import Game
+from modifiers import TravelModifier
+from savegame import MARKET_COLUMNS, MERCHANT_COLUMNS, load_game, save_game
+
+
+@pytest.fixture
+def played():
+    # a game with trades, a cost basis change, a travel modifier, AI merchants and an open order book order
+    game = Game(seed=3, merchants=8, order_book=True)
+    for turn in range(12):
+        item_name = game.player.location.inv.get_list_of_items()[turn % 4].item_name
+        game.trade(item_name, 5, 'buying')
+        game.order_books.match(game.current_date)
+        game.trade(item_name, 2, 'selling')
+        game.advance_time(timedelta(hours=20))
+        game.update_market(game.player.location)
+    game.player.inv.get_player_item(item_name).set_cost_basis(CostBasis.LIFO)
+    game.add_travel_modifier(game.get_city(game.list_of_cities()[1]),
+                             TravelModifier('ice', -0.5, True, game.current_date + timedelta(days=5)))
+    game.place_order(game.player.location.inv.get_market_item('wine'), 3, 'buying', limit=1)
+    yield game
+    game.close()
+
+
+@pytest.fixture
+def loaded(played, tmp_path):
+    path = str(tmp_path / 'game.sav')
+    save_game(played, path)
+    game = load_game(path)
+    yield game
+    game.close()
+
+
+def test_market_columns_round_trip(played, loaded):
+    for column in MARKET_COLUMNS:
+        assert getattr(loaded.market, column) == getattr(played.market, column), column
+
+
+def test_player_round_trips(played, loaded):
+    assert loaded.current_date == played.current_date
+    assert loaded.next_travel_event_date == played.next_travel_event_date
+    assert loaded.player.location.name == played.player.location.name
+    assert loaded.player.inv.gold == played.player.inv.gold
+    for before, after in zip(played.player.inv.get_list_of_items(), loaded.player.inv.get_list_of_items()):
+        assert after.item_name == before.item_name
+        assert after.quantity == before.quantity
+        assert after.cost_basis == before.cost_basis
+        assert after.cost == before.cost
+        assert after.transaction_history == before.transaction_history
+
+
+def test_merchants_and_orders_round_trip(played, loaded):
+    for column in MERCHANT_COLUMNS:
+        assert getattr(loaded.merchants, column) == getattr(played.merchants, column), column
+    [before] = played.open_orders()
+    [after] = loaded.open_orders()
+    assert (after.side, after.cell, after.quantity, after.limit) == (before.side, before.cell, before.quantity, before.limit)
+    # the escrow of a loaded order is still released on cancel
+    gold = loaded.player.inv.gold
+    loaded.cancel_order(after)
+    assert loaded.player.inv.gold == gold + 3
+
+
+def test_price_history_round_trips(played, loaded):
+    for city in played.market.cities:
+        assert loaded.price_history.samples(city, 'wine') == played.price_history.samples(city, 'wine')
+        for resolution in ('hourly', 'daily', 'weekly'):
+            assert loaded.price_history.rollup(city, 'wine', resolution) == played.price_history.rollup(city, 'wine', resolution)
+
+
+def test_loaded_game_plays_on_identically(played, loaded):
+    for game in (played, loaded):
+        game.advance_time(timedelta(days=3))
+        game.update_all_markets()
+    assert loaded.market.price == played.market.price
+    assert loaded.market.quantity == played.market.quantity
+    assert loaded.merchants.gold == played.merchants.gold
+
+
+def test_loading_something_else_is_refused(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'not a saved game')
+    with pytest.raises(ValueError):
+        load_game(str(path))
@@ -0,0 +1,30 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from game import Game
+from modifiers import TravelModifier
+from simulation import greedy_strategy, run_batch, summarize
+
+
+def test_greedy_strategy_waits_in_a_closed_port():
+    game = Game(seed=0)
+    location = game.player.location
+    game.add_travel_modifier(location, TravelModifier('ice', 0, True, game.current_date + timedelta(days=30)))
+    date = game.current_date
+    greedy_strategy(game, random.Random(0))
+    assert game.player.location is location
+    assert game.current_date > date
+
+
+def test_batches_are_reproducible():
+    first = run_batch(2, turns=5, processes=1)
+    second = run_batch(2, turns=5, processes=1)
+    assert [result.gold for result in first.results] == [result.gold for result in second.results]
+    assert first.games == 2
+
+
+def test_empty_batch_cannot_be_summarized():
+    with pytest.raises(ValueError):
+        summarize([])
@@ -0,0 +1,8 @@
+from benchmark import UI_MODULES, check_startup
+
+
+def test_headless_start_does_not_import_the_ui():
+    # importing pymerchant and game and creating a Game, in fresh interpreters. The time it takes is checked against its budget by benchmark.py, a wall
+    # clock assertion here would fail on slow or busy machines
+    fastest, problems = check_startup()
+    assert not [problem for problem in problems if 'imported' in problem], f"{UI_MODULES} must only load with a View"
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from datetime import timedelta
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING
 
-from enumerations import CITIES
 from inventory import MarketInv, PlayerInv
-# from modifiers import TravelModifier
+from routing import RouteTable, default_route_table
+from modifiers import TravelModifier, TravelModifierRegistry
+
+if TYPE_CHECKING:
+    from market import MarketData
 
 
 @dataclass()
@@ -20,43 +25,51 @@ class Player:
     location: City
     travel_mod_list: list
     travel_speed = nautical_miles_per_hour = 6
+    # units of trade goods the player's cog can carry
+    cargo_capacity = 500
     inv: PlayerInv = field(default_factory=PlayerInv)
 
+    def get_cargo_space(self) -> int:
+        """
+        Returns units of free space in the cargo hold
+
+        Returns:
+            int: cargo_capacity less the units of every PlayerItem carried
+        """
+        return self.cargo_capacity - sum(item.quantity for item in self.inv.get_list_of_items())
+
     @classmethod
-    def get_time_to_travel(cls, player: Player, origin: City, destination: City):
+    def get_time_to_travel(cls, player: Player, origin: City, destination: City, modifiers: TravelModifierRegistry | None = None):
+        """
+        Returns time it takes a player to sail the shortest open route from origin to destination
+
+        Speed is scaled by the TravelModifiers of the player, the origin and the destination. With a TravelModifierRegistry the composite multiplier is
+        cached per voyage, otherwise it is summed from the travel_mod_lists on every call.
+
+        Args:
+            player (Player): Player sailing
+            origin (City): City sailed from
+            destination (City): City sailed to
+            modifiers (TravelModifierRegistry, optional): registry caching speed multipliers. Defaults to None.
+
+        Returns:
+            timedelta: travel time
+        """
         time: timedelta
         origin_name = origin.name
         destination_name = destination.name
-        # modlist = []
-
-        # lookup distance
-        destination_distance = CITIES[origin_name].get(
-            'distances', {}).get(destination_name)
-
-        # # check player state for upgrades
-        # if TravelModifier.get_travel_modifiers(player):
-        #     for mod in TravelModifier.get_travel_modifiers(player):
-        #         modlist.append(mod)
-        #         print(mod)
-        # if TravelModifier.get_travel_modifiers(origin):
-        #     for mod in TravelModifier.get_travel_modifiers(origin):
-        #         modlist.append(mod)
-        #         print(mod)
-        # if TravelModifier.get_travel_modifiers(destination):
-        #     for mod in TravelModifier.get_travel_modifiers(destination):
-        #         modlist.append(mod)
-        #         print(mod)
-
-        # total_percentage = 1
-        # for mod in modlist:
-        #     total_percentage += mod.speed
-        # # sum modlist
-
-        # randomize the travel time
-        speed = 1 * cls.nautical_miles_per_hour
-        time_to_travel = destination_distance / speed
-
-        time = timedelta(hours=time_to_travel)
+
+        # check player state for upgrades and the origin and destination for ice, blockades and pirates
+        if modifiers is not None:
+            total_percentage = modifiers.speed_multiplier(
+                player, origin, destination)
+        else:
+            total_percentage = TravelModifier.combined_speed(
+                player.travel_mod_list + origin.travel_mod_list + destination.travel_mod_list)
+
+        # lookup distance of the shortest open route, precomputed in the RouteTable
+        speed = total_percentage * cls.nautical_miles_per_hour
+        time = origin.routes.travel_time(origin_name, destination_name, speed)
 
         return time
 
@@ -65,33 +78,42 @@ class Player:
 class City:
     """
     Describes City Object
+
+    last_updated is the game date the city's market was last simulated up to, see Game.update_market()
+
+    The city's MarketInv, a view over its row of market, is only built the first time inv is accessed, so a game only pays for the markets that are visited
     """
     name: str
     travel_mod_list: list
-    inv: MarketInv = field(default_factory=MarketInv)
+    market: MarketData | None = field(default=None, repr=False)
+    routes: RouteTable = field(default_factory=default_route_table)
+    last_updated: datetime = datetime.min
 
-    def sort_closest_cities(self, city_list=CITIES) -> dict[str, int]:
+    @cached_property
+    def inv(self) -> MarketInv:
+        """
+        Returns the city's MarketInv, built on first access
+
+        Returns:
+            MarketInv: view over the city's row of market, or over a market of its own if the city has none
+        """
+        if self.market is None:
+            return MarketInv(city=self.name)
+        return MarketInv(self.market, self.name)
+
+    def sort_closest_cities(self) -> dict[str, int]:
         """
         Sorting function for cities by distance.
 
-        Note: Each distance in the CITIES dictionary was measured by hand from city to city in Google Earth in Nautical Miles by a novice approximation of a sea route.
+        Note: Each sea lane distance in data/world.json was measured by hand from city to city in Google Earth in Nautical Miles by a novice approximation of a sea route.
 
         Likely these numbers are far off what real maritime sailing distance approximations would be, but I did not have the experience or time to write a program to approximate these distances for me.
 
         Nevertheless, these approximations are much more accurate than a as the crow flies measure between cities.
 
-        sorting function uses lambda, pythons anoymous function generator
-        lambda returns a value to be used as the key to sort the the list with the second position in the tuple index as the key
-
-        Args:
-            citylist (dict[str: dict[str, Any]]): Dictionary of cities with their coorresponding production attributes, used to build City objects. Defaults to CITIES.
+        Distances are those of the shortest open route between cities, which the RouteTable computes once and keeps sorted for each city until a sea lane is closed or opened
 
         Returns:
-            dict[str, int]: _description_
+            dict[str, int]: city names and their distance in nautical miles, closest first
         """
-        city_list_copy = city_list[self.name]['distances'].copy()
-
-        sorted_city_list = dict(
-            sorted(city_list_copy.items(), key=lambda tuple_from_items: tuple_from_items[1]))
-
-        return sorted_city_list
+        return dict(self.routes.nearest(self.name))
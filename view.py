@@ -1,150 +1,45 @@
 from __future__ import annotations
 
+import asyncio
 import os
-import time
 from dataclasses import dataclass
-from datetime import timedelta, datetime
-import random
-from math import floor
+from datetime import timedelta
 
-from rich import print
 from rich.console import Console
 from rich.panel import Panel
-from rich.progress import track
-from rich.prompt import IntPrompt
+from rich.progress_bar import ProgressBar
 from rich.table import Table
 
-from enumerations import CITIES, TRADING_HOUSE_DIALOGUE
-from tradeentity import City, Player
-from inventory import MarketInv, PlayerInv
-from item import Transaction
-
-
-@dataclass()
-class Game:
-    """
-    Game class holds all objects necessary for the game, including Player, City, and all of their objects and attriburtes
-
-    Game logic and initialization of game occurs here
-    """
-    current_date = datetime(year=1323, month=7, day=29, hour=6, minute=0)
-    player: Player
-
-    def __init__(self) -> None:
-        """
-        Games
-
-        Args:
-            starting_city (str, optional): Name of starting_city player is located in. Defaults to 'lubeck'.
-        """
-        self.build_cities()
-        self.player = self.create_player()
-
-    def advance_time(self, time_to_advance: timedelta):
-        """
-        Advances game time by a datetime.timedelta
-
-        Args:
-            time (timedelta): timedelta is defined in datetime module
-        """
-        self.current_date += time_to_advance
-
-    def build_cities(self) -> None:
-        """
-        Creates all city objects for game and assigns them to our game object
-
-        To be run in __init__() function
-
-        Note we use setattr() function because cities are not defined as keyword properties at time of
-        """
-        for city in CITIES.keys():
-            new_city = City(city, travel_mod_list=list())
-            setattr(self, city, new_city)
-
-    def create_player(self) -> Player:
-        """
-        Creates player object for game
-
-        Returns:
-            Player: Player object
-        """
-        city = self.get_city('lubeck')
-        return Player(city, travel_mod_list=[])
-
-    def list_of_cities(self):
-        """
-        Returns list of cities in game
-
-        Returns:
-            List[City]: List of City objects in game
-        """
-        return [city for city in dir(self) if isinstance(getattr(self, city), City)]
-
-    def get_city(self, city: str) -> City:
-        """
-        Returns city by str lookup
-
-        Args:
-            city (str): Name of city, not the City object itself
-
-        Returns:
-            City: City Object
-        """
-        return getattr(self, city)
-
-    @staticmethod
-    def update_market(city):
-        """
-        Updates all prices for items in a given city
-
-        Args:
-            city (City): City we are updating
-        """
-        city.inv.update_item_pricing()
-        city.inv.update_item_quantity()
-
-    # def check_MarketEvent(self, city: City):
-    #     """
-    #     Checks and resolves all MarketEvents in a given city, deleting any events at or beyond expiry
-
-    #     Args:
-    #         event (MarketEvent): The kMarketEvent to be deleted
-    #     Calls:
-    #         delete_MarketEvent(city)
-    #     Returns:
-    #         None
-    #     """
-    #     for event in MarketEvent.get_all_events(city):
-    #         if event.time_to_expire <= self.current_date:
-    #             MarketEvent.delete_MarketEvent(event)
-
-    def execute_trade(self, item, trade_quantity, player_inv: PlayerInv, market_inv: MarketInv, buying_or_selling):
-        if buying_or_selling == 'buying':
-            self.player.inv.get_player_item(
-                item.item_name).quantity += trade_quantity
-
-            item.quantity -= trade_quantity
-
-            player_inv.gold -= item.price * trade_quantity
-
-            # update the item cost for the PlayerItem in the PlayerInv
-            player_inv.get_player_item(item.item_name).add_transaction(
-                Transaction(price=item.price, quantity=trade_quantity, type_of_transaction='buy', date=self.current_date))
-
-        elif buying_or_selling == 'selling':
-            self.player.inv.get_player_item(
-                item.item_name).quantity -= trade_quantity
-
-            self.player.location.inv.get_market_item(
-                item.item_name).quantity += trade_quantity
-
-            player_inv.gold += item.price * trade_quantity
-
-            player_inv.get_player_item(item.item_name).add_transaction(
-                Transaction(price=item.price, quantity=trade_quantity, type_of_transaction='sell', date=self.current_date))
-
-        else:
-            print("Error, no trade executed")
+from enumerations import TRADING_HOUSE_DIALOGUE
+from game import Game
+import profiler
+from profiler import PROFILER, instrument
+from render import CachedRenderable, CachedTable, Computed, Screen
+from rng import DIALOGUE
+from savegame import save_game
+
+# travel and wait animations are drawn at a fixed frame rate for a bounded wall clock time, however much game time passes
+FRAMES_PER_SECOND = 30
+ANIMATION_SECONDS_PER_GAME_HOUR = 0.02
+MIN_ANIMATION_SECONDS = 0.5
+MAX_ANIMATION_SECONDS = 3.0
+
+# while the clock runs, every CLOCK_TICK_SECONDS of wall clock time advance the game by CLOCK_TICK_GAME_TIME
+CLOCK_TICK_SECONDS = 1.0
+CLOCK_TICK_GAME_TIME = timedelta(minutes=10)
+# every MARKET_SIMULATION_SECONDS the markets of the MARKET_SIMULATION_BATCH most out of date cities the player is not in are caught up
+MARKET_SIMULATION_SECONDS = 1.0
+MARKET_SIMULATION_BATCH = 4
+# the game is saved to AUTOSAVE_PATH every AUTOSAVE_SECONDS and when the player quits
+AUTOSAVE_PATH = 'autosave.sav'
+AUTOSAVE_SECONDS = 60.0
+
+# main menu entry that pauses and resumes the game clock
+CLOCK_MENU_OPTION = 'Pause/resume clock'
+# main menu entry shown when the game is run with profiling enabled
+DEBUG_MENU_OPTION = 'Debug (profiler)'
+# main menu entry shown in order book mode, lists the player's open orders to cancel
+ORDERS_MENU_OPTION = 'Open orders'
 
 
 @dataclass
@@ -154,114 +49,206 @@ class View:
 
     This could be later replaced by a more complex system written in CURSES or some non-console based game.
     I've considered adding a GUI but that might be too much for this time
+
+    Every screen is drawn into one in place Screen, see render.py, and the status panel and item tables are cached so that only the rows whose
+    values changed are formatted again
+
+    The view runs on an asyncio event loop. Menus await the player's input while the game clock, the catch up of the other cities' markets and the
+    autosave run as tasks beside them, so the game keeps ticking while the player reads a menu, and the clock is shown ticking on the open screen.
     """
     game: Game
 
-    def __init__(self) -> None:
+    def __init__(self, animate: bool = True, clock: bool = True, autosave_path: str | None = AUTOSAVE_PATH, game: Game | None = None) -> None:
         """
         Initializes View object, defines menu and keyword attributes not set in @dataclass() init
+
+        Args:
+            animate (bool, optional): Animate travel and waiting with a progress bar, False advances time instantly. Defaults to True.
+            clock (bool, optional): Start with the game clock running, it can be paused and resumed from the main menu. Defaults to True.
+            autosave_path (str, optional): file the game is autosaved to, None turns autosave off. Defaults to AUTOSAVE_PATH.
+            game (Game, optional): game to play, such as one loaded by savegame.load_game(). Defaults to None (a new Game).
         """
-        self.game = Game()
+        self.game = Game() if game is None else game
+        self.animate = animate
+        self.paused = not clock
+        # the clock stands still while travel and waiting are animated, they advance the game themselves
+        self.passing_time = False
+        self.autosave_path = autosave_path
         self.menu = ['Travel', 'Trade', 'Inventory',
-                     'Wait (advance to next day)', 'Quit']
+                     'Wait (advance to next day)', CLOCK_MENU_OPTION, 'Quit']
+        if self.game.order_books is not None:
+            self.menu.insert(-1, ORDERS_MENU_OPTION)
+        if profiler.ENABLED:
+            self.menu.insert(-1, DEBUG_MENU_OPTION)
         self.menu_selection = None
         self.user_last_action = None
         self.time_passed = None
         self.user_selection = None
         self.console = Console()
+        self.screen = Screen(self.console)
+        self.status_panel = CachedRenderable(self.build_status_panel)
+        self.status = Computed(self.get_game_status)
+        self.combined_table = CachedTable("Market and Inventory", [("#", "right"), ("Trade Good", "left"), ("Market Qty", "right"),
+                                                                   ("Market Price", "right"), ("Cargo Qty", "right"), ("Cargo Cost/Unit", "right"),
+                                                                   ("Total Cost", "right"), ("Market Value", "right")],
+                                          self.format_combined_row)
+        self.player_table = CachedTable("Cargo Hold Inv", [("#", "left"), ("Trade Good", "left"), ("Inventory", "left"), ("Cost", "left")],
+                                        lambda number, item_name, quantity, cost: (f"{number}", item_name.title(), f"{quantity}", f"{cost}"))
 
     def game_loop(self):
         """
         Main loop that runs and draws the screen and calls the relevant functions in from view and game
         """
-        self.title_screen()
-        Game.update_market(self.game.player.location)
-        while self.menu_selection != 'q':
-            self.main_menu_view()
-            self.process_input()
+        try:
+            asyncio.run(self.run())
+        finally:
+            self.game.close()
 
-    # Menu selection methods
-    def main_menu_view(self):
+    async def run(self):
         """
-        Displays game_menu and asks user for input
+        Runs the menus, the game clock, the market simulation of the other cities and the autosave as concurrent tasks until the player quits
+        """
+        with self.screen:
+            tasks = [asyncio.create_task(task) for task in (self.run_clock(), self.run_market_simulation(), self.run_autosave())]
+            try:
+                await self.title_screen()
+                while self.menu_selection != 'q':
+                    await self.main_menu_view()
+                    await self.process_input()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        self.autosave()
+
+    # Background tasks, each runs between the awaits of the menus so the game is never changed in the middle of a menu action
+    async def run_clock(self):
+        """
+        Advances the game by CLOCK_TICK_GAME_TIME every CLOCK_TICK_SECONDS unless the clock is paused, keeping the player's market current and the
+        open screen up to date
+        """
+        while True:
+            await asyncio.sleep(CLOCK_TICK_SECONDS)
+            if self.paused or self.passing_time:
+                continue
+            self.game.advance_time(CLOCK_TICK_GAME_TIME)
+            self.game.update_market(self.game.player.location)
+            self.screen.refresh()
+
+    async def run_market_simulation(self):
+        """
+        Catches up the markets of the cities the player is not in, the most out of date first, a few cities at a time
 
+        Markets are otherwise only simulated when observed, so arriving in a city after a long time would wait on its whole catch up, see Game.update_market()
+        """
+        while True:
+            await asyncio.sleep(MARKET_SIMULATION_SECONDS)
+            location = self.game.player.location
+            cities = [self.game.get_city(city) for city in self.game.market.cities if city != location.name]
+            cities.sort(key=lambda city: city.last_updated)
+            for city in cities[:MARKET_SIMULATION_BATCH]:
+                if city.last_updated < self.game.current_date:
+                    self.game.update_market(city)
+                    # let the menus in between cities
+                    await asyncio.sleep(0)
+
+    async def run_autosave(self):
+        while True:
+            await asyncio.sleep(AUTOSAVE_SECONDS)
+            self.autosave()
+
+    def autosave(self):
         """
-        self.clear_sceen()
-        self.get_game_status()
+        Saves the game to autosave_path, see savegame.save_game()
 
-        print(
-            f"Welcome to the city of {self.game.player.location.name.capitalize()}!")
-        print("What would you like to do?")
+        The snapshot is written next to it first and then moved over it, so an interrupted save never leaves a broken autosave behind
+        """
+        if self.autosave_path is None:
+            return
+        partial = self.autosave_path + '.partial'
+        save_game(self.game, partial)
+        os.replace(partial, self.autosave_path)
 
-        for index, option in enumerate(self.menu):
-            print(f"{index+1}. {option}")
+    # Menu selection methods
+    async def main_menu_view(self):
+        """
+        Displays game_menu and asks user for input
 
-        choice = self.get_input_main_menu_selection(self.menu)
+        """
+        menu = "\n".join(f"{index+1}. {option}" for index, option in enumerate(self.menu))
+        self.screen.show(self.status,
+                         f"Welcome to the city of {self.game.player.location.name.capitalize()}!\nWhat would you like to do?\n{menu}")
 
-        self.menu_selection = self.menu[choice - 1]
+        choice = await self.get_input_main_menu_selection(self.menu)
 
-    def travel_view(self):
-        self.clear_sceen()
-        self.get_game_status()
+        self.menu_selection = self.menu[choice - 1]
 
+    async def travel_view(self):
+        # only the cities an open sea route reaches are listed, see RouteTable.nearest()
         list_of_cities = self.get_sorted_cities()
+        if not list_of_cities:
+            self.screen.show(self.status, f"No open sea route leaves {self.game.player.location.name.capitalize()}, the port is closed.")
+            return
+        self.screen.show(self.status, "\n".join(f"{i+1}. {city.capitalize()} {distance} (distance in NM)"
+                                                 for i, (city, distance) in enumerate(list_of_cities)))
 
-        choice = self.get_input_for_city_choice(list_of_cities)
+        choice = await self.get_input_for_city_choice(list_of_cities)
 
         new_location = list_of_cities[choice - 1][0]
 
-        self.time_passed = Player.get_time_to_travel(
-            self.game.player, self.game.player.location, self.game.get_city(new_location))
-        total_seconds = round(self.time_passed.total_seconds())
-
-        for i in track(range(0, total_seconds), f"Traveling to {new_location.capitalize()}"):
-            time.sleep(.00001)
-
-        self.game.advance_time(self.time_passed)
-        self.game.player.location = self.game.get_city(new_location)
-        Game.update_market(self.game.player.location)
-        print(
-            f"You have arrived in {self.game.player.location.name.capitalize()}.")
+        # the clock kept running while the player chose, a port may have closed since the list was drawn
+        try:
+            self.time_passed = self.game.get_travel_time(new_location)
+        except ValueError:
+            self.screen.show(self.status, f"The sea route to {new_location.capitalize()} has closed, we cannot sail there now.")
+            return
 
-    def trade_view(self):
-        self.clear_sceen()
-        self.get_game_status()
+        await self.pass_time(self.time_passed,
+                             f"Traveling to {new_location.capitalize()}")
+        self.game.travel(new_location)
+        self.screen.show(self.status,
+                         f"You have arrived in {self.game.player.location.name.capitalize()}.")
 
+    async def trade_view(self):
         # Get list of items in player city
         list_of_items = self.game.player.location.inv.get_list_of_items()
         player_list_of_items = self.game.player.inv.get_list_of_items()
         # render table of items
 
-        table = self.build_combined_inventory_table(
-            list_of_items, player_list_of_items)
-        print(table)
+        # computed again whenever the clock ticks, only the rows whose prices or stock moved are formatted
+        table = Computed(lambda: self.build_combined_inventory_table(
+            list_of_items, player_list_of_items))
+        self.screen.show(self.status, table)
 
-        buying_or_selling = self.get_buy_sell_choice()
+        buying_or_selling = await self.get_buy_sell_choice()
 
         # checks if trade valid for trade validation
         if buying_or_selling == 'buying':
             # get user input for list_of_items
-            choice = self.get_input_for_item_selection(list_of_items, False)
+            choice = await self.get_input_for_item_selection(list_of_items)
 
             # set user_selection to MarketItem selected
             self.user_selection = list_of_items[choice - 1]
-            # floor for max trade quantity taking into account what is available in the market quantity
-            max_trade_qty = floor(
-                self.game.player.inv.gold / self.user_selection.price)
-
-            max_trade_qty = min(max_trade_qty, self.game.player.location.inv.get_market_item(
-                self.user_selection.item_name).quantity)
+            # max trade quantity taking into account what is available in the market quantity, the price rising as it is bought out and the room left in the hold
+            free_cargo = self.game.free_cargo()
+            max_trade_qty = min(self.user_selection.max_buy_quantity(
+                self.game.player.inv.gold), free_cargo)
 
             if max_trade_qty > 0:
-                user_input_qty = self.get_input_for_qty_buy(
+                user_input_qty = await self.get_input_for_qty_buy(
                     max_trade_qty, self.user_selection.item_name)
 
                 trade_valid = self.user_selection.check_buy(
-                    user_input_qty, self.game.player.inv.gold)
+                    user_input_qty, self.game.player.inv.gold) and user_input_qty <= free_cargo
+            else:
+                self.screen.show(self.status, table,
+                                 "Our hold is full sir, we must sell before we buy!" if free_cargo <= 0 else
+                                 f"We cannot afford any {self.user_selection.item_name} sir!")
+                trade_valid = False
 
         elif buying_or_selling == 'selling':
             # get user input for list_of_items
-            choice = self.get_input_for_item_selection(list_of_items, False)
+            choice = await self.get_input_for_item_selection(list_of_items)
 
             # set user_selection to MarketItem selected
             self.user_selection = list_of_items[choice - 1]
@@ -270,12 +257,12 @@ class View:
                 self.user_selection.item_name).quantity
 
             if max_trade_qty == 0:
-                print(
-                    f"Looks like you don't have any {self.user_selection.item_name} to trade sir!")
+                self.screen.show(self.status, table,
+                                 f"Looks like you don't have any {self.user_selection.item_name} to trade sir!")
                 trade_valid = False
 
             else:
-                user_input_qty = self.get_input_for_qty_sell(
+                user_input_qty = await self.get_input_for_qty_sell(
                     max_trade_qty, self.user_selection.item_name)
 
                 player_item_to_check = self.game.player.inv.get_player_item(
@@ -289,62 +276,129 @@ class View:
             trade_valid = False
 
         if trade_valid:
-            self.game.execute_trade(self.user_selection, user_input_qty,
-                                    self.game.player.inv, self.game.player.location.inv, buying_or_selling)
-            input("Trade Complete, press enter to return to docks")
+            order = self.game.execute_trade(self.user_selection, user_input_qty,
+                                            self.game.player.inv, self.game.player.location.inv, buying_or_selling)
+            # only the rows of the goods just traded are formatted again
+            self.screen.show(self.status, table)
+            if order is not None:
+                # in order book mode the trade is only queued, it fills as time passes
+                await self.screen.ask(f"Order placed at {order.limit} a unit, it fills as time passes, see {ORDERS_MENU_OPTION}. Press enter to return to docks")
+            else:
+                await self.screen.ask("Trade Complete, press enter to return to docks")
         else:
-            input("Press enter to return to docks")
+            await self.screen.ask("Press enter to return to docks")
 
-    def inventory_view(self):
-        self.clear_sceen()
-        self.get_game_status()
+    async def inventory_view(self):
         player_inventory_table = self.build_player_item_table(
             self.game.player.inv.get_list_of_items())
 
-        print(player_inventory_table)
+        self.screen.show(self.status, player_inventory_table)
+
+        await self.screen.ask("Press enter key to continue...")
+
+    async def orders_view(self):
+        """
+        Lists the player's open orders and lets the user cancel one, the gold or cargo it still holds goes back to the player, see Game.cancel_order()
+        """
+        orders = self.game.open_orders()
+        if not orders:
+            self.screen.show(self.status, "We have no orders waiting in the trading houses sir.")
+            await self.screen.ask("Press enter to return to docks")
+            return
+
+        self.screen.show(self.status, self.build_orders_table(orders))
+        choice = await self.screen.ask_number(
+            f"Which order shall we cancel?\n(Enter a number from 1 to {len(orders)}, or {len(orders) + 1} to return to docks)", len(orders) + 1)
+        if choice > len(orders):
+            return
+        order = orders[choice - 1]
+        # the clock kept running while the player chose, the order may have filled since the list was drawn
+        if not order.remaining:
+            await self.screen.ask("That order has already filled sir, press enter to return to docks")
+            return
+        self.game.cancel_order(order)
+        await self.screen.ask("Order cancelled, press enter to return to docks")
+
+    async def debug_view(self):
+        """
+        Shows the calls recorded by the profiler and lets the user dump them as collapsed stacks for a flamegraph, or reset them
+        """
+        self.screen.show(self.build_profiler_table(PROFILER.summary()))
 
-        input("Press enter key to continue...")
+        options = ['write', 'reset', 'exit']
+        choice = await self.screen.ask_number(
+            f"Please select from the following\n\\[1] Write flamegraph stacks to {profiler.COLLAPSED_STACKS_PATH}\n\\[2] Reset profiler\n\\[3] Return to Menu\n",
+            len(options))
+        if options[choice - 1] == 'write':
+            path = PROFILER.write_collapsed()
+            await self.screen.ask(f"Wrote {path}, press enter to return to docks")
+        elif options[choice - 1] == 'reset':
+            PROFILER.reset()
 
-    def wait(self):
-        self.clear_sceen()
-        self.get_game_status()
+    async def wait(self):
+        self.time_passed = self.game.get_wait_time()
 
-        # use timedelta to advance day by one
-        next_day_datetime = (self.game.current_date +
-                             timedelta(days=1))
+        await self.pass_time(self.time_passed, "Waiting till next day...")
+        self.game.wait()
 
-        # use datetime.replace() function to set the date time to start of day when markets refresh
-        next_day_datetime = next_day_datetime.replace(
-            hour=6, minute=0, second=0)
+    def toggle_clock(self):
+        self.paused = not self.paused
+        self.user_last_action = "Pause clock" if self.paused else "Resume clock"
 
-        self.time_passed = next_day_datetime - self.game.current_date
-        total_seconds = round(self.time_passed.total_seconds())
+    async def pass_time(self, time_passed: timedelta, description: str):
+        """
+        Draws a progress bar for time_passed, the game clock itself is advanced by Game.travel() and Game.wait()
 
-        for i in track(range(0, total_seconds), "Waiting till next day..."):
-            time.sleep(.00001)
-        self.game.advance_time(self.time_passed)
-        Game.update_market(self.game.player.location)
+        The bar is drawn at FRAMES_PER_SECOND for a wall clock time that grows with time_passed but is clamped between MIN_ANIMATION_SECONDS and MAX_ANIMATION_SECONDS,
+        so a long voyage costs the same handful of frames as a short one. The bar is drawn in place on the Screen and the game clock stands still
+        while it is. With self.animate False nothing is drawn.
 
-    def get_game_status(self):
+        Args:
+            time_passed (timedelta): game time to advance
+            description (str): text shown beside the progress bar
+        """
+        if self.animate:
+            hours = time_passed.total_seconds() / 3600
+            animation_seconds = min(MAX_ANIMATION_SECONDS, max(
+                MIN_ANIMATION_SECONDS, hours * ANIMATION_SECONDS_PER_GAME_HOUR))
+            frames = round(animation_seconds * FRAMES_PER_SECOND)
+
+            self.passing_time = True
+            try:
+                for frame in range(frames + 1):
+                    self.screen.show(self.status, description, ProgressBar(total=frames, completed=frame, width=40))
+                    await asyncio.sleep(1 / FRAMES_PER_SECOND)
+            finally:
+                self.passing_time = False
+
+    @instrument()
+    def get_game_status(self) -> Panel:
         """
         Simple game status method intended to be called at start of each turn or menu selection
 
-        Updated to use Rich for formatting
+        Updated to use Rich for formatting, the panel is only built again when one of its values changed
+
+        Returns:
+            Panel: status panel to draw at the top of the screen
         """
+        return self.status_panel.get(self.game.current_date, self.paused, self.game.player.location.name, self.time_passed, self.user_last_action,
+                                     self.game.player.inv.gold)
+
+    @staticmethod
+    def build_status_panel(current_date, paused, location, time_passed, user_last_action, gold) -> Panel:
         grid = Table.grid(expand=False)
 
         grid.add_column(justify="left")
-        grid.add_row(f"Date: {self.game.current_date}")
+        grid.add_row(f"Date: {current_date}{' (paused)' if paused else ''}")
         grid.add_row(
-            f"Location: {self.game.player.location.name.capitalize()}")
-        grid.add_row(f"Time Passed: {self.time_passed}")
-        grid.add_row(f"Last Action: {self.user_last_action}")
-        grid.add_row(f"Gold:  {self.game.player.inv.gold}")
-
-        panel = Panel(grid)
+            f"Location: {location.capitalize()}")
+        grid.add_row(f"Time Passed: {time_passed}")
+        grid.add_row(f"Last Action: {user_last_action}")
+        grid.add_row(f"Gold:  {gold}")
 
-        print(panel)
+        return Panel(grid)
 
+    @instrument()
     def get_sorted_cities(self):
         """
         Returns list of cities sorted closest to furthest based on the city the player is in
@@ -352,73 +406,43 @@ class View:
         city_distance_dict = self.game.player.location.sort_closest_cities(
         ).items()
 
-        list_of_cities = []
+        return list(city_distance_dict)
 
-        for i, (city, distance) in enumerate(city_distance_dict):
-            print(f"{i+1}. {city.capitalize()} {distance} (distance in NM)")
-            list_of_cities.append((city, distance))
+    async def get_input_for_int_val(self, value):
+        return await self.screen.ask_number(
+            f"Please choose the number coorresponding to your choice from 1 to {value}", value)
 
-        return list_of_cities
+    async def get_input_main_menu_selection(self, value):
+        return await self.screen.ask_number(
+            f"(Enter a number from 1 to {len(value)})", len(value))
 
-    @staticmethod
-    def clear_sceen():
-        """Function that clears screen depending on what OS user is running"""
-        os.system('clear' if os.name == 'posix' else 'cls')
-
-    @staticmethod
-    def get_input_for_int_val(value, show_choices=False):
-        range_of_menu = [str(num) for num in range(1, value + 1)]
-        choice = IntPrompt.ask(
-            f"Please choose the number coorresponding to your choice from 1 to {value}", choices=range_of_menu, show_choices=show_choices)
-        return choice
-
-    def get_input_main_menu_selection(self, value, show_choices=False):
-        range_of_menu = [str(num) for num in range(1, len(value) + 1)]
-        choice = IntPrompt.ask(
-            f"(Enter a number from 1 to {len(value)}) ", choices=range_of_menu, show_choices=show_choices)
-        return choice
+    async def get_input_for_city_choice(self, value):
+        return await self.screen.ask_number(
+            f"Where are we sailing to my lord?\n(Enter a number between 1 and {len(value)})", len(value))
 
-    @staticmethod
-    def get_input_for_city_choice(value, show_choices=False):
-        range_of_menu = [str(num) for num in range(1, len(value) + 1)]
-        choice = IntPrompt.ask(
-            f"Where are we sailing to my lord?\n(Enter a number between 1 and {len(value)}) ", choices=range_of_menu, show_choices=show_choices)
-        return choice
+    async def get_input_for_item_selection(self, value):
+        return await self.screen.ask_number(
+            f"Please select an item from the tables above!\n(Please enter a number between 1 and {len(value)})", len(value))
 
-    @staticmethod
-    def get_input_for_item_selection(value, show_choices=False):
-        range_of_menu = [str(num) for num in range(1, len(value) + 1)]
-        choice = IntPrompt.ask(
-            f"Please select an item from the tables above!\n(Please enter a number between 1 and {len(value)})", choices=range_of_menu, show_choices=show_choices)
-        return choice
-
-    @staticmethod
-    def get_input_for_qty_buy(value, trade_good, show_choices=False):
-        range_of_menu = [str(num) for num in range(1, value + 1)]
+    async def get_input_for_qty_buy(self, value, trade_good):
         dialogue = f"How much {trade_good} would you like to buy?"
-        choice = IntPrompt.ask(
-            f"{dialogue}\n(Please enter a whole number from 1 to {value})", choices=range_of_menu, show_choices=show_choices)
-        return choice
+        return await self.screen.ask_number(
+            f"{dialogue}\n(Please enter a whole number from 1 to {value})", value)
 
-    @staticmethod
-    def get_input_for_qty_sell(value, trade_good, show_choices=False):
-        range_of_menu = [str(num) for num in range(1, value + 1)]
+    async def get_input_for_qty_sell(self, value, trade_good):
         dialogue = f"How much {trade_good} would you like to sell?"
-        choice = IntPrompt.ask(
-            f"{dialogue}\n(Please enter a whole number from 1 to {value})", choices=range_of_menu, show_choices=show_choices)
-        return choice
+        return await self.screen.ask_number(
+            f"{dialogue}\n(Please enter a whole number from 1 to {value})", value)
 
-    @staticmethod
-    def get_buy_sell_choice():
+    async def get_buy_sell_choice(self):
         options = ['buying', 'selling', 'exit']
-        range_of_menu = [str(num) for num in range(1, len(options) + 1)]
-        dialogue = random.choice(TRADING_HOUSE_DIALOGUE)
-        print(dialogue)
-        choice = IntPrompt.ask(
-            "Please select from the following\n[1] Buy\n[2] Sell\n[3] Return to Menu\n ", choices=range_of_menu, show_choices=True)
+        dialogue = self.game.rng.stream(DIALOGUE).choice(TRADING_HOUSE_DIALOGUE)
+        choice = await self.screen.ask_number(
+            f"{dialogue}\nPlease select from the following\n\\[1] Buy\n\\[2] Sell\n\\[3] Return to Menu\n", len(options))
         return options[choice - 1]
 
     @staticmethod
+    @instrument()
     def build_trading_item_table(list_of_items):
         table = Table(title="Trading House Inv")
         table.add_column("#")
@@ -430,82 +454,100 @@ class View:
                 f"{index+1}", f"{item.item_name.title()}", f"{item.quantity}", f"{item.price}")
         return table
 
-    @staticmethod
-    def build_player_item_table(list_of_items):
-        table = Table(title="Cargo Hold Inv")
-        table.add_column("#")
-        table.add_column("Trade Good")
-        table.add_column("Inventory")
-        table.add_column("Cost")
-        for index, item in enumerate(list_of_items):
-            table.add_row(
-                f"{index+1}", f"{item.item_name.title()}", f"{item.quantity}", f"{item.cost}")
-        return table
+    @instrument()
+    def build_player_item_table(self, list_of_items):
+        return self.player_table.update((item.item_name, item.quantity, item.cost) for item in list_of_items)
 
-    @staticmethod
-    def build_combined_inventory_table(trading_house_items, cargo_hold_items):
+    @instrument()
+    def build_combined_inventory_table(self, trading_house_items, cargo_hold_items):
         """builds a single table showcasing the trading house and cargo hold inventory inline listed by unique item rows, this is useful for comparing the market prices and the players inventory costs to determine what to buy or sell
 
+        Rows are cached, only the rows whose market or cargo values changed since the table was last built are formatted again, see CachedTable
+
         Args:
-            market_items (list[MarketItems]): _description_
-            player_items (list[PlayerItems]): _description_
+            market_items (list[MarketItems]): items of the market, one row each
+            player_items (list[PlayerItems]): items of the cargo hold, shown beside the market item of the same name
 
         Returns:
-            _type_: _description_
+            Table: the table
         """
-
-        table = Table(title="Market and Inventory")
-        table.add_column("#", justify="right")
-        table.add_column("Trade Good", justify="left")
-        table.add_column("Market Qty", justify="right")
-        table.add_column("Market Price", justify="right")
-        table.add_column("Cargo Qty", justify="right")
-        table.add_column("Cargo Cost/Unit", justify="right")
-        table.add_column("Total Cost", justify="right")
-        table.add_column("Market Value", justify="right")
-
         cargo_hold_dict = {item.item_name: item for item in cargo_hold_items}
-
-        for index, market_item in enumerate(trading_house_items):
+        keys = []
+        for market_item in trading_house_items:
             cargo_item = cargo_hold_dict.get(market_item.item_name)
-            cargo_quantity = cargo_item.quantity if cargo_item else 0
-            cargo_cost_per_unit = cargo_item.cost if cargo_item else 0
-            total_cost = cargo_quantity * cargo_cost_per_unit
-            total_value = cargo_quantity * market_item.price
+            keys.append((market_item.item_name, market_item.quantity, market_item.price,
+                         cargo_item.quantity if cargo_item else 0, cargo_item.cost if cargo_item else 0))
+        return self.combined_table.update(keys)
 
-            table.add_row(
-                str(index + 1),
-                market_item.item_name.title(),
-                str(market_item.quantity),
-                f"{market_item.price}",
-                str(cargo_quantity),
-                f"{cargo_cost_per_unit}",
-                f"{total_cost}",
-                f"{total_value}"
-            )
+    @staticmethod
+    def format_combined_row(number, item_name, market_quantity, price, cargo_quantity, cargo_cost_per_unit):
+        total_cost = cargo_quantity * cargo_cost_per_unit
+        total_value = cargo_quantity * price
+        return (
+            str(number),
+            item_name.title(),
+            str(market_quantity),
+            f"{price}",
+            str(cargo_quantity),
+            f"{cargo_cost_per_unit}",
+            f"{total_cost}",
+            f"{total_value}"
+        )
+
+    def build_orders_table(self, orders):
+        goods = self.game.market.goods
+        table = Table(title="Open Orders")
+        for column in ("#", "City", "Trade Good", "Side", "Filled", "Quantity", "Limit"):
+            table.add_column(column, justify="left" if column in ("City", "Trade Good", "Side") else "right")
+        for index, order in enumerate(orders):
+            row, col = divmod(order.cell, len(goods))
+            table.add_row(f"{index+1}", self.game.market.cities[row].capitalize(), goods[col].title(), order.side, f"{order.filled}",
+                          f"{order.quantity}", f"{order.limit}")
+        return table
+
+    @staticmethod
+    def build_profiler_table(list_of_stats):
+        table = Table(title="Profiler")
+        table.add_column("Function", justify="left")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total ms", justify="right")
+        table.add_column("Own ms", justify="right")
+        table.add_column("Mean us", justify="right")
+        table.add_column("Max us", justify="right")
+        for stats in list_of_stats:
+            table.add_row(stats.name, f"{stats.calls}", f"{stats.total * 1e3:.2f}", f"{stats.own * 1e3:.2f}",
+                          f"{stats.mean * 1e6:.1f}", f"{stats.max * 1e6:.1f}")
         return table
 
-    def process_input(self):
+    async def process_input(self):
         if self.menu_selection == self.menu[0]:
             self.user_last_action = "Travel"
-            self.travel_view()
+            await self.travel_view()
         elif self.menu_selection == self.menu[1]:
             self.user_last_action = "Trade"
-            self.trade_view()
+            await self.trade_view()
         elif self.menu_selection == self.menu[2]:
             self.user_last_action = "Inventory"
-            self.inventory_view()
+            await self.inventory_view()
         elif self.menu_selection == self.menu[3]:
             self.user_last_action = "Wait"
-            self.wait()
-        elif self.menu_selection == self.menu[4]:
+            await self.wait()
+        elif self.menu_selection == CLOCK_MENU_OPTION:
+            self.toggle_clock()
+        elif self.menu_selection == ORDERS_MENU_OPTION:
+            self.user_last_action = "Orders"
+            await self.orders_view()
+        elif self.menu_selection == DEBUG_MENU_OPTION:
+            self.user_last_action = "Debug"
+            await self.debug_view()
+        elif self.menu_selection == self.menu[-1]:
             self.user_last_action = "Quit"
             self.menu_selection = 'q'
         else:
-            print("Invalid input.")
+            await self.screen.ask("Invalid input.")
 
-    def title_screen(self):
+    async def title_screen(self):
         title = Panel.fit(f"{'PyMerchant':^30}\n" +
                           "A Hanseatic Trade League Simulation")
-        print(title)
-        input("Press enter to continue")
+        self.screen.show(title)
+        await self.screen.ask("Press enter to continue")
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import os
+from array import array
+from dataclasses import dataclass
+from math import dist
+
+from rng import CounterRandom, derive_key
+
+# world loaded by enumerations.py, unless PYMERCHANT_WORLD names another world file
+DEFAULT_WORLD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'world.json')
+
+# generate_world() defaults
+GENERATED_REGIONS = 8
+GENERATED_CATEGORIES = 8
+# share of generated goods that are raw, the rest are produced from up to MAX_GENERATED_INPUTS earlier goods
+RAW_GOODS_SHARE = 0.4
+MAX_GENERATED_INPUTS = 4
+# every generated port has lanes to this many of its nearest ports
+GENERATED_LANES = 6
+# side of the square sea generated ports are scattered over, in nautical miles
+GENERATED_MAP_SIZE = 3000
+# share of all goods each generated port produces
+GENERATED_PRODUCTION_SHARE = 0.1
+
+
+@dataclass(frozen=True, slots=True)
+class GoodInfo:
+    """
+    Static metadata of a good, built once per World and shared by every item of that good in every inventory
+    """
+    name: str
+    category: str
+    inputs: tuple[str, ...]
+    mu: float
+    sigma: float
+
+
+class World:
+    """
+    A world definition, the cities and goods of a game, compiled into compact indexed structures
+
+    Cities, goods, regions and categories are numbered in the order they are defined, and everything about them is kept in flat arrays and lists indexed
+    by those numbers: mu[good], inputs[good], region[city], lanes[city] and so on. Names are only looked up through city_index and good_index at the
+    edges, so subsystems working on thousands of ports and hundreds of goods never chase nested dicts.
+
+    A definition is a dict of 'regions', 'categories', 'goods', 'cities' and optionally 'start', see data/world.json for the layout
+    """
+
+    def __init__(self, definition: dict) -> None:
+        """
+        Initializes World
+
+        Args:
+            definition (dict): world definition, as read from a world file
+
+        Raises:
+            ValueError: if the definition refers to an unknown region, category or good
+        """
+        self.regions: list[str] = list(definition['regions'])
+        self.categories: list[str] = list(definition['categories'])
+        self.goods: list[str] = list(definition['goods'])
+        self.cities: list[str] = list(definition['cities'])
+        self.region_index = {region: i for i, region in enumerate(self.regions)}
+        self.category_index = {category: i for i, category in enumerate(self.categories)}
+        self.good_index = {good: i for i, good in enumerate(self.goods)}
+        self.city_index = {city: i for i, city in enumerate(self.cities)}
+        self.start = definition.get('start', self.cities[0])
+
+        try:
+            goods = definition['goods'].values()
+            self.mu = array('d', [info['mu'] for info in goods])
+            self.sigma = array('d', [info['sigma'] for info in goods])
+            self.category = array('H', [self.category_index[info['category']] for info in goods])
+            self.inputs: list[tuple[int, ...]] = [tuple(self.good_index[good] for good in info['inputs']) for info in goods]
+
+            cities = definition['cities'].values()
+            self.region = array('H', [self.region_index[info['region']] for info in cities])
+            self.produced: list[frozenset[int]] = [frozenset(self.good_index[good] for goods in info['productions'].values() for good in goods)
+                                                   for info in cities]
+        except KeyError as error:
+            raise ValueError(f"World definition refers to an unknown name {error}") from None
+        # sea lanes as adjacency lists of (city, distance), lanes to cities outside the world are dropped
+        self.lanes: list[list[tuple[int, float]]] = [[(self.city_index[destination], distance) for destination, distance in info['distances'].items()
+                                                      if destination in self.city_index] for info in cities]
+
+        self.goods_by_category: list[list[int]] = [[] for category in self.categories]
+        for good, category in enumerate(self.category):
+            self.goods_by_category[category].append(good)
+        self.cities_by_region: list[list[int]] = [[] for region in self.regions]
+        for city, region in enumerate(self.region):
+            self.cities_by_region[region].append(city)
+
+        # one shared GoodInfo per good, indexed like the goods
+        self.info: list[GoodInfo] = [GoodInfo(name, self.categories[category], tuple(self.goods[trade_good] for trade_good in inputs), mu, sigma)
+                                     for name, category, inputs, mu, sigma in zip(self.goods, self.category, self.inputs, self.mu, self.sigma)]
+
+    def __repr__(self) -> str:
+        return f"World({len(self.cities)} cities, {len(self.goods)} goods)"
+
+    def category_of(self, good: str) -> str:
+        """
+        Returns the category of a good by name
+        """
+        return self.categories[self.category[self.good_index[good]]]
+
+    def info_of(self, good: str) -> GoodInfo:
+        """
+        Returns the GoodInfo of a good by name
+        """
+        return self.info[self.good_index[good]]
+
+    def region_of(self, city: str) -> str | None:
+        """
+        Returns the region of a city by name, None for a city outside the world
+        """
+        row = self.city_index.get(city)
+        return None if row is None else self.regions[self.region[row]]
+
+
+def load_world(path: str = DEFAULT_WORLD_PATH) -> World:
+    """
+    Loads a world definition from a JSON world file
+
+    Args:
+        path (str, optional): world file. Defaults to DEFAULT_WORLD_PATH.
+
+    Returns:
+        World: the compiled world
+    """
+    with open(path) as file:
+        return World(json.load(file))
+
+
+def generate_world(cities: int, goods: int, seed: int = 0, regions: int = GENERATED_REGIONS, categories: int = GENERATED_CATEGORIES,
+                   lanes: int = GENERATED_LANES) -> dict:
+    """
+    Generates a synthetic world definition, for stress testing the game with worlds far larger than the Hanseatic map
+
+    Ports are scattered over a square sea and split into regions by longitude. Each port has lanes to its nearest ports, and consecutive ports west
+    to east are always linked so that every port can be reached. Goods are either raw or produced from earlier goods, so production chains never loop.
+
+    Args:
+        cities (int): number of ports
+        goods (int): number of goods
+        seed (int, optional): seed, the same seed always generates the same world. Defaults to 0.
+        regions (int, optional): number of regions. Defaults to GENERATED_REGIONS.
+        categories (int, optional): number of good categories. Defaults to GENERATED_CATEGORIES.
+        lanes (int, optional): lanes from each port to its nearest ports. Defaults to GENERATED_LANES.
+
+    Returns:
+        dict: world definition, see World
+    """
+    rng = CounterRandom(derive_key(seed, 'world'))
+    region_names = [f'region_{region:02d}' for region in range(regions)]
+    category_names = [f'category_{category:02d}' for category in range(categories)]
+
+    good_names = [f'good_{good:04d}' for good in range(goods)]
+    goods_definition = {}
+    number_raw = max(1, round(goods * RAW_GOODS_SHARE))
+    for good, name in enumerate(good_names):
+        if good < number_raw:
+            inputs = []
+            mu = rng.randint(10, 400)
+        else:
+            inputs = rng.sample(good_names[:good], rng.randint(1, min(MAX_GENERATED_INPUTS, good)))
+            mu = round(sum(goods_definition[trade_good]['mu'] for trade_good in inputs) * rng.uniform(1.1, 1.6))
+        goods_definition[name] = {'category': category_names[good % categories], 'mu': mu,
+                                  'sigma': max(1, round(mu * rng.uniform(0.1, 0.3))), 'inputs': inputs}
+
+    # ports sorted west to east, so regions are bands of longitude
+    positions = sorted((rng.uniform(0, GENERATED_MAP_SIZE), rng.uniform(0, GENERATED_MAP_SIZE)) for city in range(cities))
+    city_names = [f'port_{city:04d}' for city in range(cities)]
+    distances = [{} for city in range(cities)]
+
+    def link(a: int, b: int) -> None:
+        distance = max(1, round(dist(positions[a], positions[b])))
+        distances[a][city_names[b]] = distance
+        distances[b][city_names[a]] = distance
+
+    for city in range(cities):
+        nearest = sorted(range(cities), key=lambda other: dist(positions[city], positions[other]))[1:lanes + 1]
+        for other in nearest:
+            link(city, other)
+        if city:
+            link(city - 1, city)
+
+    produced_per_city = max(1, round(goods * GENERATED_PRODUCTION_SHARE))
+    cities_definition = {}
+    for city, name in enumerate(city_names):
+        productions = {}
+        for good in sorted(rng.sample(good_names, min(goods, produced_per_city))):
+            productions.setdefault(goods_definition[good]['category'], []).append(good)
+        cities_definition[name] = {'region': region_names[city * regions // cities], 'distances': distances[city],
+                                   'productions': productions}
+
+    return {'regions': region_names, 'categories': category_names, 'goods': goods_definition, 'cities': cities_definition,
+            'start': city_names[0]}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic PyMerchant world file")
+    parser.add_argument('output', help="world file to write, play it with PYMERCHANT_WORLD=<output> or pymerchant.py --world <output>")
+    parser.add_argument('--cities', type=int, default=1000)
+    parser.add_argument('--goods', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--regions', type=int, default=GENERATED_REGIONS)
+    parser.add_argument('--categories', type=int, default=GENERATED_CATEGORIES)
+    args = parser.parse_args()
+
+    definition = generate_world(args.cities, args.goods, args.seed, args.regions, args.categories)
+    with open(args.output, 'w') as file:
+        json.dump(definition, file)
+    print(f"Wrote {World(definition)} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()